@@ -0,0 +1,51 @@
+"""
+Compares sequential feed discovery with the concurrent AsyncFeedFetcher against local hosts with artificial latency.
+
+Usage:
+    python -m benchmarks.bench_feed_polling [--feeds 200] [--hosts 10] [--latency 0.3] [--slow-latency 3]
+
+Each host is a local HTTP server on its own port that answers after --latency
+seconds; the first host stands in for a slow one (libsyn, BBC) and answers
+after --slow-latency seconds.
+"""
+import argparse
+import time
+from src.async_feeds import AsyncFeedFetcher
+from src.podcast_rss_reader import PodcastRSSFeedReader
+from src.tests.test_async_feeds import FeedHost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--skip-sequential", action="store_true", help="skip the (slow) sequential baseline")
+    args = parser.parse_args()
+
+    hosts = [FeedHost(latency=args.slow_latency if i == 0 else args.latency) for i in range(args.hosts)]
+    try:
+        urls = [f"{hosts[i % args.hosts].url}/show{i}" for i in range(args.feeds)]
+        print(f"{args.feeds} feeds on {args.hosts} hosts, {args.latency}s latency ({args.slow_latency}s on one host)")
+        print(f"{'path':<12}{'episodes':>10}{'seconds':>10}")
+
+        started = time.perf_counter()
+        episodes = AsyncFeedFetcher(per_host=args.per_host).fetch_all(urls, 2024)
+        elapsed = time.perf_counter() - started
+        print(f"{'concurrent':<12}{sum(len(e) for e in episodes.values()):>10}{elapsed:>10.2f}")
+
+        if not args.skip_sequential:
+            started = time.perf_counter()
+            sequential = {url: PodcastRSSFeedReader(url).get_episodes(filter_by_year=2024) for url in urls}
+            elapsed = time.perf_counter() - started
+            print(f"{'sequential':<12}{sum(len(e) for e in sequential.values()):>10}{elapsed:>10.2f}")
+            assert sequential == episodes
+    finally:
+        for host in hosts:
+            host.close()
+
+
+if __name__ == "__main__":
+    main()
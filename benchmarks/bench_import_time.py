@@ -0,0 +1,84 @@
+"""
+Measures how long each entry point takes to import, and which heavy dependencies it loads.
+
+Usage:
+    python -m benchmarks.bench_import_time [--repeat 5]
+
+Every target is imported in a fresh interpreter, --repeat times, and the median
+is reported: "process" is the whole interpreter run including startup, "import"
+is just the import statement, and "peak RSS" is the child's maximum resident set.
+The last columns show whether Whisper, torch, Prefect's task machinery or
+mysql.connector were loaded. The CLI rows import what each subcommand's handler
+imports, which is what a scheduled job pays before doing any work. For
+per-module detail, run python -X importtime -c "import pipeline".
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("whisper", "torch", "prefect.tasks", "mysql.connector")
+TARGETS = {
+    "pipeline": "import pipeline",
+    "src.audio2text": "import src.audio2text",
+    "src.sql.db_writer": "import src.sql.db_writer",
+    "cli (parser only)": "import src.cli",
+    "cli discover": "import src.cli, src.async_feeds, src.feed_cache",
+    "cli dedupe": "import src.cli, src.sql.db_config, src.sql.db_writer",
+    "cli download": "import src.cli, src.spool",
+    "cli transcribe": "import src.cli, src.audio2text, src.transcript_cache",
+    "cli store": "import src.cli, src.sql.write_behind",
+}
+CHILD = """
+import json, resource, sys, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "import": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(statement: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", CHILD.format(statement=statement, heavy=HEAVY)],
+                                cwd=ROOT, capture_output=True, text=True)
+        process = time.perf_counter() - started
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1]}
+        runs.append({**json.loads(result.stdout.strip().splitlines()[-1]), "process": process})
+    return {
+        "process": statistics.median(run["process"] for run in runs),
+        "import": statistics.median(run["import"] for run in runs),
+        "rss_mb": statistics.median(run["rss_mb"] for run in runs),
+        "loaded": runs[0]["loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'target':<20}{'process s':>11}{'import s':>10}{'peak RSS MB':>13}  " + "  ".join(HEAVY))
+    for name, statement in TARGETS.items():
+        result = measure(statement, args.repeat)
+        if "error" in result:
+            print(f"{name:<20}  failed: {result['error']}")
+            continue
+        flags = "  ".join(f"{'yes' if module in result['loaded'] else '-':^{len(module)}}" for module in HEAVY)
+        print(f"{name:<20}{result['process']:>11.2f}{result['import']:>10.2f}{result['rss_mb']:>13.0f}  {flags}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Offline end-to-end benchmark of the ingestion pipeline.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--feeds 2] [--episodes 3] [--episode-seconds 60] [--model tiny]
+    python -m benchmarks.bench_pipeline --no-transcribe        # fetch, download and store only
+    python -m benchmarks.bench_pipeline --save-baseline        # record the stored baseline
+
+A local HTTP server serves synthetic RSS feeds whose enclosures are
+generated 16 kHz WAV files (tone bursts separated by silences, different per
+episode so the transcript cache never dedupes them). The database is the
+SQLite stand-in (DB_BACKEND=sqlite), and the feed and transcript caches, the
+watermarks and the download spool live in a temporary directory, so nothing
+outside it is touched.
+
+Each task (fetch_episodes, download_audio, transcribe_audio, store_episode_data)
+is first run on its own, one call per feed or episode, for per-stage latency
+percentiles. Then audio_pipeline and pipelined_audio_pipeline each ingest the
+whole catalog into a fresh database, with fresh watermarks, for episodes/hour
+(counted from the episodes actually stored). Results, including
+peak RSS, are written as JSON and compared against the stored baseline;
+the exit status is 1 if any metric regressed by more than --tolerance.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import wave
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+SAMPLE_RATE = 16000
+# publication time of every feed's newest episode; each older one is a week earlier
+NEWEST_EPISODE = datetime(2024, 12, 1, 12, 0)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline_pipeline.json")
+# metrics where a higher value is better; every other metric is a latency or a size
+HIGHER_IS_BETTER = ("episodes_per_hour",)
+
+
+def generate_wav(seconds: float, seed: int) -> bytes:
+    """Tone bursts of varying pitch separated by short silences, with a little noise."""
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    pos = 0
+    while pos < len(samples):
+        burst = int(rng.uniform(0.8, 2.5) * SAMPLE_RATE)
+        t = np.arange(min(burst, len(samples) - pos)) / SAMPLE_RATE
+        samples[pos:pos + len(t)] = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 400) * t)
+        pos += len(t) + int(rng.uniform(0.2, 0.8) * SAMPLE_RATE)
+    samples += rng.normal(0, 0.005, len(samples)).astype(np.float32)
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class SyntheticPodcastServer:
+    """
+    Serves /feeds/<feed>.rss and /audio/<feed>-<episode>.wav from memory on a local port.
+
+    Attributes:
+        base_url (str): URL of the server, e.g. http://127.0.0.1:54321.
+        since (datetime): Publication time of the oldest episode, so a read from it sees the whole catalog.
+    """
+
+    def __init__(self, feeds: int, episodes: int, episode_seconds: float):
+        self._feeds = {}
+        self._audio = {}
+        server_ref = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, content_type = server_ref._lookup(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.since = NEWEST_EPISODE - timedelta(days=7 * max(episodes - 1, 0))
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        for f in range(feeds):
+            self._feeds[f"/feeds/{f}.rss"] = self._feed_xml(f, episodes)
+            for e in range(episodes):
+                self._audio[f"/audio/{f}-{e}.wav"] = generate_wav(episode_seconds, seed=f * 10_000 + e)
+
+    def _feed_xml(self, feed: int, episodes: int) -> bytes:
+        items = []
+        for e in range(episodes):
+            url = f"{self.base_url}/audio/{feed}-{e}.wav"
+            items.append(
+                f"<item><title>Feed {feed} episode {e}</title><link>{url}.html</link>"
+                f"<description>Synthetic episode {e}</description>"
+                f"<pubDate>{format_datetime(NEWEST_EPISODE - timedelta(days=7 * e))}</pubDate>"
+                f'<enclosure url="{url}" type="audio/wav" length="0"/></item>'
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Synthetic feed {feed}</title>{''.join(items)}</channel></rss>"
+        ).encode("utf-8")
+
+    def _lookup(self, path: str):
+        if path in self._feeds:
+            return self._feeds[path], "application/rss+xml"
+        if path in self._audio:
+            return self._audio[path], "audio/wav"
+        return None, None
+
+    @property
+    def feed_urls(self) -> List[str]:
+        return [self.base_url + path for path in self._feeds]
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples)
+    return {
+        "count": len(samples),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p90": round(float(np.percentile(values, 90)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+    }
+
+
+def timed(fn: Callable, samples: List[float]):
+    started = time.perf_counter()
+    result = fn()
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+def use_fresh_database(workdir: str, name: str):
+    """Points the stand-in at a new SQLite file and drops pooled connections to the old one."""
+    from src.sql import db_config
+    os.environ["DB_SQLITE_PATH"] = os.path.join(workdir, f"{name}.sqlite3")
+    with db_config._pool_lock:
+        if db_config._pool is not None:
+            db_config._pool.close()
+        db_config._pool = None
+
+
+def stored_episodes() -> int:
+    """Counts the episodes in the current database."""
+    from src.sql.db_config import db_connection
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM episodes")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+
+def synthetic_segments(count: int = 200) -> list:
+    from src.transcript_segments import TranscriptSegments
+    return TranscriptSegments.from_dicts(
+        {"whisper_segment_id": i, "start": i * 3.0, "end": i * 3.0 + 3.0, "text": f"synthetic segment {i}"}
+        for i in range(count)
+    )
+
+
+def run_stages(workdir: str, feed_urls: List[str], since: datetime, model_size: str,
+               transcribe: bool) -> Dict[str, Dict]:
+    """Runs each task on its own, one call per feed or episode."""
+    import pipeline
+    use_fresh_database(workdir, "stages")
+    samples: Dict[str, List[float]] = {"fetch_episodes": [], "download_audio": [], "store_episode_data": []}
+    if transcribe:
+        samples["transcribe_audio"] = []
+        pipeline.warm_up_model(model_size)
+
+    episodes = []
+    for url in feed_urls:
+        episodes += timed(lambda: pipeline.fetch_episodes(url, since=since, use_cache=False), samples["fetch_episodes"])
+    for episode in episodes:
+        audio_path = timed(lambda: pipeline.download_audio(episode["audio_url"]), samples["download_audio"])
+        if transcribe:
+            segments = timed(
+                lambda: pipeline.transcribe_audio(audio_path, model_size, use_cache=False),
+                samples["transcribe_audio"],
+            )
+        else:
+            os.remove(audio_path)
+            segments = synthetic_segments()
+        timed(lambda: pipeline.store_episode_data(episode, segments), samples["store_episode_data"])
+    return {stage: percentiles(values) for stage, values in samples.items()}
+
+
+def run_flows(workdir: str, feed_urls: List[str], since: datetime, model_size: str) -> Dict[str, Dict]:
+    """Ingests the whole synthetic catalog with each flow, into a fresh database each time."""
+    import pipeline
+    csv_path = os.path.join(workdir, "rss_feeds.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("rss_url\n" + "".join(f"{url}\n" for url in feed_urls))
+
+    results = {}
+    flows = {
+        "audio_pipeline": lambda: pipeline.audio_pipeline(csv_path, model_size, use_feed_cache=False, since=since),
+        "pipelined_audio_pipeline": lambda: pipeline.pipelined_audio_pipeline(
+            csv_path, model_size, use_feed_cache=False, since=since),
+    }
+    for name, run in flows.items():
+        use_fresh_database(workdir, name)
+        # a second run must transcribe again rather than hit the first run's transcripts
+        pipeline.transcript_cache = pipeline.TranscriptCache(os.path.join(workdir, f"{name}-transcripts"))
+        # nor find every feed's watermark already past the catalog
+        pipeline.feed_watermarks = pipeline.FeedWatermarks(os.path.join(workdir, f"{name}-watermarks.json"))
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        episodes = stored_episodes()
+        results[name] = {
+            "episodes": episodes,
+            "seconds": round(elapsed, 3),
+            "episodes_per_hour": round(episodes / elapsed * 3600, 1),
+        }
+    return results
+
+
+def peak_rss_mib() -> Dict[str, float]:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not name.endswith(".count") and not name.endswith(".episodes"):
+            metrics[name] = value
+    return metrics
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Prints every metric next to its baseline and returns the names of those that regressed."""
+    current, previous = flatten(results["metrics"]), flatten(baseline["metrics"])
+    regressions = []
+    print(f"\n{'metric':<52}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name in sorted(current):
+        if name not in previous or not previous[name]:
+            continue
+        change = (current[name] - previous[name]) / previous[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = "  REGRESSED" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<52}{previous[name]:>12.3f}{current[name]:>12.3f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", type=int, default=2)
+    parser.add_argument("--episodes", type=int, default=3, help="episodes per feed")
+    parser.add_argument("--episode-seconds", type=float, default=60.0)
+    parser.add_argument("--model", default="tiny", help="Whisper model size")
+    parser.add_argument("--no-transcribe", action="store_true",
+                        help="skip transcription and the flows; store synthetic segments instead")
+    parser.add_argument("--output", default="bench_pipeline_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            "DB_BACKEND": "sqlite",
+            "FEED_CACHE_PATH": os.path.join(workdir, "feed_cache.json"),
+            "FEED_WATERMARKS_PATH": os.path.join(workdir, "watermarks.json"),
+            "SPOOL_DIR": os.path.join(workdir, "spool"),
+            "TRANSCRIPT_CACHE_DIR": os.path.join(workdir, "transcripts"),
+        })
+        os.environ.pop("SEARCH_INDEX_PATH", None)
+        os.environ.setdefault("PREFECT_LOGGING_LEVEL", "WARNING")
+        cwd = os.getcwd()
+        sys.path.insert(0, cwd)
+        os.chdir(workdir)  # any other relative default path (e.g. the ledger) lands in the workdir too
+        try:
+            with SyntheticPodcastServer(args.feeds, args.episodes, args.episode_seconds) as server:
+                metrics = {"stages": run_stages(workdir, server.feed_urls, server.since, args.model, not args.no_transcribe)}
+                if not args.no_transcribe:
+                    metrics["flows"] = run_flows(workdir, server.feed_urls, server.since, args.model)
+        finally:
+            os.chdir(cwd)
+
+    metrics["peak_rss_mib"] = peak_rss_mib()
+    results = {
+        "config": {
+            "feeds": args.feeds,
+            "episodes_per_feed": args.episodes,
+            "episode_seconds": args.episode_seconds,
+            "model": args.model,
+            "transcribe": not args.no_transcribe,
+        },
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "metrics": metrics,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(metrics, indent=2))
+    print(f"\nresults written to {output}")
+
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f"no baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != results["config"]:
+        print("warning: baseline was recorded with a different configuration")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Compares the full feedparser path with the streaming reader on a synthetic back-catalog feed.
+
+Usage:
+    python -m benchmarks.bench_rss_streaming [--items 10000] [--year 2024]
+
+The feed holds one episode per day, newest first, ending at the end of 2024,
+so a 10k-item feed reaches back to the late 1990s.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from src.podcast_rss_reader import PodcastRSSFeedReader
+
+
+def write_feed(path: str, items: int):
+    newest = datetime(2024, 12, 31, 12, 0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"><channel>\n')
+        f.write("<title>Synthetic Podcast</title>\n")
+        for i in range(items):
+            published = newest - timedelta(days=i)
+            f.write(
+                f"<item><title>Episode {items - i}</title>"
+                f"<link>https://example.com/episodes/{i}</link>"
+                f"<description>&lt;p&gt;Show notes for episode {i}. {'Lorem ipsum dolor sit amet. ' * 20}&lt;/p&gt;</description>"
+                f"<itunes:summary>Summary of episode {i}</itunes:summary>"
+                f"<pubDate>{format_datetime(published)}</pubDate>"
+                f'<enclosure url="https://example.com/audio/{i}.mp3" type="audio/mpeg" length="1000"/>'
+                f"</item>\n"
+            )
+        f.write("</channel></rss>\n")
+
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    episodes = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12}{len(episodes):>10}{elapsed:>10.3f}{peak / 2**20:>12.1f}")
+    return episodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--year", type=int, default=2024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.rss")
+        write_feed(path, args.items)
+        print(f"feed: {args.items} items, {os.path.getsize(path) / 2**20:.1f} MiB")
+        print(f"{'path':<12}{'episodes':>10}{'seconds':>10}{'peak MiB':>12}")
+        full = measure("feedparser", lambda: PodcastRSSFeedReader(path).get_episodes(filter_by_year=args.year))
+        streamed = measure("streaming", lambda: PodcastRSSFeedReader(path, streaming=True).get_episodes(filter_by_year=args.year))
+        assert [ep["audio_url"] for ep in full] == [ep["audio_url"] for ep in streamed]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compares the election-mentions query run as a full scan with the indexed search path.
+
+Usage:
+    python -m benchmarks.bench_search [--segments 1000000]   # synthetic corpus, local index vs regex scan
+    python -m benchmarks.bench_search --mysql                # configured MySQL database, REGEXP vs FULLTEXT
+
+The synthetic corpus spreads the segments over 2,000 episodes from 20 feeds
+published through 2024; roughly one segment in 200 mentions a candidate. The
+scan applies the same word-boundary regexes as presidential-candidate-query.sql
+to every segment, which is what MySQL does without the FULLTEXT index.
+"""
+import argparse
+import random
+import re
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from src.search import SegmentIndex
+
+PHRASES = ["trump", "biden"]
+START, END = datetime(2024, 10, 22), datetime(2024, 11, 20)
+WORDS = ("the we know about that this really market weather season game people going think "
+         "economy policy show guest today story music early later episode question").split()
+
+
+def make_corpus(segments: int, episodes: int = 2000, feeds: int = 20, seed: int = 7):
+    rng = random.Random(seed)
+    meta = {
+        episode_id: (f"Feed {episode_id % feeds}", datetime(2024, 1, 1) + timedelta(hours=rng.randrange(366 * 24)))
+        for episode_id in range(1, episodes + 1)
+    }
+    per_episode = segments // episodes
+    corpus = []
+    for episode_id in meta:
+        rows = []
+        for i in range(per_episode):
+            words = rng.choices(WORDS, k=12)
+            if rng.random() < 0.005:
+                words[rng.randrange(12)] = rng.choice(["Trump", "Biden", "trumpet"])
+            rows.append({"whisper_segment_id": i, "start": i * 3.0, "end": i * 3.0 + 3.0, "text": " ".join(words)})
+        corpus.append((episode_id, rows))
+    return meta, corpus
+
+
+def scan(meta, corpus):
+    """The current path: every segment in the window is tested with REGEXP-style matching."""
+    patterns = [re.compile(rf"\b{phrase}\b") for phrase in PHRASES]
+    matches = []
+    for episode_id, rows in corpus:
+        published = meta[episode_id][1]
+        if not START <= published < END:
+            continue
+        for row in rows:
+            text = row["text"].lower()
+            if any(p.search(text) for p in patterns):
+                matches.append((episode_id, row["whisper_segment_id"]))
+    return matches
+
+
+def timed(label: str, fn, repeat: int = 5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<16}{len(result):>10}{elapsed * 1000:>12.1f}")
+    return result
+
+
+def run_local(segments: int):
+    meta, corpus = make_corpus(segments)
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = SegmentIndex()
+    for episode_id, rows in corpus:
+        index.add_episode(episode_id, *meta[episode_id])
+        index.add_segments(episode_id, rows)
+    build = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"corpus: {index.stats()}")
+    print(f"index build: {build:.1f}s, {size / 2**20:.0f} MiB")
+    print(f"{'path':<16}{'matches':>10}{'ms/query':>12}")
+    scanned = timed("regex scan", lambda: scan(meta, corpus))
+    indexed = timed("local index", lambda: index.search(PHRASES, START, END))
+    timed("per-feed counts", lambda: index.count_by_feed(PHRASES, START, END))
+    assert sorted(scanned) == sorted(indexed)
+
+
+def run_mysql():
+    from src.search import search_segments
+    from src.sql.db_config import get_db_connection
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    def regexp_scan():
+        cursor.execute("""
+            SELECT e.episode_id, t.whisper_segment_id
+            FROM episodes e JOIN transcript_segments t ON e.episode_id = t.episode_id
+            WHERE DATE(e.published_at) BETWEEN %s AND %s
+              AND (LOWER(t.segment_text) REGEXP '\\\\btrump\\\\b' OR LOWER(t.segment_text) REGEXP '\\\\bbiden\\\\b')
+        """, (START.date(), (END - timedelta(days=1)).date()))
+        return cursor.fetchall()
+
+    print(f"{'path':<16}{'matches':>10}{'ms/query':>12}")
+    timed("REGEXP scan", regexp_scan)
+    timed("FULLTEXT", lambda: search_segments(cursor, PHRASES, START, END))
+    cursor.close()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=1_000_000)
+    parser.add_argument("--mysql", action="store_true", help="benchmark against the database configured in .env")
+    args = parser.parse_args()
+    if args.mysql:
+        run_mysql()
+    else:
+        run_local(args.segments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the per-row, batched and LOAD DATA transcript segment write paths.
+
+Usage:
+    python -m benchmarks.bench_segment_insert            # SQLite stand-in (per-row vs batched)
+    python -m benchmarks.bench_segment_insert --mysql    # configured MySQL database, all three paths
+
+Against MySQL every run is rolled back, so no benchmark rows are left behind.
+LOAD DATA requires DB_ALLOW_LOCAL_INFILE=1 and local_infile enabled on the server.
+"""
+import argparse
+import time
+from src.sql import sqlite_stand_in
+from src.sql.db_writer import insert_episode, insert_transcript_segments, load_transcript_segments_infile
+
+SIZES = [100, 1_000, 10_000]
+
+
+def make_segments(n: int) -> list[dict]:
+    return [
+        {"whisper_segment_id": i, "start": i * 2.5, "end": i * 2.5 + 2.5, "text": f"segment {i}\tof the\nepisode"}
+        for i in range(n)
+    ]
+
+
+def insert_per_row(cursor, episode_id: int, segments: list[dict]) -> int:
+    """The original write path: one INSERT round trip per segment."""
+    for segment in segments:
+        cursor.execute("""
+            INSERT INTO transcript_segments (
+                episode_id, whisper_segment_id,
+                segment_start, segment_end, segment_text
+            ) VALUES (%s, %s, %s, %s, %s)
+        """, (episode_id, segment["whisper_segment_id"], segment["start"], segment["end"], segment["text"]))
+    return len(segments)
+
+
+def run(connect, paths: dict) -> None:
+    episode = {"title": "bench", "audio_url": "https://example.com/bench.mp3"}
+    print(f"{'path':<10}{'segments':>10}{'seconds':>10}{'rows/s':>12}")
+    for n in SIZES:
+        segments = make_segments(n)
+        for name, write in paths.items():
+            conn = connect()
+            cursor = conn.cursor()
+            started = time.perf_counter()
+            episode_id = insert_episode(cursor, episode)
+            rows = write(cursor, episode_id, segments)
+            elapsed = time.perf_counter() - started
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            print(f"{name:<10}{n:>10}{elapsed:>10.3f}{rows / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mysql", action="store_true", help="benchmark against the database configured in .env")
+    args = parser.parse_args()
+
+    paths = {"per-row": insert_per_row, "batched": insert_transcript_segments}
+    if args.mysql:
+        from src.sql.db_config import get_db_connection
+        paths["load-data"] = load_transcript_segments_infile
+        run(get_db_connection, paths)
+    else:
+        run(sqlite_stand_in.connect, paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares the memory footprint and pickled size of a transcript held as a list of
+dicts with the columnar TranscriptSegments container.
+
+Usage:
+    python -m benchmarks.bench_transcript_segments [--segments 2000]
+
+2000 segments is roughly a two-hour episode transcribed by Whisper.
+"""
+import argparse
+import pickle
+import time
+import tracemalloc
+from src.transcript_segments import TranscriptSegments
+
+
+def make_segments(count: int) -> list:
+    return [
+        {
+            "whisper_segment_id": i,
+            "start": i * 3.52,
+            "end": i * 3.52 + 3.4,
+            "text": f"and that is really the point of segment {i}, isn't it? I think so.",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(label: str, build):
+    tracemalloc.start()
+    segments = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    payload = pickle.dumps(segments, protocol=pickle.HIGHEST_PROTOCOL)
+    dumped = time.perf_counter()
+    pickle.loads(payload)
+    loaded = time.perf_counter()
+    print(f"{label:<22}{size / 2**10:>12.1f}{len(payload) / 2**10:>14.1f}"
+          f"{(dumped - started) * 1000:>10.2f}{(loaded - dumped) * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=2000)
+    args = parser.parse_args()
+
+    dicts = make_segments(args.segments)
+    assert TranscriptSegments.from_dicts(dicts) == dicts
+    print(f"{'representation':<22}{'memory KiB':>12}{'pickle KiB':>14}{'dump ms':>10}{'load ms':>10}")
+    measure("list of dicts", lambda: make_segments(args.segments))
+    measure("TranscriptSegments", lambda: TranscriptSegments.from_dicts(make_segments(args.segments)))
+
+
+if __name__ == "__main__":
+    main()
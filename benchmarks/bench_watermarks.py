@@ -0,0 +1,45 @@
+"""
+Compares a year scan with an incremental read from a feed watermark, on a synthetic back-catalog feed.
+
+Usage:
+    python -m benchmarks.bench_watermarks [--items 10000] [--new 3]
+
+The feed is the one bench_rss_streaming uses: one episode per day, newest first,
+ending at the end of 2024. The watermark sits on the item just older than the
+--new newest ones, as it would after a previous run stored everything up to
+it. "episodes" is what each run passes on: every one is an audio URL dedupe
+checks against the database, and, if new, an episode to download and transcribe.
+"""
+import argparse
+import os
+import tempfile
+from benchmarks.bench_rss_streaming import measure, write_feed
+from src.podcast_rss_reader import PodcastRSSFeedReader
+from src.watermarks import Watermark
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--new", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.rss")
+        write_feed(path, args.items)
+        newest = PodcastRSSFeedReader(path, streaming=True).iter_episodes()
+        for _ in range(args.new):
+            next(newest)
+        stored = next(newest)
+        newest.close()
+        mark = Watermark(stored["published"], stored["guid"])
+
+        print(f"feed: {args.items} items, {args.new} newer than the watermark ({mark.published})")
+        print(f"{'path':<12}{'episodes':>10}{'seconds':>10}{'peak MiB':>12}")
+        measure("year 2024", lambda: PodcastRSSFeedReader(path, streaming=True).get_episodes(2024))
+        incremental = measure("watermark", lambda: PodcastRSSFeedReader(path, streaming=True).get_episodes(since=mark))
+        assert len(incremental) == args.new
+
+
+if __name__ == "__main__":
+    main()
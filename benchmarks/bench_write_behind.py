@@ -0,0 +1,144 @@
+"""
+Compares storing each episode in its own transaction with the write-behind writer.
+
+Usage:
+    python -m benchmarks.bench_write_behind [--episodes 200] [--segments 400] [--rtt-ms 2] [--batch 20]
+
+Both paths write to a SQLite stand-in file, with every statement and commit
+delayed by --rtt-ms to stand in for the network round trip to a remote MySQL
+server. The per-episode path does what store_episode_data does: check that the
+episode is new, insert it and its segments, commit. "caller blocked" is how long
+the transcription side waits on storage; for write-behind that is only the
+fsync'd append to the spill file.
+"""
+import argparse
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from src.metrics import CountingCursor
+from src.sql import sqlite_stand_in
+from src.sql.db_writer import existing_audio_urls, insert_episode, insert_transcript_segments
+from src.sql.write_behind import WriteBehindWriter
+
+
+class LatentCursor(CountingCursor):
+    """Counts statements and sleeps one round trip for each."""
+
+    def __init__(self, cursor, rtt: float):
+        super().__init__(cursor)
+        self.rtt = rtt
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self.rtt)
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        time.sleep(self.rtt)
+        return super().executemany(*args, **kwargs)
+
+
+class LatentConnection:
+    """A stand-in connection whose statements and commits each cost one round trip."""
+
+    def __init__(self, path: str, rtt: float, totals: dict):
+        self._conn = sqlite_stand_in.connect(path)
+        self.rtt = rtt
+        self.totals = totals
+        self._cursors = []
+
+    def cursor(self):
+        cursor = LatentCursor(self._conn.cursor(), self.rtt)
+        self._cursors.append(cursor)
+        return cursor
+
+    def start_transaction(self):
+        time.sleep(self.rtt)
+        self.totals["round_trips"] += 1
+        self._conn.start_transaction()
+
+    def commit(self):
+        time.sleep(self.rtt)
+        self.totals["round_trips"] += 1
+        self.totals["commits"] += 1
+        self._conn.commit()
+
+    def close(self):
+        self.totals["round_trips"] += sum(cursor.round_trips for cursor in self._cursors)
+        self._conn.rollback()
+        self._conn.close()
+
+
+def make_work(episodes: int, segments: int):
+    return [
+        (
+            {"title": f"Episode {i}", "feed_title": "Bench", "audio_url": f"https://bench.invalid/{i}.mp3",
+             "published": "2024-06-01 00:00:00"},
+            [{"whisper_segment_id": j, "start": j * 3.0, "end": j * 3.0 + 3.0, "text": f"segment {j} of {i}"}
+             for j in range(segments)],
+        )
+        for i in range(episodes)
+    ]
+
+
+def per_episode(work, db_path: str, rtt: float):
+    totals = {"round_trips": 0, "commits": 0}
+    started = time.perf_counter()
+    for episode, segments in work:
+        conn = LatentConnection(db_path, rtt, totals)
+        cursor = conn.cursor()
+        if not existing_audio_urls(cursor, [episode["audio_url"]]):
+            episode_id = insert_episode(cursor, episode)
+            insert_transcript_segments(cursor, episode_id, segments)
+            conn.commit()
+        conn.close()
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, totals
+
+
+def write_behind(work, db_path: str, rtt: float, batch: int, spill_path: str):
+    totals = {"round_trips": 0, "commits": 0}
+
+    @contextmanager
+    def connection():
+        conn = LatentConnection(db_path, rtt, totals)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    writer = WriteBehindWriter(spill_path, max_batch=batch, max_delay=1.0, connection=connection)
+    blocked = 0.0
+    for episode, segments in work:
+        t = time.perf_counter()
+        writer.submit(episode, segments)
+        blocked += time.perf_counter() - t
+    writer.close()
+    return time.perf_counter() - started, blocked, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--segments", type=int, default=400, help="segments per episode")
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="simulated round-trip time per statement")
+    parser.add_argument("--batch", type=int, default=20, help="write-behind episodes per transaction")
+    args = parser.parse_args()
+
+    work = make_work(args.episodes, args.segments)
+    rtt = args.rtt_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "per-episode": per_episode(work, os.path.join(tmp, "a.sqlite3"), rtt),
+            "write-behind": write_behind(work, os.path.join(tmp, "b.sqlite3"), rtt, args.batch,
+                                         os.path.join(tmp, "spill.jsonl")),
+        }
+    print(f"{args.episodes} episodes x {args.segments} segments, {args.rtt_ms:g} ms per round trip")
+    print(f"{'path':<14}{'commits':>9}{'round trips':>13}{'total s':>10}{'caller blocked s':>18}")
+    for name, (elapsed, blocked, totals) in results.items():
+        print(f"{name:<14}{totals['commits']:>9}{totals['round_trips']:>13}{elapsed:>10.2f}{blocked:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,47 @@
 from prefect import flow, task, get_run_logger
+from prefect.task_runners import ThreadPoolTaskRunner
 from prefect.tasks import exponential_backoff
 import csv
 import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from functools import partial
+from typing import Dict, Optional
 from src.podcast_rss_reader import PodcastRSSFeedReader
+from src.async_feeds import AsyncFeedFetcher
+from src.feed_cache import FeedCache
+from src.watermarks import DEFAULT_INITIAL_SINCE, FeedWatermarks, Since, parse_since
+from src.transcript_cache import TranscriptCache, audio_fingerprint
+from src.transcript_segments import TranscriptSegments
+from src.pcm import decode_to_pcm
+from src.spool import get_spool
 from src.audio2text import Audio2Text
-from src.sql.db_config import get_db_connection
-from src.sql.db_writer import insert_episode, insert_transcript_segments, episode_exists
+from src import model_registry
+from src.transcription_pool import get_transcription_pool, shutdown_pools
+from src.search import get_segment_index
+from src.vad import VAD_ENABLED
+from src.metrics import CountingCursor, get_metrics, instrumented, record
+from src.ledger import DEFAULT_LEASE_SECONDS, DEFAULT_LEDGER_PATH, TRANSCRIBED, LeaseLostError, WorkLedger
+from src.sql.db_config import db_connection
+from src.sql.write_behind import WriteBehindWriter
+from src.sql.db_writer import (
+    insert_episode,
+    insert_transcript_segments,
+    load_transcript_segments_infile,
+    existing_audio_urls,
+    filter_new_episodes,
+)
 
 # Configure root logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+feed_cache = FeedCache()
+feed_watermarks = FeedWatermarks()
+transcript_cache = TranscriptCache()
+
 @task
 def read_rss_csv(path: str) -> list[str]:
     """ Reads RSS feed URLs from a CSV file.
@@ -32,26 +63,198 @@ def read_rss_csv(path: str) -> list[str]:
     return rss_urls
 
 @task
-def fetch_episodes(rss_url: str, year: int) -> list[dict]:
-    """ Fetches podcast episodes from an RSS feed, optionally filtered by year.
+@instrumented("fetch")
+def fetch_episodes(
+    rss_url: str,
+    year: Optional[int] = None,
+    use_cache: bool = True,
+    streaming: bool = False,
+    since: Optional[Since] = None,
+    until: Optional[datetime] = None,
+) -> list[dict]:
+    """ Fetches podcast episodes from an RSS feed, optionally filtered by year or date range.
 
     Args:
         rss_url (str): The RSS feed URL.
-        year (int): The publication year to filter episodes by.
+        year (int, optional): The publication year to filter episodes by.
+        use_cache (bool): Make the fetch conditional on the feed's cached ETag/Last-Modified.
+            An unchanged feed yields no episodes.
+        streaming (bool): Read the feed incrementally and stop once past the requested window.
+        since (Watermark or datetime, optional): Only episodes newer than the feed's watermark,
+            or published from this date on.
+        until (datetime, optional): Only episodes published before this time.
 
     Returns:
         list[dict]: A list of episode metadata dictionaries.
     """
     logger = get_run_logger()
-    logger.info(f"Fetching episodes for RSS URL: {rss_url} and year: {year}")
-    reader = PodcastRSSFeedReader(rss_url)
-    episodes = reader.get_episodes(filter_by_year=year)
+    logger.info(f"Fetching episodes for RSS URL: {rss_url} (year: {year}, since: {since}, until: {until})")
+    reader = PodcastRSSFeedReader(rss_url, cache=feed_cache if use_cache else None, streaming=streaming)
+    episodes = reader.get_episodes(filter_by_year=year, since=since, until=until)
+    if reader.not_modified:
+        logger.info(f"Feed not modified since last fetch: {rss_url}")
     logger.info(f"Fetched {len(episodes)} episodes for RSS URL: {rss_url}")
+    record(episodes=len(episodes))
     return episodes
 
 @task
+@instrumented("fetch_all")
+def fetch_all_episodes(
+    rss_urls: list[str],
+    year: Optional[int] = None,
+    use_cache: bool = True,
+    per_host: int = 2,
+    since: Optional[Dict[str, Since]] = None,
+    until: Optional[datetime] = None,
+) -> list[list[dict]]:
+    """ Fetches every RSS feed concurrently, so one slow host does not hold up discovery of the others.
+
+    Args:
+        rss_urls (list[str]): The RSS feed URLs.
+        year (int, optional): The publication year to filter episodes by.
+        use_cache (bool): Make each fetch conditional on the feed's cached ETag/Last-Modified.
+            An unchanged feed yields no episodes.
+        per_host (int): Maximum concurrent requests to one host.
+        since (dict, optional): Each feed's watermark or start date, by URL (see read_windows).
+        until (datetime, optional): Only episodes published before this time.
+
+    Returns:
+        list[list[dict]]: The episodes of each feed, in the order given, as fetch_episodes returns them.
+            A feed that fails after its retries yields no episodes.
+    """
+    logger = get_run_logger()
+    logger.info(f"Fetching {len(rss_urls)} feeds concurrently "
+                f"(year: {year}, {len(since or {})} with a start point, until: {until})")
+    fetcher = AsyncFeedFetcher(per_host=per_host, cache=feed_cache if use_cache else None)
+    episodes = fetcher.fetch_all(rss_urls, year, since, until)
+    for rss_url, error in fetcher.errors.items():
+        logger.error(f"Failed to fetch {rss_url}: {error}")
+    total = sum(len(feed_episodes) for feed_episodes in episodes.values())
+    logger.info(f"Fetched {total} episodes from {len(rss_urls) - len(fetcher.errors)} feeds")
+    record(episodes=total)
+    return [episodes[rss_url] for rss_url in rss_urls]
+
+def is_incremental(
+    year: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> bool:
+    """ Tells whether a run reads each feed from its watermark rather than backfilling a range.
+
+    Only incremental runs make conditional fetches: the cached ETag/Last-Modified say
+    nothing changed since the last incremental read, not that a backfill range is empty.
+
+    Args:
+        year (int, optional): The backfill year, if any.
+        since (datetime, optional): The backfill start date, if any.
+        until (datetime, optional): The backfill end date, if any.
+
+    Returns:
+        bool: True if none of year, since or until is given.
+    """
+    return year is None and since is None and until is None
+
+def read_windows(
+    rss_urls: list[str],
+    year: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Optional[Dict[str, Since]]:
+    """ Returns where each feed is read from, for fetch_all_episodes.
+
+    Without a year or date range the run is incremental: each feed is read from its
+    watermark, and feeds without one from FEED_INITIAL_SINCE. Otherwise the run is a
+    backfill of the given range, whatever the watermarks say.
+
+    Args:
+        rss_urls (list[str]): The RSS feed URLs.
+        year (int, optional): Backfill this publication year.
+        since (datetime, optional): Backfill from this date.
+        until (datetime, optional): Backfill up to this date.
+
+    Returns:
+        dict, optional: Each feed's watermark or start date, by URL; None to read feeds without a start point.
+    """
+    if is_incremental(year, since, until):
+        return feed_watermarks.since(rss_urls, default=parse_since(DEFAULT_INITIAL_SINCE))
+    return {rss_url: since for rss_url in rss_urls} if since is not None else None
+
+def commit_feed_validators(rss_urls: list[str]):
+    """ Keeps the fetched ETag/Last-Modified of every feed whose episodes were all stored.
+
+    A feed with an episode still unstored keeps its previous validators, so the next
+    run fetches it in full instead of getting a 304 and never seeing that episode again.
+
+    Args:
+        rss_urls (list[str]): The RSS feed URLs read by the run.
+    """
+    for rss_url in rss_urls:
+        if feed_watermarks.pending(rss_url):
+            logger.info(f"Keeping previous feed validators for {rss_url}: episodes still unstored")
+            continue
+        feed_cache.commit(rss_url)
+
+def open_writer() -> WriteBehindWriter:
+    """ Opens the write-behind writer, which stores episodes left in its spill file straight away.
+
+    Call it only after feed_watermarks.begin() has seen every feed of the run: a
+    replayed episode marked stored before its feed's pending episodes are known
+    would move the watermark past older episodes that are not stored yet.
+
+    Returns:
+        WriteBehindWriter: A writer that advances the watermarks as episodes commit.
+    """
+    return WriteBehindWriter(on_stored=feed_watermarks.mark_stored)
+
+@task
+@instrumented("dedupe")
+def dedupe_episodes(episodes: list[dict]) -> list[dict]:
+    """ Drops episodes that are already stored, using one bulk lookup for the whole feed.
+
+    Args:
+        episodes (list[dict]): Candidate episode metadata dictionaries.
+
+    Returns:
+        list[dict]: The episodes not yet in the database.
+    """
+    logger = get_run_logger()
+    if not episodes:
+        return []
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            new_episodes = filter_new_episodes(cursor, episodes)
+        finally:
+            cursor.close()
+    logger.info(f"Skipping {len(episodes) - len(new_episodes)} existing episodes, {len(new_episodes)} new")
+    return new_episodes
+
+def drop_seen(episodes: list[dict], seen: set) -> list[dict]:
+    """ Drops episodes an earlier feed of the same run already listed, e.g. cross-posted episodes.
+
+    dedupe_episodes only sees what is stored; an audio URL found in two feeds would
+    otherwise pass it twice and be inserted twice.
+
+    Args:
+        episodes (list[dict]): One feed's new episodes.
+        seen (set): Audio URLs already taken this run; updated with the episodes kept.
+
+    Returns:
+        list[dict]: The episodes not seen before.
+    """
+    new_episodes = [episode for episode in episodes if episode['audio_url'] not in seen]
+    seen.update(episode['audio_url'] for episode in new_episodes)
+    if len(new_episodes) < len(episodes):
+        logger.info(f"Skipping {len(episodes) - len(new_episodes)} episodes already listed by another feed")
+    return new_episodes
+
+@task
+@instrumented("download")
 def download_audio(url: str) -> str:
-    """ Downloads the audio file from the given URL and returns its local file path.
+    """ Downloads the audio file from the given URL into the spool and returns its local file path.
+
+    The file gets a name unique to the URL and is renamed into place only once complete.
+    Released spool files are evicted as needed to stay under SPOOL_MAX_BYTES.
 
     Args:
         url (str): Direct URL to the podcast episode's audio file.
@@ -61,29 +264,178 @@ def download_audio(url: str) -> str:
     """
     logger = get_run_logger()
     logger.info(f"Downloading audio for URL: {url}")
-    transcriber = Audio2Text()
-    audio_filename = transcriber.get_audio_filename_from_url(url)
-    audio_path = transcriber.download_audio(url, audio_filename)
+    audio_path = get_spool().fetch(url)
     logger.info(f"Downloaded audio to {audio_path}")
+    record(bytes=os.path.getsize(audio_path))
     return audio_path
 
 @task
-def transcribe_audio(audio_path: str) -> list[dict]:
+@instrumented("decode")
+def decode_audio(audio_path: str) -> str:
+    """ Decodes the downloaded audio once into a 16 kHz mono float32 PCM file.
+
+    The compressed file is deleted afterwards. Transcription then memory-maps the
+    PCM file instead of decoding again, so retries and long-audio windows never
+    repeat the decode and resident memory stays flat.
+
+    Args:
+        audio_path (str): Path to the downloaded audio file.
+
+    Returns:
+        str: The path to the PCM file, accepted anywhere an audio path is.
+    """
+    logger = get_run_logger()
+    logger.info(f"Decoding audio file: {audio_path}")
+    pcm_path = decode_to_pcm(audio_path, delete_source=True)
+    logger.info(f"Decoded audio to {pcm_path}")
+    record(bytes=os.path.getsize(pcm_path))
+    return pcm_path
+
+@task
+def warm_up_model(model_size: str = 'base'):
+    """ Loads the Whisper model into the process-wide registry ahead of the first transcription.
+
+    Args:
+        model_size (str): The size of the Whisper model to load.
+    """
+    logger = get_run_logger()
+    logger.info(f"Warming up Whisper model: {model_size}")
+    model_registry.warm_up(model_size)
+
+@task
+@instrumented("transcribe")
+def transcribe_audio(
+    audio_path: str,
+    model_size: str = 'base',
+    split_workers: int = 0,
+    use_cache: bool = True,
+    delete_file: bool = True,
+    vad: bool | None = None,
+) -> TranscriptSegments:
     """ Transcribes the audio file into segments using Whisper.
 
     Args:
         audio_path (str): Path to the downloaded audio file.
+        model_size (str): The size of the Whisper model to transcribe with.
+        split_workers (int): If above 0, split long episodes at silences and transcribe
+            the pieces on this many worker processes. Defaults to 0 (no splitting).
+        use_cache (bool): Reuse the stored transcript of identical audio transcribed with the same settings.
+        delete_file (bool): Delete the audio file once it has been transcribed.
+        vad (bool, optional): Skip non-speech audio before Whisper. Defaults to the VAD_ENABLED
+            environment variable, which also applies to split_workers processes.
 
     Returns:
-        list[dict]: A list of transcription segments, each represented as a dictionary.
+        TranscriptSegments: The transcription segments; each row behaves like a dictionary.
     """
     logger = get_run_logger()
     logger.info(f"Transcribing audio file: {audio_path}")
-    transcriber = Audio2Text()
-    segments = transcriber.transcribe(audio_path)
+    transcriber = Audio2Text(model_size=model_size, vad=vad)
+    if split_workers > 0:
+        transcribe = partial(
+            transcriber.transcribe_long,
+            pool=get_transcription_pool(split_workers, model_size),
+            delete_file=delete_file,
+        )
+    else:
+        transcribe = partial(transcriber.transcribe, delete_file=delete_file)
+    if use_cache:
+        segments = transcript_cache.get_or_transcribe(audio_path, model_size, transcribe, delete_file=delete_file,
+                                                      vad=transcriber.vad is not None, split=split_workers > 0)
+    else:
+        segments = transcribe(audio_path)
     logger.info(f"Transcribed {len(segments)} segments from audio file: {audio_path}")
+    if transcriber.vad_skipped_seconds:
+        logger.info(f"Skipped {transcriber.vad_skipped_seconds:.1f}s of non-speech audio in {audio_path}")
+    # a kept file may now be evicted from the spool when space is needed
+    get_spool().release(audio_path)
+    record(segments=len(segments))
     return segments
 
+@task
+@instrumented("transcribe")
+def transcribe_audio_pooled(
+    audio_path: str,
+    model_size: str = 'base',
+    workers: int | None = None,
+    use_cache: bool = True,
+) -> TranscriptSegments:
+    """ Transcribes the audio file on the multi-process transcription pool.
+
+    A drop-in alternative to transcribe_audio: each pool worker keeps its own
+    Whisper model resident, so several episodes can be transcribed at once.
+    Episodes are dispatched as they arrive; longest-first scheduling only applies
+    to batches (see transcribe_audio_batch).
+
+    Args:
+        audio_path (str): Path to the downloaded audio file.
+        model_size (str): The size of the Whisper model to transcribe with.
+        workers (int, optional): Number of worker processes. Defaults to one per 4 CPU cores.
+        use_cache (bool): Reuse the stored transcript of identical audio transcribed with the same settings.
+
+    Returns:
+        TranscriptSegments: The transcription segments; each row behaves like a dictionary.
+    """
+    logger = get_run_logger()
+    logger.info(f"Transcribing audio file on worker pool: {audio_path}")
+    transcribe = get_transcription_pool(workers, model_size).transcribe
+    if use_cache:
+        # pool workers follow VAD_ENABLED
+        segments = transcript_cache.get_or_transcribe(audio_path, model_size, transcribe, vad=VAD_ENABLED)
+    else:
+        segments = transcribe(audio_path)
+    logger.info(f"Transcribed {len(segments)} segments from audio file: {audio_path}")
+    get_spool().release(audio_path)
+    record(segments=len(segments))
+    return segments
+
+@task
+@instrumented("transcribe")
+def transcribe_audio_batch(
+    audio_paths: list[str],
+    model_size: str = 'base',
+    workers: int | None = None,
+    use_cache: bool = True,
+    delete_file: bool = True,
+) -> list[TranscriptSegments]:
+    """ Transcribes several audio files on the worker pool, longest episode first.
+
+    Args:
+        audio_paths (list[str]): Paths to the downloaded audio files.
+        model_size (str): The size of the Whisper model to transcribe with.
+        workers (int, optional): Number of worker processes. Defaults to one per 4 CPU cores.
+        use_cache (bool): Reuse the stored transcripts of identical audio transcribed with the same settings.
+        delete_file (bool): Delete each audio file once it has been transcribed.
+
+    Returns:
+        list[TranscriptSegments]: The transcription segments for each file, in the order given.
+    """
+    logger = get_run_logger()
+    pool = get_transcription_pool(workers, model_size)
+    if not use_cache:
+        logger.info(f"Transcribing {len(audio_paths)} audio files on worker pool")
+        transcripts = pool.transcribe_many(audio_paths, delete_file=delete_file)
+        results = dict(zip(audio_paths, transcripts))
+    else:
+        keys = {path: TranscriptCache.key(audio_fingerprint(path), model_size, vad=VAD_ENABLED) for path in audio_paths}
+        results = {}
+        for path in keys:
+            segments = transcript_cache.get(keys[path])
+            if segments is not None:
+                results[path] = segments
+                if delete_file and os.path.exists(path):
+                    os.remove(path)
+        misses = [path for path in keys if path not in results]
+        logger.info(f"Transcribing {len(misses)} audio files on worker pool ({len(results)} cached)")
+        for path, segments in zip(misses, pool.transcribe_many(misses, delete_file=delete_file)):
+            transcript_cache.put(keys[path], segments)
+            results[path] = segments
+    # hits and misses alike: deleted files leave the spool's books, kept ones become evictable
+    spool = get_spool()
+    for path in results:
+        spool.release(path)
+    record(segments=sum(len(segments) for segments in results.values()))
+    return [results[path] for path in audio_paths]
+
 @task
 def log_episode_transcript(episode: dict, transcript_segments: list[dict]):
     """ Logs episode title and a preview of its first transcript segment.
@@ -104,52 +456,368 @@ def log_episode_transcript(episode: dict, transcript_segments: list[dict]):
     retry_delay_seconds=exponential_backoff(backoff_factor=30),
     retry_jitter_factor=1,
 )
-def store_episode_data(episode: dict, transcript_segments: list[dict]):
-    """Stores episode and transcript data in the database if not already present."""
+@instrumented("store")
+def store_episode_data(episode: dict, transcript_segments: list[dict], use_load_data: bool = False):
+    """Stores episode and transcript data in the database if not already present.
+
+    The episode row and all of its segments are committed in a single transaction.
+    An episode already stored (e.g. by another node, or an earlier attempt) is skipped
+    rather than failing on the unique audio_url key.
+
+    Args:
+        episode (dict): Metadata dictionary for the episode.
+        transcript_segments (list[dict]): List of transcribed segments for the episode.
+        use_load_data (bool): Load segments with LOAD DATA LOCAL INFILE instead of batched INSERTs.
+    """
     logger = get_run_logger()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        episode_id = insert_episode(cursor, episode)
-        insert_transcript_segments(cursor, episode_id, transcript_segments)
-        conn.commit()
-        logger.info(f"Inserted episode {episode['title']} with {len(transcript_segments)} segments")
-    except Exception as e:
-        logger.error(f"Failed to insert episode: {e}")
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+    index = get_segment_index()
+    episode_id = None
+    with db_connection() as conn:
+        cursor = CountingCursor(conn.cursor())
+        try:
+            if existing_audio_urls(cursor, [episode["audio_url"]]):
+                logger.info(f"Episode already exists: {episode['audio_url']}")
+                return
+            started = time.perf_counter()
+            episode_id = insert_episode(cursor, episode, index=index)
+            if use_load_data:
+                rows = load_transcript_segments_infile(cursor, episode_id, transcript_segments, index=index)
+            else:
+                rows = insert_transcript_segments(cursor, episode_id, transcript_segments, index=index)
+            conn.commit()
+            elapsed = time.perf_counter() - started
+            # + the episode row; + the COMMIT
+            record(rows=rows + 1, round_trips=cursor.round_trips + 1, commits=1)
+            logger.info(
+                f"Inserted episode {episode['title']} with {rows} segments "
+                f"in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+        except Exception as e:
+            logger.error(f"Failed to insert episode: {e}")
+            if index is not None and episode_id is not None:
+                index.remove_episode(episode_id)
+            raise
+        finally:
+            cursor.close()
 
 
 @flow
-def audio_pipeline(csv_path: str = 'rss_feeds.csv'):
+def audio_pipeline(
+    csv_path: str = 'rss_feeds.csv',
+    model_size: str = 'base',
+    use_feed_cache: bool = True,
+    split_workers: int = 0,
+    decode_once: bool = False,
+    write_behind: bool = False,
+    year: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
     """Main pipeline flow to process podcast RSS feeds.
 
+    Each feed is read from its watermark, so a steady-state run only sees episodes
+    published since the last one stored; the watermark advances as episodes are stored.
+
     Args:
         csv_path (str): Path to the CSV file containing RSS feed URLs. Defaults to 'rss_feeds.csv'.
+        model_size (str): The size of the Whisper model to transcribe with. Defaults to 'base'.
+        use_feed_cache (bool): Skip feeds that have not changed since the last run. Backfills
+            (year, since or until) always fetch in full. Defaults to True.
+        split_workers (int): Worker processes used to transcribe long episodes in pieces. Defaults to 0 (off).
+        decode_once (bool): Decode each episode to a PCM file before transcription. Uses
+            about 230 MB of disk per hour of audio while the episode is in flight. Defaults to False.
+        write_behind (bool): Hand finished episodes to a WriteBehindWriter, which commits them
+            in batches in the background, instead of storing each one before moving on. Defaults to False.
+        year (int, optional): Backfill the episodes published in this year instead of reading
+            each feed from its watermark.
+        since (datetime, optional): Backfill the episodes published from this date on.
+        until (datetime, optional): Backfill the episodes published before this date.
     """
     logger.info("Starting audio_pipeline flow")
     rss_urls = read_rss_csv(csv_path)
+    warm_up_model(model_size)
 
-    for rss_url in rss_urls:
-        episodes = fetch_episodes(rss_url, 2024)
+    windows = read_windows(rss_urls, year, since, until)
+    use_feed_cache = use_feed_cache and is_incremental(year, since, until)
+    seen = set()
+    feeds = []
+    for rss_url, feed_episodes in zip(rss_urls, fetch_all_episodes(rss_urls, year, use_feed_cache, since=windows, until=until)):
+        episodes = dedupe_episodes(feed_episodes)
+        feed_watermarks.begin(rss_url, feed_episodes, episodes)
+        feeds.append(drop_seen(episodes, seen))
+    writer = open_writer() if write_behind else None
+    if writer is not None:
+        # recovered from an earlier run's spill file; already transcribed
+        buffered = writer.pending_audio_urls()
+        feeds = [[episode for episode in episodes if episode['audio_url'] not in buffered] for episodes in feeds]
+    for episodes in feeds:
         for episode in episodes:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            if episode_exists(cursor, episode["audio_url"]):
-                logger.info(f"Skipping existing episode: {episode['audio_url']}")
-                cursor.close()
-                conn.close()
-                continue
-            cursor.close()
-            conn.close()
-
             audio_path = download_audio(episode['audio_url'])
-            transcript_segments = transcribe_audio(audio_path)
+            if decode_once:
+                audio_path = decode_audio(audio_path)
+            transcript_segments = transcribe_audio(audio_path, model_size, split_workers)
             log_episode_transcript(episode, transcript_segments)
-            store_episode_data(episode, transcript_segments)
+            if writer is not None:
+                writer.submit(episode, transcript_segments)
+            else:
+                store_episode_data(episode, transcript_segments)
+                feed_watermarks.mark_stored(episode)
+    if writer is not None:
+        writer.close()
+        logger.info(f"Write-behind stats: {writer.stats()}")
+    commit_feed_validators(rss_urls)
+    model_registry.release(model_size)
+    shutdown_pools()
+    logger.info(f"Feed cache stats: {feed_cache.stats()}")
+    logger.info(f"Feed watermark stats: {feed_watermarks.stats()}")
+    logger.info(f"Transcript cache stats: {transcript_cache.stats()}")
+    index = get_segment_index()
+    if index is not None:
+        index.save()
+        logger.info(f"Search index stats: {index.stats()}")
+    get_metrics().export()
     logger.info("Completed audio_pipeline flow")
 
+@flow(task_runner=ThreadPoolTaskRunner(max_workers=64))
+def pipelined_audio_pipeline(
+    csv_path: str = 'rss_feeds.csv',
+    model_size: str = 'base',
+    use_feed_cache: bool = True,
+    prefetch: int = 2,
+    transcribe_workers: int = 1,
+    store_workers: int = 2,
+    split_workers: int = 0,
+    decode_once: bool = False,
+    write_behind: bool = False,
+    year: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Pipeline flow that overlaps downloading, transcription and database writes.
+
+    Downloads run up to `prefetch` episodes ahead of the transcriber and database
+    writes run behind it, so the network and the CPU are busy at the same time.
+    Every window is bounded: at most `prefetch` downloaded files wait on disk, fewer
+    if the spool's byte quota (SPOOL_MAX_BYTES) would be exceeded, and at most
+    `store_workers` transcripts wait in memory for their write to finish.
+
+    Args:
+        csv_path (str): Path to the CSV file containing RSS feed URLs. Defaults to 'rss_feeds.csv'.
+        model_size (str): The size of the Whisper model to transcribe with. Defaults to 'base'.
+        use_feed_cache (bool): Skip feeds that have not changed since the last run. Backfills
+            (year, since or until) always fetch in full. Defaults to True.
+        prefetch (int): Number of episodes downloaded ahead of the transcriber. Defaults to 2.
+        transcribe_workers (int): Number of episodes transcribed at once. Values above 1 use the
+            multi-process transcription pool. Defaults to 1.
+        store_workers (int): Number of concurrent database writes. Defaults to 2.
+        split_workers (int): Worker processes used to transcribe long episodes in pieces when
+            transcribe_workers is 1. Defaults to 0 (off).
+        decode_once (bool): Decode each episode to a PCM file before transcription. Defaults to False.
+        write_behind (bool): Replace the store_workers writes with a WriteBehindWriter that commits
+            episodes in batches in the background. Defaults to False.
+        year (int, optional): Backfill the episodes published in this year instead of reading
+            each feed from its watermark.
+        since (datetime, optional): Backfill the episodes published from this date on.
+        until (datetime, optional): Backfill the episodes published before this date.
+    """
+    logger.info("Starting pipelined_audio_pipeline flow")
+    rss_urls = read_rss_csv(csv_path)
+    if transcribe_workers == 1:
+        warm_up_model(model_size)
+
+    episodes = []
+    windows = read_windows(rss_urls, year, since, until)
+    use_feed_cache = use_feed_cache and is_incremental(year, since, until)
+    seen = set()
+    for rss_url, feed_episodes in zip(rss_urls, fetch_all_episodes(rss_urls, year, use_feed_cache, since=windows, until=until)):
+        new_episodes = dedupe_episodes(feed_episodes)
+        feed_watermarks.begin(rss_url, feed_episodes, new_episodes)
+        episodes.extend(drop_seen(new_episodes, seen))
+    writer = open_writer() if write_behind else None
+    if writer is not None:
+        # recovered from an earlier run's spill file; already transcribed
+        buffered = writer.pending_audio_urls()
+        episodes = [episode for episode in episodes if episode['audio_url'] not in buffered]
+
+    def transcribe(audio_path: str):
+        if transcribe_workers > 1:
+            return transcribe_audio_pooled.submit(audio_path, model_size, transcribe_workers)
+        return transcribe_audio.submit(audio_path, model_size, split_workers)
+
+    def finish_oldest_transcription():
+        episode, future = transcribing.popleft()
+        transcript_segments = future.result()
+        log_episode_transcript(episode, transcript_segments)
+        if writer is not None:
+            writer.submit(episode, transcript_segments)
+            return
+        # wait for a free slot first, so no more than store_workers writes are in flight
+        while stores and len(stores) >= store_workers:
+            finish_oldest_store()
+        stores.append((episode, store_episode_data.submit(episode, transcript_segments)))
+
+    def finish_oldest_store():
+        episode, future = stores.popleft()
+        future.result()
+        feed_watermarks.mark_stored(episode)
+
+    downloads = deque()
+    transcribing = deque()
+    stores = deque()
+    metrics = get_metrics()
+
+    def report_queue_depths():
+        metrics.set_gauge("pipeline_queue_depth", len(downloads), queue="downloads")
+        metrics.set_gauge("pipeline_queue_depth", len(transcribing), queue="transcribing")
+        metrics.set_gauge("pipeline_queue_depth", len(stores), queue="stores")
+        metrics.emit({"ts": round(time.time(), 3), "queue_depths": {
+            "downloads": len(downloads), "transcribing": len(transcribing), "stores": len(stores),
+        }})
+
+    spool = get_spool()
+    next_download = 0
+    for i, episode in enumerate(episodes):
+        # keep the download window full: episode i plus up to the next `prefetch`,
+        # downloading ahead only while the spool has room under its quota
+        while next_download < min(len(episodes), i + 1 + prefetch) and (next_download <= i or spool.has_room()):
+            downloads.append(download_audio.submit(episodes[next_download]['audio_url']))
+            next_download += 1
+
+        audio_path = downloads.popleft().result()
+        if decode_once:
+            audio_path = decode_audio(audio_path)
+        transcribing.append((episode, transcribe(audio_path)))
+        report_queue_depths()
+        while len(transcribing) >= transcribe_workers:
+            finish_oldest_transcription()
+
+    while transcribing:
+        finish_oldest_transcription()
+    while stores:
+        finish_oldest_store()
+    if writer is not None:
+        writer.close()
+        logger.info(f"Write-behind stats: {writer.stats()}")
+    commit_feed_validators(rss_urls)
+    model_registry.release(model_size)
+    shutdown_pools()
+    logger.info(f"Feed cache stats: {feed_cache.stats()}")
+    logger.info(f"Feed watermark stats: {feed_watermarks.stats()}")
+    logger.info(f"Transcript cache stats: {transcript_cache.stats()}")
+    index = get_segment_index()
+    if index is not None:
+        index.save()
+        logger.info(f"Search index stats: {index.stats()}")
+    get_metrics().export()
+    logger.info("Completed pipelined_audio_pipeline flow")
+
+def process_ledger_entry(
+    ledger: WorkLedger,
+    entry,
+    model_size: str,
+    split_workers: int = 0,
+    decode_once: bool = False,
+):
+    """Carries one claimed episode from its last completed stage through to stored.
+
+    Args:
+        ledger (WorkLedger): The ledger the episode was claimed from.
+        entry (LedgerEntry): The claimed episode.
+        model_size (str): The size of the Whisper model to transcribe with.
+        split_workers (int): Worker processes used to transcribe long episodes in pieces.
+        decode_once (bool): Decode the episode to a PCM file before transcription.
+    """
+    episode, audio_path = entry.episode, entry.audio_path
+    # a transcription can outlast the lease; keep it renewed so no other node starts over
+    with ledger.heartbeat(entry.audio_url):
+        segments = ledger.transcript(entry.audio_url) if entry.stage == TRANSCRIBED else None
+        if segments is None:
+            # audio downloaded by another node (or deleted) is fetched again
+            if not (audio_path and os.path.exists(audio_path)):
+                audio_path = download_audio(entry.audio_url)
+                if decode_once:
+                    audio_path = decode_audio(audio_path)
+                ledger.mark_downloaded(entry.audio_url, audio_path)
+            segments = transcribe_audio(audio_path, model_size, split_workers, delete_file=False)
+            ledger.mark_transcribed(entry.audio_url, segments)
+        log_episode_transcript(episode, segments)
+        # a previous attempt may have committed the episode and died before updating the ledger
+        if dedupe_episodes([episode]):
+            store_episode_data(episode, segments)
+        ledger.mark_stored(entry.audio_url)
+
+@flow
+def ledgered_audio_pipeline(
+    csv_path: str = 'rss_feeds.csv',
+    model_size: str = 'base',
+    use_feed_cache: bool = True,
+    split_workers: int = 0,
+    decode_once: bool = False,
+    ledger_path: str = DEFAULT_LEDGER_PATH,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    max_attempts: int = 3,
+    year: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Resumable pipeline flow that checkpoints every episode in a durable work ledger.
+
+    Discovered episodes are recorded in the ledger, then claimed one at a time
+    under a lease and carried through download, transcription and storage. The
+    downloaded audio and the transcript are kept until the episode is stored, so
+    a rerun after a crash resumes each episode from its last completed stage.
+    Several nodes can run this flow over the same feed list and ledger file at
+    once; leases, renewed while each episode is worked on, keep them from
+    processing the same episode. The shared file needs working POSIX locks and
+    the default rollback journal (see WorkLedger).
+
+    Args:
+        csv_path (str): Path to the CSV file containing RSS feed URLs. Defaults to 'rss_feeds.csv'.
+        model_size (str): The size of the Whisper model to transcribe with. Defaults to 'base'.
+        use_feed_cache (bool): Skip feeds that have not changed since the last run. Backfills
+            (year, since or until) always fetch in full. Defaults to True.
+        split_workers (int): Worker processes used to transcribe long episodes in pieces. Defaults to 0 (off).
+        decode_once (bool): Decode each episode to a PCM file before transcription. Defaults to False.
+        ledger_path (str): Path to the ledger's SQLite file. Defaults to LEDGER_PATH or '.ledger.sqlite3'.
+        lease_seconds (float): How long a claimed episode stays reserved for this run without progress.
+        max_attempts (int): Failed attempts after which an episode is left for inspection. Defaults to 3.
+        year (int, optional): Backfill the episodes published in this year instead of reading
+            each feed from its watermark.
+        since (datetime, optional): Backfill the episodes published from this date on.
+        until (datetime, optional): Backfill the episodes published before this date.
+    """
+    logger.info("Starting ledgered_audio_pipeline flow")
+    ledger = WorkLedger(ledger_path, lease_seconds=lease_seconds)
+    rss_urls = read_rss_csv(csv_path)
+    windows = read_windows(rss_urls, year, since, until)
+    use_feed_cache = use_feed_cache and is_incremental(year, since, until)
+    for rss_url, episodes in zip(rss_urls, fetch_all_episodes(rss_urls, year, use_feed_cache, since=windows, until=until)):
+        new_episodes = dedupe_episodes(episodes)
+        feed_watermarks.begin(rss_url, episodes, new_episodes)
+        added = ledger.discover(new_episodes)
+        logger.info(f"Discovered {added} new episodes in {rss_url}")
+    logger.info(f"Ledger before processing: {ledger.stats()}")
+
+    warm_up_model(model_size)
+    while entries := ledger.claim(max_attempts=max_attempts):
+        entry = entries[0]
+        try:
+            process_ledger_entry(ledger, entry, model_size, split_workers, decode_once)
+            feed_watermarks.mark_stored(entry.episode)
+        except LeaseLostError as e:
+            logger.warning(f"Skipping episode taken over by another worker: {e}")
+        except Exception as e:
+            logger.error(f"Episode {entry.audio_url} failed at stage {entry.stage}, will resume later: {e}")
+            ledger.release(entry.audio_url, str(e))
+
+    logger.info(f"Ledger after processing: {ledger.stats()}")
+    commit_feed_validators(rss_urls)
+    logger.info(f"Feed watermark stats: {feed_watermarks.stats()}")
+    ledger.close()
+    model_registry.release(model_size)
+    shutdown_pools()
+    get_metrics().export()
+    logger.info("Completed ledgered_audio_pipeline flow")
+
 if __name__ == "__main__":
     audio_pipeline()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Sequence
+from urllib.parse import urlsplit
+import httpx
+from src.feed_cache import FeedCache
+from src.podcast_rss_reader import PodcastRSSFeedReader
+from src.watermarks import Since
+
+logger = logging.getLogger(__name__)
+
+# transient statuses worth retrying
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class FeedFetchError(RuntimeError):
+    """Raised for a feed that could not be fetched within its attempts or the retry budget."""
+
+
+class AsyncFeedFetcher:
+    """
+    Polls many RSS feeds concurrently on one asyncio event loop.
+
+    Every feed is requested at once, limited only by a per-host semaphore (so one
+    slow or strict host never holds up the others, and no host sees more than
+    per_host connections from us) and by the client's overall connection limit.
+    Failed requests are retried with jittered backoff while the run-wide retry
+    budget lasts. Fetched documents are parsed on a thread pool by
+    PodcastRSSFeedReader, so the episodes are exactly those get_episodes returns.
+    A feed's new validators are recorded in the cache only after its document
+    has been parsed, and kept only once the caller commits them.
+
+    Attributes:
+        per_host (int): Maximum concurrent requests to one host.
+        max_connections (int): Maximum concurrent requests overall.
+        timeout (httpx.Timeout): Connect/read/write/pool timeouts for each request.
+        attempts (int): Maximum attempts per feed.
+        retry_budget (int, optional): Maximum retries across the whole run. Defaults to
+            a quarter of the feeds (at least 3).
+        parse_workers (int): Threads parsing feed documents.
+        cache (FeedCache, optional): Validator cache used to make fetches conditional.
+        errors (dict): Feed URL -> error message for feeds that could not be fetched in the last run.
+    """
+
+    def __init__(
+        self,
+        per_host: int = 2,
+        max_connections: int = 64,
+        timeout: httpx.Timeout = httpx.Timeout(10.0, read=30.0),
+        attempts: int = 3,
+        retry_budget: Optional[int] = None,
+        parse_workers: int = 4,
+        cache: Optional[FeedCache] = None,
+        backoff: float = 0.5,
+    ):
+        """
+        Initializes the fetcher.
+
+        Args:
+            per_host (int): Maximum concurrent requests to one host.
+            max_connections (int): Maximum concurrent requests overall.
+            timeout (httpx.Timeout): Connect/read/write/pool timeouts for each request.
+            attempts (int): Maximum attempts per feed.
+            retry_budget (int, optional): Maximum retries across the whole run.
+            parse_workers (int): Threads parsing feed documents.
+            cache (FeedCache, optional): Validator cache used to make fetches conditional.
+            backoff (float): Base delay in seconds before a retry; doubled for each further attempt.
+        """
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.attempts = attempts
+        self.retry_budget = retry_budget
+        self.parse_workers = parse_workers
+        self.cache = cache
+        self.backoff = backoff
+        self.errors: Dict[str, str] = {}
+        self._retries_left = 0
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+    async def _fetch(self, client: httpx.AsyncClient, rss_url: str) -> httpx.Response:
+        """Fetches one feed document, conditionally if a cache is set. Returns the 200 or 304 response."""
+        headers = {}
+        if self.cache is not None:
+            validators = self.cache.validators(rss_url)
+            if validators["etag"]:
+                headers["If-None-Match"] = validators["etag"]
+            if validators["modified"]:
+                headers["If-Modified-Since"] = validators["modified"]
+
+        host = urlsplit(rss_url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        for attempt in range(1, self.attempts + 1):
+            try:
+                async with limit:
+                    response = await client.get(rss_url, headers=headers)
+                if response.status_code in RETRY_STATUSES:
+                    raise httpx.HTTPStatusError(
+                        f"{response.status_code} from {rss_url}", request=response.request, response=response
+                    )
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return response
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRY_STATUSES
+                if not retryable or attempt == self.attempts or self._retries_left <= 0:
+                    raise FeedFetchError(f"Failed to fetch {rss_url} after {attempt} attempt(s): {e}") from e
+                self._retries_left -= 1
+                delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.warning("Retrying %s in %.1fs (attempt %d): %s", rss_url, delay, attempt, e)
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+
+    async def _fetch_and_parse(
+        self,
+        client: httpx.AsyncClient,
+        parser: ThreadPoolExecutor,
+        rss_url: str,
+        filter_by_year: Optional[int],
+        since: Optional[Since] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        response = None
+        if rss_url.startswith(("http://", "https://")):
+            response = await self._fetch(client, rss_url)
+            if response.status_code == 304:
+                if self.cache is not None:
+                    self.cache.record(rss_url, 304, None, None)
+                return []
+            document = response.content
+        else:
+            document = await loop.run_in_executor(parser, _read_file, rss_url)
+        reader = await loop.run_in_executor(parser, lambda: PodcastRSSFeedReader(rss_url, document=document))
+        episodes = await loop.run_in_executor(parser, reader.get_episodes, filter_by_year, since, until)
+        # validators only count once the document has been parsed; the cache still holds them until commit()
+        if self.cache is not None and response is not None:
+            self.cache.record(rss_url, response.status_code,
+                              response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return episodes
+
+
+    async def fetch_all_async(
+        self,
+        rss_urls: Sequence[str],
+        filter_by_year: Optional[int] = None,
+        since: Optional[Mapping[str, Since]] = None,
+        until: Optional[datetime] = None,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Fetches and parses every feed concurrently.
+
+        Args:
+            rss_urls (Sequence[str]): Feed URLs (or local file paths).
+            filter_by_year (int, optional): Only include episodes published in this year.
+            since (Mapping[str, Since], optional): Each feed's watermark or start date, by URL
+                (see FeedWatermarks.since). Feeds missing from it are not limited.
+            until (datetime, optional): Only include episodes published before this time.
+
+        Returns:
+            Dict[str, List[Dict]]: Episodes per feed URL, in the order given. Feeds that could not be
+                fetched map to an empty list and are listed in errors; unchanged feeds map to an empty list.
+        """
+        self.errors = {}
+        self._retries_left = self.retry_budget if self.retry_budget is not None else max(3, len(rss_urls) // 4)
+        self._host_limits = {}
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        with ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix="feed-parse") as parser:
+            async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True) as client:
+                results = await asyncio.gather(
+                    *(self._fetch_and_parse(client, parser, url, filter_by_year, (since or {}).get(url), until)
+                      for url in rss_urls),
+                    return_exceptions=True,
+                )
+        episodes = {}
+        for url, result in zip(rss_urls, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                self.errors[url] = str(result)
+                logger.error("Feed %s failed: %s", url, result)
+                result = []
+            episodes[url] = result
+        return episodes
+
+
+    def fetch_all(
+        self,
+        rss_urls: Sequence[str],
+        filter_by_year: Optional[int] = None,
+        since: Optional[Mapping[str, Since]] = None,
+        until: Optional[datetime] = None,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Synchronous wrapper around fetch_all_async, usable from threads that already run an event loop.
+
+        Args:
+            rss_urls (Sequence[str]): Feed URLs (or local file paths).
+            filter_by_year (int, optional): Only include episodes published in this year.
+            since (Mapping[str, Since], optional): Each feed's watermark or start date, by URL.
+            until (datetime, optional): Only include episodes published before this time.
+
+        Returns:
+            Dict[str, List[Dict]]: Episodes per feed URL, as returned by fetch_all_async.
+        """
+        coroutine = self.fetch_all_async(rss_urls, filter_by_year, since, until)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(asyncio.run, coroutine).result()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
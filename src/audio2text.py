@@ -1,9 +1,19 @@
+import numpy as np
 import os
-import requests
 import warnings
-import whisper
-from typing import Any, Dict, List, cast
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union, cast
 from urllib.parse import urlparse
+from src import model_registry
+from src.downloader import get_default_downloader
+from src.long_audio import plan_windows, stitch_segments
+from src.metrics import get_metrics
+from src.pcm import SAMPLE_RATE, PcmWindow, is_pcm_path, open_pcm
+from src.transcript_segments import TranscriptSegments
+from src.vad import VoiceActivityDetector, get_default_vad, restore_segment_times
+
+if TYPE_CHECKING:
+    import whisper
+    from src.transcription_pool import TranscriptionPool
 
 # ignore user warning regarding floats
 warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
@@ -14,17 +24,50 @@ class Audio2Text:
     utterance-level segments using OpenAI's Whisper model.
     
     Attributes:
-        model (whisper.model.Whisper): The Whisper model used for transcription.
+        model_size (str): The size of the Whisper model used for transcription.
+        device (str, optional): The torch device the model runs on.
+        vad (VoiceActivityDetector, optional): Detector that removes non-speech audio before the model runs.
+        vad_skipped_seconds (float): Seconds of non-speech audio this object has kept from the model.
     """
 
-    def __init__(self, model_size: str = 'base'):
+    def __init__(
+        self,
+        model_size: str = 'base',
+        device: Optional[str] = None,
+        vad: Union[bool, VoiceActivityDetector, None] = None,
+    ):
         """
         Initializes the Audio2Text object with a specified Whisper model size.
 
+        The model itself is not loaded here; it is resolved lazily through the
+        process-wide model registry the first time it is needed, so objects used
+        only for downloading never pay the model load cost.
+
         Args:
             model_size (str): The size of the Whisper model to load (e.g., 'tiny', 'base', 'small', 'medium', 'large').
+            device (str, optional): The torch device to run the model on. Defaults to cuda if available, else cpu.
+            vad (bool | VoiceActivityDetector, optional): Skip non-speech audio. True uses a detector with
+                default settings, False disables it, and None follows the VAD_ENABLED environment variable.
+        """
+        self.model_size = model_size
+        self.device = device
+        if vad is None:
+            vad = get_default_vad()
+        elif vad is True:
+            vad = VoiceActivityDetector()
+        self.vad: Optional[VoiceActivityDetector] = vad or None
+        self.vad_skipped_seconds = 0.0
+
+
+    @property
+    def model(self) -> "whisper.Whisper":
         """
-        self.model = whisper.load_model(model_size)
+        The shared Whisper model for this object's model size and device.
+
+        Returns:
+            whisper.Whisper: The Whisper model used for transcription.
+        """
+        return model_registry.get_model(self.model_size, self.device)
 
 
     def get_audio_filename_from_url(self, url: str) -> str:
@@ -46,31 +89,41 @@ class Audio2Text:
         """
         Downloads an audio file from a given URL and saves it locally.
 
+        The download goes through the process-wide AudioDownloader, so connections
+        are pooled per host and an interrupted download is resumed rather than restarted.
+
         Args:
             url (str): The URL of the audio file to download.
             filename (str): The name to use for the saved audio file.
 
         Returns:
             str: The path to the saved audio file.
+
+        Raises:
+            DownloadError: If the file could not be downloaded completely.
         """
-        r = requests.get(url, stream=True)
-        with open(filename, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=2*20):
-            #for chunk in r.iter_content(1024):
-                if chunk:
-                    f.write(chunk)
-        return filename
+        return get_default_downloader().download(url, filename)
 
 
-    def transcribe(self, filepath: str, delete_file: bool = True) -> List[Dict]:
+    def transcribe(self, audio: Union[str, np.ndarray, PcmWindow], delete_file: bool = True) -> TranscriptSegments:
         """
         Transcribes the audio file into utterance-level segments using the Whisper model.
 
+        With a voice activity detector set, only the (padded) speech regions are passed
+        to the model, and segment times are mapped back onto the original timeline.
+
         Args:
-            filepath (str): The path to the audio file to transcribe.
+            audio (str | np.ndarray | PcmWindow): What to transcribe. One of:
+                - the path to a compressed audio file, decoded by whisper with ffmpeg;
+                - the path to a PCM file written by decode_to_pcm, memory-mapped instead of decoded;
+                - a 16 kHz mono float32 waveform, e.g. a np.memmap view from open_pcm;
+                - a PcmWindow, a sample range of a PCM file.
+            delete_file (bool): Delete the file backing the audio afterwards: the path given,
+                or the file behind a np.memmap. PcmWindows and in-memory arrays are never deleted.
 
         Returns:
-            List[Dict]: A list of dictionaries, each containing metadata for one utterance:
+            TranscriptSegments: The utterances, stored column-wise. Iterating or indexing yields
+                dict-like rows with:
                 - whisper_segment_id (int): Whisper segment identifier.
                 - start (float): Start time of the utterance in seconds.
                 - end (float): End time of the utterance in seconds.
@@ -79,9 +132,24 @@ class Audio2Text:
         Raises:
             RuntimeError: If ffmpeg is not installed or if transcription fails.
         """
-        utterances = []
+        backing_file = _backing_file(audio)
+        utterances = TranscriptSegments()
         try:
-            result = self.model.transcribe(filepath)
+            if isinstance(audio, PcmWindow):
+                audio = audio.load()
+            elif isinstance(audio, str):
+                # decoded here rather than inside whisper so the audio duration is known
+                audio = open_pcm(audio) if is_pcm_path(audio) else _load_audio(audio)
+            metrics = get_metrics()
+            with metrics.stage("whisper", model=self.model_size) as stage, metrics.profile("transcribe"):
+                spans = None
+                speech = audio
+                if self.vad is not None:
+                    speech, spans, skipped = self.vad.compact(audio)
+                    stage.record(vad_skipped_seconds=skipped)
+                    self.vad_skipped_seconds += skipped
+                result = self.model.transcribe(speech) if len(speech) else {"segments": []}
+                stage.record(audio_seconds=len(audio) / SAMPLE_RATE, segments=len(result.get("segments", [])))
         except FileNotFoundError as e:
             if 'ffmpeg' in str(e):
                 raise RuntimeError(
@@ -91,18 +159,100 @@ class Audio2Text:
         except Exception as e:
             raise RuntimeError(f"Transcription failed: {e}") from e
         else:
-            for seg in result.get("segments", []):  
+            segments = result.get("segments", [])
+            if spans is not None:
+                segments = restore_segment_times(segments, spans)
+            for seg in segments:
                 seg = cast(Dict[str, Any], seg)
-                utterances.append({
-                    "whisper_segment_id": seg["id"],
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": seg["text"].strip()
-                })
+                utterances.append(seg["id"], seg["start"], seg["end"], seg["text"].strip())
             return utterances
         finally:
-            if delete_file and os.path.exists(filepath):
-                os.remove(filepath)
+            self._delete(backing_file, delete_file)
+
+
+    def transcribe_long(
+        self,
+        audio: Union[str, np.ndarray],
+        window_seconds: float = 600.0,
+        overlap_seconds: float = 5.0,
+        pool: Optional["TranscriptionPool"] = None,
+        delete_file: bool = True,
+    ) -> TranscriptSegments:
+        """
+        Transcribes a long episode by splitting it at silences and transcribing the pieces in parallel.
+
+        The waveform is cut roughly every window_seconds at the quietest nearby moment,
+        each window is padded with overlap_seconds of its neighbours, and the window
+        transcripts are stitched back onto the episode's timeline with renumbered
+        segment ids and the overlap regions de-duplicated.
+
+        PCM files (and np.memmap views of them) are never copied: windows are zero-copy
+        slices, and pool workers map the same file themselves.
+
+        Args:
+            audio (str | np.ndarray): A compressed audio file path, a PCM file path, or a waveform,
+                as accepted by transcribe.
+            window_seconds (float): Target length of each window.
+            overlap_seconds (float): Audio shared by neighbouring windows.
+            pool (TranscriptionPool, optional): Worker pool the windows are transcribed on.
+                If None, windows are transcribed one after another in this process.
+            delete_file (bool): Delete the file backing the audio once it is no longer needed.
+
+        Returns:
+            TranscriptSegments: The utterances, as returned by transcribe.
+
+        Raises:
+            RuntimeError: If ffmpeg is not installed or if transcription fails.
+        """
+        backing_file = _backing_file(audio)
+        try:
+            if isinstance(audio, str):
+                audio = open_pcm(audio) if is_pcm_path(audio) else _load_audio(audio)
+                if not isinstance(audio, np.memmap):
+                    # decoded into memory; the compressed file is no longer needed
+                    self._delete(backing_file, delete_file)
+            pcm_path = audio.filename if isinstance(audio, np.memmap) else None
+
+            windows = plan_windows(audio, window_seconds, overlap_seconds)
+            if pcm_path:
+                waveforms = [PcmWindow(pcm_path, w.start, w.end) for w in windows]
+            else:
+                waveforms = [audio[w.start:w.end] for w in windows]
+            if pool is not None and len(windows) > 1:
+                window_segments = pool.transcribe_arrays(waveforms)
+            else:
+                window_segments = [self.transcribe(waveform, delete_file=False) for waveform in waveforms]
+        except FileNotFoundError as e:
+            if 'ffmpeg' in str(e):
+                raise RuntimeError(
+                    "ffmpeg not found. Please install ffmpeg and ensure it is available on your system's PATH."
+                ) from e
+            raise
+        finally:
+            self._delete(backing_file, delete_file)
+        return TranscriptSegments.from_dicts(stitch_segments(windows, window_segments))
+
+
+    @staticmethod
+    def _delete(path: Optional[str], delete_file: bool):
+        """Removes path if deletion was requested and the file still exists."""
+        if delete_file and path and os.path.exists(path):
+            os.remove(path)
+
+
+def _load_audio(path: str) -> np.ndarray:
+    """Decodes a compressed audio file with whisper (ffmpeg), importing whisper only when needed."""
+    import whisper
+    return whisper.load_audio(path)
+
+
+def _backing_file(audio: Union[str, np.ndarray, PcmWindow]) -> Optional[str]:
+    """Returns the file delete_file refers to for a transcribe input, if any."""
+    if isinstance(audio, str):
+        return audio
+    if isinstance(audio, np.memmap):
+        return audio.filename
+    return None
 
 
 def main():
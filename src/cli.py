@@ -0,0 +1,290 @@
+"""
+Runs single pipeline stages from the command line, without Prefect or Whisper unless a stage needs them.
+
+Usage:
+    python -m src.cli discover [--csv rss_feeds.csv] [--incremental | --year 2024 | --since 2023-01-01 --until 2023-07-01] > episodes.jsonl
+    python -m src.cli dedupe < episodes.jsonl > new.jsonl
+    python -m src.cli download < new.jsonl > downloaded.jsonl
+    python -m src.cli transcribe [--model base] < downloaded.jsonl > transcribed.jsonl
+    python -m src.cli store < transcribed.jsonl
+    python -m src.cli run [--flow audio|pipelined|ledgered]
+
+Stages read and write episodes as JSON lines (one episode dictionary per line;
+'-' or no --input/--output means stdin/stdout), so they can be piped into each
+other or run as separate scheduled jobs. download adds 'audio_path' to each
+episode and transcribe replaces it with 'segments'. discover --incremental
+lists only episodes newer than each feed's watermark; watermarks are advanced
+by the 'run' flows, which see every episode of a feed. The separate stages do
+not advance them, because store cannot tell which episodes an earlier stage
+dropped. Each subcommand imports
+only what it uses: discover and dedupe never load torch, Whisper or Prefect.
+Logs go to stderr.
+"""
+import argparse
+import csv
+import logging
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger("src.cli")
+
+
+def read_feed_urls(path: str) -> List[str]:
+    """
+    Reads RSS feed URLs from a CSV file with an 'rss_url' column.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        List[str]: The feed URLs, in file order.
+    """
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        return [row['rss_url'] for row in csv.DictReader(csvfile)]
+
+
+def read_episodes(stream: TextIO) -> Iterator[Dict]:
+    """Yields the episodes of a JSON-lines stream, skipping blank lines."""
+    from src.ledger import decode_episode
+    for line in stream:
+        if line.strip():
+            yield decode_episode(line)
+
+
+def write_episodes(stream: TextIO, episodes: Iterable[Dict]) -> int:
+    """Writes episodes as JSON lines, flushing after each so downstream stages start early."""
+    from src.ledger import encode_episode
+    count = 0
+    for episode in episodes:
+        stream.write(encode_episode(episode) + "\n")
+        stream.flush()
+        count += 1
+    return count
+
+
+def _open_input(path: str) -> ContextManager[TextIO]:
+    return nullcontext(sys.stdin) if path == "-" else open(path, encoding="utf-8")
+
+
+def _open_output(path: str) -> ContextManager[TextIO]:
+    return nullcontext(sys.stdout) if path == "-" else open(path, "w", encoding="utf-8")
+
+
+def discover(args: argparse.Namespace) -> int:
+    """Fetches every feed concurrently and writes the episodes found."""
+    from src.async_feeds import AsyncFeedFetcher
+    from src.feed_cache import FeedCache
+    from src.watermarks import DEFAULT_INITIAL_SINCE, FeedWatermarks, parse_since
+
+    rss_urls = read_feed_urls(args.csv)
+    if args.incremental:
+        since = FeedWatermarks().since(rss_urls, default=parse_since(DEFAULT_INITIAL_SINCE))
+    else:
+        since = {rss_url: args.since for rss_url in rss_urls} if args.since is not None else None
+    # a 304 means "nothing new since the last incremental read", which says nothing about a backfill window
+    backfill = args.year is not None or args.since is not None or args.until is not None
+    fetcher = AsyncFeedFetcher(per_host=args.per_host, cache=None if args.no_cache or backfill else FeedCache())
+    episodes = fetcher.fetch_all(rss_urls, args.year, since, args.until)
+    for rss_url, error in fetcher.errors.items():
+        logger.error("Failed to fetch %s: %s", rss_url, error)
+    with _open_output(args.output) as out:
+        count = write_episodes(out, (episode for url in rss_urls for episode in episodes[url]))
+    logger.info("Discovered %d episodes in %d feeds (%d failed)", count, len(rss_urls), len(fetcher.errors))
+    return 1 if rss_urls and len(fetcher.errors) == len(rss_urls) else 0
+
+
+def dedupe(args: argparse.Namespace) -> int:
+    """Drops episodes that are already stored, with one bulk lookup per 500 episodes."""
+    from src.sql.db_config import db_connection
+    from src.sql.db_writer import filter_new_episodes
+
+    with _open_input(args.input) as f:
+        episodes = list(read_episodes(f))
+    new_episodes = []
+    if episodes:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                new_episodes = filter_new_episodes(cursor, episodes)
+            finally:
+                cursor.close()
+    with _open_output(args.output) as out:
+        write_episodes(out, new_episodes)
+    logger.info("Skipping %d existing episodes, %d new", len(episodes) - len(new_episodes), len(new_episodes))
+    return 0
+
+
+def download(args: argparse.Namespace) -> int:
+    """Downloads each episode's audio concurrently into the spool and records where it was saved."""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.downloader import DownloadError
+    from src.spool import get_spool
+
+    spool = get_spool()
+    failed = 0
+    with _open_input(args.input) as f, _open_output(args.output) as out, \
+            ThreadPoolExecutor(max_workers=spool.downloader.max_workers) as executor:
+        jobs = [(episode, executor.submit(spool.fetch, episode["audio_url"])) for episode in read_episodes(f)]
+        for episode, future in jobs:
+            try:
+                audio_path = future.result()
+            except DownloadError as e:
+                logger.error("%s", e)
+                failed += 1
+                continue
+            if args.decode:
+                from src.pcm import decode_to_pcm
+                audio_path = decode_to_pcm(audio_path, delete_source=True)
+            write_episodes(out, [{**episode, "audio_path": audio_path}])
+    logger.info("Downloaded %d episodes (%d failed); spool: %s", len(jobs) - failed, failed, spool.stats())
+    return 1 if failed else 0
+
+
+def transcribe(args: argparse.Namespace) -> int:
+    """Transcribes each downloaded episode and writes it with its segments."""
+    from functools import partial
+    from src.audio2text import Audio2Text
+    from src.transcript_cache import TranscriptCache
+
+    transcriber = Audio2Text(model_size=args.model, vad=True if args.vad else None)
+    cache = None if args.no_cache else TranscriptCache()
+    if args.split_workers > 0:
+        from src.transcription_pool import get_transcription_pool, shutdown_pools
+        run = partial(transcriber.transcribe_long, pool=get_transcription_pool(args.split_workers, args.model),
+                      delete_file=not args.keep_audio)
+    else:
+        run = partial(transcriber.transcribe, delete_file=not args.keep_audio)
+    try:
+        with _open_input(args.input) as f, _open_output(args.output) as out:
+            for episode in read_episodes(f):
+                audio_path = episode.pop("audio_path")
+                if cache is not None:
+                    segments = cache.get_or_transcribe(audio_path, args.model, run, delete_file=not args.keep_audio,
+                                                       vad=transcriber.vad is not None, split=args.split_workers > 0)
+                else:
+                    segments = run(audio_path)
+                logger.info("Transcribed %d segments from %s", len(segments), audio_path)
+                write_episodes(out, [{**episode, "segments": segments.to_dicts()}])
+    finally:
+        if args.split_workers > 0:
+            shutdown_pools()
+    if transcriber.vad_skipped_seconds:
+        logger.info("Skipped %.1fs of non-speech audio", transcriber.vad_skipped_seconds)
+    return 0
+
+
+def store(args: argparse.Namespace) -> int:
+    """Stores transcribed episodes through the write-behind writer, in batched transactions.
+
+    Feed watermarks are left alone: episodes an earlier stage dropped (e.g. on a
+    DownloadError) never reach this stage, and advancing past newer episodes would
+    hide them from discover --incremental for good.
+    """
+    from src.sql.write_behind import WriteBehindWriter
+
+    with WriteBehindWriter(max_batch=args.batch) as writer:
+        with _open_input(args.input) as f:
+            for episode in read_episodes(f):
+                segments = episode.pop("segments")
+                writer.submit(episode, segments)
+        flushed = writer.flush()
+    logger.info("Store stats: %s", writer.stats())
+    return 0 if flushed else 1
+
+
+def run(args: argparse.Namespace) -> int:
+    """Runs one of the Prefect flows in pipeline.py end to end."""
+    import pipeline
+
+    common = dict(csv_path=args.csv, model_size=args.model, use_feed_cache=not args.no_cache,
+                  split_workers=args.split_workers, decode_once=args.decode,
+                  year=args.year, since=args.since, until=args.until)
+    if args.flow == "audio":
+        pipeline.audio_pipeline(**common, write_behind=args.write_behind)
+    elif args.flow == "pipelined":
+        pipeline.pipelined_audio_pipeline(**common, write_behind=args.write_behind)
+    else:
+        pipeline.ledgered_audio_pipeline(**common)
+    return 0
+
+
+def add_window_arguments(sub: argparse.ArgumentParser, what: str = ""):
+    """Adds the --year/--since/--until options that select which episodes are read."""
+    date = datetime.fromisoformat
+    sub.add_argument("--year", type=int, default=None, help=f"{what}only episodes published in this year")
+    sub.add_argument("--since", type=date, default=None, help=f"{what}only episodes published on or after this ISO date")
+    sub.add_argument("--until", type=date, default=None, help=f"{what}only episodes published before this ISO date")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser with one subparser per stage."""
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log at DEBUG level")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name: str, handler, help: str, reads: bool = True, writes: bool = True):
+        sub = commands.add_parser(name, help=help, description=help)
+        sub.set_defaults(handler=handler)
+        if reads:
+            sub.add_argument("--input", default="-", help="episodes JSON-lines file (default: stdin)")
+        if writes:
+            sub.add_argument("--output", default="-", help="episodes JSON-lines file (default: stdout)")
+        return sub
+
+    sub = command("discover", discover, "fetch RSS feeds and list their episodes", reads=False)
+    sub.add_argument("--csv", default="rss_feeds.csv", help="CSV file with an rss_url column")
+    add_window_arguments(sub)
+    sub.add_argument("--incremental", action="store_true",
+                     help="only episodes newer than each feed's watermark (FEED_WATERMARKS_PATH)")
+    sub.add_argument("--per-host", type=int, default=2, help="concurrent requests per feed host")
+    sub.add_argument("--no-cache", action="store_true",
+                     help="ignore cached ETag/Last-Modified validators (always ignored with --year/--since/--until)")
+
+    command("dedupe", dedupe, "drop episodes that are already in the database")
+
+    sub = command("download", download, "download each episode's audio")
+    sub.add_argument("--decode", action="store_true", help="decode to a 16 kHz PCM file after downloading")
+
+    sub = command("transcribe", transcribe, "transcribe downloaded episodes with Whisper")
+    sub.add_argument("--model", default="base", help="Whisper model size")
+    sub.add_argument("--split-workers", type=int, default=0, help="split long episodes over this many processes")
+    sub.add_argument("--vad", action="store_true", help="skip non-speech audio (default: VAD_ENABLED)")
+    sub.add_argument("--keep-audio", action="store_true", help="keep audio files after transcription")
+    sub.add_argument("--no-cache", action="store_true", help="do not reuse cached transcripts")
+
+    sub = command("store", store, "write transcribed episodes to the database", writes=False)
+    sub.add_argument("--batch", type=int, default=20, help="episodes per transaction")
+
+    sub = command("run", run, "run a full pipeline flow", reads=False, writes=False)
+    sub.add_argument("--flow", choices=("audio", "pipelined", "ledgered"), default="audio")
+    sub.add_argument("--csv", default="rss_feeds.csv", help="CSV file with an rss_url column")
+    sub.add_argument("--model", default="base", help="Whisper model size")
+    sub.add_argument("--split-workers", type=int, default=0, help="split long episodes over this many processes")
+    sub.add_argument("--decode", action="store_true", help="decode each episode to PCM once")
+    sub.add_argument("--no-cache", action="store_true", help="ignore cached feed validators")
+    sub.add_argument("--write-behind", action="store_true", help="store episodes through the write-behind writer")
+    add_window_arguments(sub, what="backfill: ")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parses the command line and runs the chosen stage.
+
+    Args:
+        argv (List[str], optional): Arguments without the program name. Defaults to sys.argv[1:].
+
+    Returns:
+        int: The process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, stream=sys.stderr,
+                        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
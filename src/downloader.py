@@ -0,0 +1,206 @@
+import logging
+import os
+import requests
+import threading
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part"
+
+
+class DownloadError(RuntimeError):
+    """Raised when an audio file cannot be downloaded completely."""
+
+
+class AudioDownloader:
+    """
+    Downloads audio enclosures over pooled HTTP connections.
+
+    Each host gets its own requests.Session so keep-alive connections are reused
+    across episodes. Files are written to '<filename>.part' and resumed with an
+    HTTP Range request if a previous attempt was interrupted; the part file is
+    only renamed to its final name once its size matches the advertised length.
+
+    Attributes:
+        chunk_size (int): Number of bytes read from the socket per write.
+        timeout (tuple[float, float]): (connect, read) timeouts in seconds.
+        max_retries (int): Number of times an interrupted download is resumed before giving up.
+        max_workers (int): Maximum number of concurrent downloads in download_many.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1024 * 1024,
+        timeout: Tuple[float, float] = (10.0, 60.0),
+        max_retries: int = 3,
+        max_workers: int = 4,
+        pool_maxsize: int = 8,
+    ):
+        """
+        Initializes the downloader.
+
+        Args:
+            chunk_size (int): Number of bytes read from the socket per write. Defaults to 1 MiB.
+            timeout (tuple[float, float]): (connect, read) timeouts in seconds.
+            max_retries (int): Number of times an interrupted download is resumed before giving up.
+            max_workers (int): Maximum number of concurrent downloads in download_many.
+            pool_maxsize (int): Maximum number of pooled connections kept per host.
+        """
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.pool_maxsize = pool_maxsize
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+
+    def _session_for(self, url: str) -> requests.Session:
+        """
+        Returns the pooled session for the URL's host, creating it on first use.
+
+        Args:
+            url (str): The URL about to be requested.
+
+        Returns:
+            requests.Session: The session shared by all requests to that host.
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                # byte counts must match Content-Length, so never let the server compress
+                session.headers["Accept-Encoding"] = "identity"
+                self._sessions[host] = session
+        return session
+
+
+    def _fetch(self, url: str, part_path: str) -> int:
+        """
+        Performs one (possibly resumed) request, appending the body to the part file.
+
+        Args:
+            url (str): The URL of the audio file.
+            part_path (str): The path of the partial file to write to.
+
+        Returns:
+            int: The expected total size of the file in bytes, or -1 if the server did not say.
+
+        Raises:
+            requests.HTTPError: If the server returns an error status.
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        session = self._session_for(url)
+        with session.get(url, stream=True, timeout=self.timeout, headers=headers) as r:
+            if r.status_code == 416 and offset:
+                # the part file already holds the whole body; the total is in Content-Range: bytes */N
+                total = r.headers.get("Content-Range", "").rpartition("/")[2]
+                return int(total) if total.isdigit() else offset
+            r.raise_for_status()
+
+            if offset and r.status_code != 206:
+                logger.info("Server ignored Range request for %s; restarting download", url)
+                offset = 0
+
+            length = r.headers.get("Content-Length")
+            expected = offset + int(length) if length is not None else -1
+
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in r.raw.stream(self.chunk_size, decode_content=False):
+                    f.write(chunk)
+        return expected
+
+
+    def download(self, url: str, filename: str) -> str:
+        """
+        Downloads a URL to a local file, resuming interrupted attempts.
+
+        Args:
+            url (str): The URL of the audio file to download.
+            filename (str): The path of the file to save.
+
+        Returns:
+            str: The path to the saved audio file.
+
+        Raises:
+            DownloadError: If the file could not be downloaded completely after all retries.
+        """
+        part_path = filename + PART_SUFFIX
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                expected = self._fetch(url, part_path)
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, urllib3.exceptions.HTTPError) as e:
+                last_error = e
+                logger.warning("Download of %s interrupted (attempt %d): %s", url, attempt + 1, e)
+                continue
+            except requests.HTTPError as e:
+                raise DownloadError(f"Download of {url} failed: {e}") from e
+
+            received = os.path.getsize(part_path)
+            if expected == -1 or received == expected:
+                os.replace(part_path, filename)
+                return filename
+
+            last_error = DownloadError(f"received {received} of {expected} bytes")
+            logger.warning("Download of %s incomplete (attempt %d): %s", url, attempt + 1, last_error)
+            if received > expected:
+                # the remote file changed underneath us; start over
+                os.remove(part_path)
+
+        raise DownloadError(f"Download of {url} failed after {self.max_retries + 1} attempts: {last_error}")
+
+
+    def download_many(self, items: Iterable[Tuple[str, str]]) -> List[str]:
+        """
+        Downloads several files concurrently on a bounded thread pool.
+
+        Args:
+            items (Iterable[tuple[str, str]]): (url, filename) pairs to download.
+
+        Returns:
+            List[str]: The saved file paths, in the same order as items.
+
+        Raises:
+            DownloadError: If any download fails. Other downloads are allowed to finish first.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.download, url, filename) for url, filename in items]
+        return [future.result() for future in futures]
+
+
+    def close(self):
+        """Closes every pooled session."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_downloader: Optional[AudioDownloader] = None
+
+
+def get_default_downloader() -> AudioDownloader:
+    """
+    Returns the process-wide downloader, so connections are pooled across callers.
+
+    Returns:
+        AudioDownloader: The shared downloader instance.
+    """
+    global _default_downloader
+    if _default_downloader is None:
+        _default_downloader = AudioDownloader()
+    return _default_downloader
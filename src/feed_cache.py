@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv("FEED_CACHE_PATH", ".feed_cache.json")
+
+
+class FeedCache:
+    """
+    On-disk store of HTTP validators (ETag / Last-Modified) per feed URL.
+
+    The validators are sent back with the next fetch of the same feed so the
+    server can answer 304 Not Modified instead of the full document.
+
+    A 304 yields no episodes, so validators must only be kept once everything the
+    fetch returned has been processed. record() therefore holds new validators as
+    pending, and commit() persists them after the feed's episodes are stored. If a
+    run fails first, the next one fetches the full feed again.
+
+    Attributes:
+        path (str): Path to the JSON file backing the cache.
+        hits (int): Number of fetches answered with 304 Not Modified.
+        misses (int): Number of fetches that returned a full feed.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Initializes the cache, loading any validators saved by a previous run.
+
+        Args:
+            path (str): Path to the JSON file backing the cache.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Optional[str]]] = {}
+        # validators fetched but not yet committed, by feed URL
+        self._pending: Dict[str, Dict[str, Optional[str]]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable feed cache %s: %s", path, e)
+
+
+    def validators(self, rss_url: str) -> Dict[str, Optional[str]]:
+        """
+        Returns the stored validators for a feed.
+
+        Args:
+            rss_url (str): The URL of the RSS feed.
+
+        Returns:
+            dict: A dictionary with 'etag' and 'modified' keys; values are None if unknown.
+        """
+        entry = self._entries.get(rss_url, {})
+        return {"etag": entry.get("etag"), "modified": entry.get("modified")}
+
+
+    def record(self, rss_url: str, status: Optional[int], etag: Optional[str], modified: Optional[str]):
+        """
+        Records the outcome of a fetch, holding any new validators until commit().
+
+        Args:
+            rss_url (str): The URL of the RSS feed.
+            status (int, optional): The HTTP status of the fetch (None for local files).
+            etag (str, optional): The ETag returned by the server.
+            modified (str, optional): The Last-Modified value returned by the server.
+        """
+        with self._lock:
+            if status == 304:
+                self.hits += 1
+                return
+            self.misses += 1
+            if not etag and not modified:
+                return
+            self._pending[rss_url] = {"etag": etag, "modified": modified}
+
+
+    def commit(self, rss_url: str):
+        """
+        Persists the validators recorded for a feed, once all of the episodes fetched with them are processed.
+
+        Args:
+            rss_url (str): The URL of the RSS feed.
+        """
+        with self._lock:
+            entry = self._pending.pop(rss_url, None)
+            if entry is None:
+                return
+            self._entries[rss_url] = entry
+            self._save()
+
+
+    def _save(self):
+        """Atomically writes the cache to disk."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns cache hit/miss statistics for this process.
+
+        Returns:
+            dict: A dictionary containing:
+                - hits (int): Fetches answered with 304 Not Modified.
+                - misses (int): Fetches that returned a full feed.
+                - hit_rate (float): hits / (hits + misses), or 0.0 if nothing was fetched.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
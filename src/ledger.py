@@ -0,0 +1,344 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from src.transcript_segments import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.getenv("LEDGER_PATH", ".ledger.sqlite3")
+DEFAULT_LEASE_SECONDS = float(os.getenv("LEDGER_LEASE_SECONDS", 2 * 3600))
+# DELETE (a rollback journal) works on a shared filesystem; WAL is only safe when every worker is on one host
+DEFAULT_JOURNAL_MODE = os.getenv("LEDGER_JOURNAL_MODE", "DELETE")
+
+DISCOVERED = "discovered"
+DOWNLOADED = "downloaded"
+TRANSCRIBED = "transcribed"
+STORED = "stored"
+STAGES = (DISCOVERED, DOWNLOADED, TRANSCRIBED, STORED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    audio_url TEXT PRIMARY KEY,
+    episode TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    audio_path TEXT,
+    transcript BLOB,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    discovered_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ledger_stage ON ledger (stage, lease_expires);
+"""
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a ledger update is attempted for an episode whose lease this worker no longer holds."""
+
+
+class LedgerEntry(NamedTuple):
+    """One claimed episode and how far it got."""
+    audio_url: str
+    episode: dict
+    stage: str
+    audio_path: Optional[str]
+    attempts: int
+
+
+def encode_episode(episode: dict) -> str:
+    """Serializes episode metadata to JSON, keeping datetimes (e.g. 'published') round-trippable."""
+    return json.dumps({
+        key: {"__datetime__": value.isoformat()} if isinstance(value, datetime) else value
+        for key, value in episode.items()
+    })
+
+
+def decode_episode(text: str) -> dict:
+    """Reverses encode_episode."""
+    episode = json.loads(text)
+    return {
+        key: datetime.fromisoformat(value["__datetime__"]) if isinstance(value, dict) and "__datetime__" in value else value
+        for key, value in episode.items()
+    }
+
+
+class WorkLedger:
+    """
+    Durable, SQLite-backed record of each episode's progress through the pipeline.
+
+    Every episode moves through discovered -> downloaded -> transcribed -> stored.
+    Its downloaded audio file and its transcript are kept until it is stored, so a
+    run that dies part-way resumes each episode from its last completed stage
+    instead of starting over.
+
+    Work is handed out with leases: claim() marks episodes as owned by this worker
+    until the lease expires, and every later update checks that the lease is still
+    held. Several ingestion nodes can therefore share one feed list through one
+    ledger file without duplicating work; an episode whose worker died becomes
+    claimable again once its lease expires. Workers renew their lease from a
+    heartbeat() thread while a long stage runs, so a slow transcription is not
+    taken over and done twice. Downloaded audio lives on the node that downloaded
+    it, so an episode taken over by another node is downloaded again, while its
+    transcript is not redone.
+
+    A shared ledger file must sit on storage whose POSIX locks work for every node
+    and use the default rollback journal (LEDGER_JOURNAL_MODE=DELETE): SQLite's
+    WAL mode relies on shared memory and is only safe when all workers run on the
+    same host.
+
+    Attributes:
+        path (str): Path to the SQLite file.
+        owner (str): This worker's lease identity.
+        lease_seconds (float): How long a claim lasts without renewal.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH, owner: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, journal_mode: str = DEFAULT_JOURNAL_MODE):
+        """
+        Opens (creating if needed) the ledger.
+
+        Args:
+            path (str): Path to the SQLite file.
+            owner (str, optional): This worker's lease identity. Defaults to host, pid and a random suffix.
+            lease_seconds (float): How long a claim lasts without renewal.
+            journal_mode (str): SQLite journal mode. Defaults to LEDGER_JOURNAL_MODE or 'DELETE';
+                use 'WAL' only if every worker sharing the file runs on this host.
+        """
+        self.path = path
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        # autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._conn.executescript(SCHEMA)
+
+
+    def discover(self, episodes: Iterable[dict]) -> int:
+        """
+        Records newly found episodes; episodes already in the ledger are left as they are.
+
+        Args:
+            episodes (Iterable[dict]): Episode metadata dictionaries, each with an 'audio_url' key.
+
+        Returns:
+            int: The number of episodes added.
+        """
+        now = time.time()
+        rows = [(episode["audio_url"], encode_episode(episode), DISCOVERED, now, now) for episode in episodes]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO ledger (audio_url, episode, stage, discovered_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+
+    def claim(self, limit: int = 1, max_attempts: Optional[int] = None) -> List[LedgerEntry]:
+        """
+        Leases up to limit unstored episodes that no live worker holds.
+
+        Episodes furthest along are handed out first, so interrupted work finishes
+        before new work starts.
+
+        Args:
+            limit (int): Maximum number of episodes to claim.
+            max_attempts (int, optional): Skip episodes that already failed this many times.
+
+        Returns:
+            List[LedgerEntry]: The claimed episodes; empty when nothing is left to do.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    """
+                    SELECT audio_url, episode, stage, audio_path, attempts FROM ledger
+                    WHERE stage != ? AND (lease_expires IS NULL OR lease_expires < ?) AND attempts < ?
+                    ORDER BY CASE stage WHEN ? THEN 0 WHEN ? THEN 1 ELSE 2 END, discovered_at
+                    LIMIT ?
+                    """,
+                    (STORED, now, max_attempts if max_attempts is not None else 2**31, TRANSCRIBED, DOWNLOADED, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE ledger SET lease_owner = ?, lease_expires = ?, updated_at = ? WHERE audio_url = ?",
+                    [(self.owner, now + self.lease_seconds, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            LedgerEntry(audio_url, decode_episode(episode), stage, audio_path, attempts)
+            for audio_url, episode, stage, audio_path, attempts in rows
+        ]
+
+
+    def _update(self, audio_url: str, assignments: str, params: tuple):
+        """Applies an update to an episode this worker holds the lease on."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE ledger SET {assignments}, updated_at = ? "
+                "WHERE audio_url = ? AND lease_owner = ? AND lease_expires >= ?",
+                (*params, now, audio_url, self.owner, now),
+            )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(f"Lease on {audio_url} is no longer held by {self.owner}")
+
+
+    def renew(self, audio_url: str):
+        """
+        Extends this worker's lease on an episode.
+
+        Raises:
+            LeaseLostError: If the lease expired or was taken over.
+        """
+        self._update(audio_url, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+
+    @contextmanager
+    def heartbeat(self, audio_url: str, interval: Optional[float] = None) -> Iterator[None]:
+        """
+        Renews the lease on an episode from a background thread while the block runs.
+
+        If the lease is lost anyway (e.g. this worker was stalled past it), renewal
+        stops and the next mark_* call raises LeaseLostError.
+
+        Args:
+            audio_url (str): The claimed episode's audio URL.
+            interval (float, optional): Seconds between renewals. Defaults to a third of lease_seconds.
+        """
+        interval = interval if interval is not None else self.lease_seconds / 3
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    self.renew(audio_url)
+                except LeaseLostError as e:
+                    logger.warning("Stopping lease renewal: %s", e)
+                    return
+                except sqlite3.Error as e:
+                    # e.g. the file is locked by another node for longer than the timeout; try again next beat
+                    logger.warning("Could not renew lease on %s: %s", audio_url, e)
+
+        thread = threading.Thread(target=beat, name="ledger-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+    def mark_downloaded(self, audio_url: str, audio_path: str):
+        """
+        Records the downloaded (or decoded) audio file and renews the lease.
+
+        Raises:
+            LeaseLostError: If the lease expired or was taken over.
+        """
+        self._update(audio_url, "stage = ?, audio_path = ?, lease_expires = ?",
+                     (DOWNLOADED, audio_path, time.time() + self.lease_seconds))
+
+
+    def mark_transcribed(self, audio_url: str, transcript_segments):
+        """
+        Persists the transcript and renews the lease.
+
+        Raises:
+            LeaseLostError: If the lease expired or was taken over.
+        """
+        blob = TranscriptSegments.from_dicts(transcript_segments).to_bytes()
+        self._update(audio_url, "stage = ?, transcript = ?, lease_expires = ?",
+                     (TRANSCRIBED, blob, time.time() + self.lease_seconds))
+
+
+    def transcript(self, audio_url: str) -> Optional[TranscriptSegments]:
+        """
+        Returns the persisted transcript of an episode, if it has one.
+
+        Args:
+            audio_url (str): The episode's audio URL.
+
+        Returns:
+            TranscriptSegments, optional: The transcript, or None before transcription.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT transcript FROM ledger WHERE audio_url = ?", (audio_url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return TranscriptSegments.from_bytes(row[0])
+
+
+    def mark_stored(self, audio_url: str):
+        """
+        Completes an episode: releases the lease and deletes its intermediate artifacts.
+
+        Raises:
+            LeaseLostError: If the lease expired or was taken over.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT audio_path FROM ledger WHERE audio_url = ?", (audio_url,)).fetchone()
+        self._update(audio_url, "stage = ?, transcript = NULL, audio_path = NULL, lease_owner = NULL, "
+                                "lease_expires = NULL, error = NULL", (STORED,))
+        audio_path = row[0] if row else None
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+
+    def release(self, audio_url: str, error: Optional[str] = None):
+        """
+        Gives up the lease after a failure, so the episode can be retried from its last completed stage.
+
+        Args:
+            audio_url (str): The episode's audio URL.
+            error (str, optional): What went wrong, kept for inspection.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ledger SET lease_owner = NULL, lease_expires = NULL, attempts = attempts + 1, "
+                "error = ?, updated_at = ? WHERE audio_url = ? AND lease_owner = ?",
+                (error, time.time(), audio_url, self.owner),
+            )
+
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counts episodes per stage.
+
+        Returns:
+            dict: The number of episodes in each of STAGES, plus 'leased' for those currently claimed.
+        """
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT stage, COUNT(*) FROM ledger GROUP BY stage").fetchall())
+            leased = self._conn.execute(
+                "SELECT COUNT(*) FROM ledger WHERE lease_expires >= ?", (time.time(),)
+            ).fetchone()[0]
+        return {**{stage: counts.get(stage, 0) for stage in STAGES}, "leased": leased}
+
+
+    def close(self):
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._conn.close()
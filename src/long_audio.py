@@ -0,0 +1,140 @@
+import numpy as np
+from typing import Dict, List, NamedTuple
+from src.pcm import FRAME_SAMPLES, SAMPLE_RATE
+
+
+class AudioWindow(NamedTuple):
+    """
+    A slice of a long waveform transcribed on its own.
+
+    All positions are sample indices into the full waveform. The window covers
+    [start, end), which overlaps its neighbours; only segments whose midpoint
+    falls in the core region [core_start, core_end) are kept when stitching.
+    """
+    start: int
+    end: int
+    core_start: int
+    core_end: int
+
+
+def frame_energy(audio: np.ndarray) -> np.ndarray:
+    """
+    Computes the RMS energy of consecutive 20 ms frames.
+
+    Args:
+        audio (np.ndarray): 16 kHz mono waveform.
+
+    Returns:
+        np.ndarray: One RMS value per full frame.
+    """
+    n_frames = len(audio) // FRAME_SAMPLES
+    frames = np.asarray(audio[:n_frames * FRAME_SAMPLES], dtype=np.float32).reshape(n_frames, FRAME_SAMPLES)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def find_cut_points(
+    audio: np.ndarray,
+    window_seconds: float,
+    search_seconds: float = 30.0,
+    smooth_seconds: float = 0.5,
+) -> List[int]:
+    """
+    Picks cut points roughly every window_seconds, each moved to the quietest nearby moment.
+
+    Args:
+        audio (np.ndarray): 16 kHz mono waveform.
+        window_seconds (float): Target distance between cuts.
+        search_seconds (float): How far either side of each target to look for silence.
+        smooth_seconds (float): Width of the moving average applied to frame energy,
+            so a cut lands in a pause rather than between two syllables.
+
+    Returns:
+        List[int]: Sample indices of the interior cut points, in increasing order.
+    """
+    energy = frame_energy(audio)
+    if len(energy) == 0:
+        return []
+    frames_per_second = SAMPLE_RATE / FRAME_SAMPLES
+    width = max(1, int(smooth_seconds * frames_per_second))
+    smoothed = np.convolve(energy, np.ones(width) / width, mode="same")
+
+    cuts = []
+    step = int(window_seconds * frames_per_second)
+    search = int(search_seconds * frames_per_second)
+    target = step
+    # stop once the remainder is under half a window, rather than leave a short tail window
+    while target < len(energy) - step // 2:
+        lo = max(target - search, cuts[-1] // FRAME_SAMPLES + 1 if cuts else 1)
+        hi = min(target + search, len(energy))
+        frame = lo + int(np.argmin(smoothed[lo:hi]))
+        cuts.append(frame * FRAME_SAMPLES + FRAME_SAMPLES // 2)
+        target = frame + step
+    return cuts
+
+
+def plan_windows(
+    audio: np.ndarray,
+    window_seconds: float = 600.0,
+    overlap_seconds: float = 5.0,
+    search_seconds: float = 30.0,
+) -> List[AudioWindow]:
+    """
+    Splits a waveform into overlapping windows that meet at silence boundaries.
+
+    Args:
+        audio (np.ndarray): 16 kHz mono waveform.
+        window_seconds (float): Target length of each window's core region.
+        overlap_seconds (float): Audio added either side of each core so words at a cut are heard in full.
+        search_seconds (float): How far either side of each target cut to look for silence.
+
+    Returns:
+        List[AudioWindow]: The windows, in order. A short waveform yields a single window.
+    """
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    bounds = [0] + find_cut_points(audio, window_seconds, search_seconds) + [len(audio)]
+    return [
+        AudioWindow(
+            start=max(0, core_start - overlap),
+            end=min(len(audio), core_end + overlap),
+            core_start=core_start,
+            core_end=core_end,
+        )
+        for core_start, core_end in zip(bounds, bounds[1:])
+    ]
+
+
+def stitch_segments(windows: List[AudioWindow], window_segments: List[List[Dict]]) -> List[Dict]:
+    """
+    Merges per-window transcripts into one transcript on the episode's timeline.
+
+    Segment times are shifted by each window's start, segments whose midpoint falls
+    outside the window's core region are dropped (their text is kept by the
+    neighbouring window), and whisper_segment_id is renumbered from 0.
+
+    Args:
+        windows (List[AudioWindow]): The windows returned by plan_windows.
+        window_segments (List[List[Dict]]): The utterance dictionaries transcribed from each window.
+
+    Returns:
+        List[Dict]: Utterance dictionaries in the same schema as Audio2Text.transcribe.
+    """
+    stitched = []
+    for window, segments in zip(windows, window_segments):
+        offset = window.start / SAMPLE_RATE
+        core_start = window.core_start / SAMPLE_RATE
+        core_end = window.core_end / SAMPLE_RATE
+        for seg in segments:
+            start = seg["start"] + offset
+            end = seg["end"] + offset
+            if not core_start <= (start + end) / 2 < core_end:
+                continue
+            if stitched and start < stitched[-1]["end"]:
+                # overlap-region segments can straddle the cut; keep the timeline monotonic
+                start = stitched[-1]["end"]
+            stitched.append({
+                "whisper_segment_id": len(stitched),
+                "start": round(start, 3),
+                "end": round(max(start, end), 3),
+                "text": seg["text"],
+            })
+    return stitched
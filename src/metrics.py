@@ -0,0 +1,403 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JSONL_PATH = os.getenv("METRICS_JSONL_PATH")
+DEFAULT_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH")
+DEFAULT_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR")
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class StageTimer:
+    """
+    One timed execution of a pipeline stage, open while its with-block runs.
+
+    Attributes:
+        stage (str): The stage name, e.g. "download".
+        labels (dict): Extra labels, e.g. the Whisper model size.
+        values (dict): Quantities recorded during the stage, e.g. bytes or segments.
+    """
+    __slots__ = ("stage", "labels", "values", "wall", "cpu", "_wall_start", "_cpu_start")
+
+    def __init__(self, stage: str, labels: Dict[str, Any]):
+        self.stage = stage
+        self.labels = labels
+        self.values: Dict[str, float] = {}
+        self.wall = 0.0
+        self.cpu = 0.0
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+
+    def record(self, **values: float):
+        """Adds quantities to the stage, e.g. record(bytes=1024, segments=12)."""
+        self.values.update(values)
+
+    def stop(self):
+        self.wall = time.perf_counter() - self._wall_start
+        self.cpu = time.thread_time() - self._cpu_start
+
+
+class Metrics:
+    """
+    Thread-safe, in-process metrics for the pipeline's hot paths.
+
+    Stages record wall and CPU time plus any quantities they report (bytes,
+    audio seconds, segments, rows, round trips). Throughput and the Whisper
+    real-time factor are derived when the quantities they need are present.
+    Everything is aggregated in memory and can be rendered in the Prometheus
+    text format; when a JSONL path is set, each finished stage is also appended
+    to it as one JSON line. Worker processes append to the same file, so the
+    JSONL log covers the transcription pool too.
+
+    Attributes:
+        jsonl_path (str, optional): File finished stages are appended to.
+        prometheus_path (str, optional): File export() writes the Prometheus text to.
+        profile_dir (str, optional): Directory profile() writes sampled stacks to. Profiling is off if None.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Optional[str] = DEFAULT_JSONL_PATH,
+        prometheus_path: Optional[str] = DEFAULT_PROMETHEUS_PATH,
+        profile_dir: Optional[str] = DEFAULT_PROFILE_DIR,
+    ):
+        """
+        Initializes an empty registry.
+
+        Args:
+            jsonl_path (str, optional): File finished stages are appended to.
+            prometheus_path (str, optional): File export() writes the Prometheus text to.
+            profile_dir (str, optional): Directory profile() writes sampled stacks to.
+        """
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.profile_dir = profile_dir
+        self._lock = threading.Lock()
+        self._summaries: Dict[LabelKey, List[float]] = {}
+        self._counters: Dict[LabelKey, float] = {}
+        self._gauges: Dict[LabelKey, float] = {}
+        self._jsonl = None
+
+
+    def observe(self, name: str, value: float, **labels):
+        """Adds one observation to a summary (count and sum)."""
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = [0, 0.0]
+            summary[0] += 1
+            summary[1] += value
+
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increments a counter."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Sets a gauge, e.g. a queue depth."""
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+
+    @contextmanager
+    def stage(self, stage: str, **labels) -> Iterator[StageTimer]:
+        """
+        Times a stage's wall and CPU time; quantities can be recorded on the yielded timer.
+
+        CPU time is the calling thread's, so concurrent stages on other threads are not counted.
+
+        Args:
+            stage (str): The stage name.
+            **labels: Extra labels for the stage's metrics.
+
+        Yields:
+            StageTimer: The running stage.
+        """
+        timer = StageTimer(stage, labels)
+        stack = _active_stages()
+        stack.append(timer)
+        try:
+            yield timer
+        finally:
+            stack.pop()
+            timer.stop()
+            self.finish(timer)
+
+
+    def finish(self, timer: StageTimer):
+        """Aggregates a stopped stage and appends it to the JSONL file."""
+        labels = {"stage": timer.stage, **timer.labels}
+        self.observe("pipeline_stage_wall_seconds", timer.wall, **labels)
+        self.observe("pipeline_stage_cpu_seconds", timer.cpu, **labels)
+        for name, value in timer.values.items():
+            self.inc(f"pipeline_{name}_total", value, **labels)
+        event = {"ts": round(time.time(), 3), "pid": os.getpid(), **labels,
+                 "wall": round(timer.wall, 6), "cpu": round(timer.cpu, 6), **timer.values}
+        if timer.values.get("bytes") and timer.wall > 0:
+            event["bytes_per_second"] = timer.values["bytes"] / timer.wall
+            self.set_gauge("pipeline_throughput_bytes_per_second", event["bytes_per_second"], **labels)
+        if timer.values.get("audio_seconds"):
+            event["real_time_factor"] = timer.wall / timer.values["audio_seconds"]
+            self.observe("pipeline_real_time_factor", event["real_time_factor"], **labels)
+        self.emit(event)
+
+
+    def emit(self, event: Dict[str, Any]):
+        """Appends one event to the JSONL file, if one is configured."""
+        if not self.jsonl_path:
+            return
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            if self._jsonl is None:
+                # line-buffered append: each event is one write, so processes sharing the file do not interleave
+                self._jsonl = open(self.jsonl_path, "a", encoding="utf-8", buffering=1)
+            self._jsonl.write(line)
+
+
+    @contextmanager
+    def profile(self, name: str, interval: float = 0.005) -> Iterator[None]:
+        """
+        Samples the calling thread's Python stack while the block runs, if profiling is enabled.
+
+        The samples are written to profile_dir as collapsed stacks ('<name>-<pid>-<time>.folded'),
+        the input format of flamegraph tools. Without profile_dir this is a no-op.
+
+        Args:
+            name (str): Prefix of the output file.
+            interval (float): Seconds between samples.
+        """
+        if not self.profile_dir:
+            yield
+            return
+        profiler = SamplingProfiler(interval=interval)
+        with profiler:
+            yield
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{name}-{os.getpid()}-{time.time_ns()}.folded")
+        profiler.write_folded(path)
+        logger.info("Wrote %d profile samples to %s", profiler.samples, path)
+
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the aggregated metrics.
+
+        Returns:
+            dict: Counters, gauges and summaries ('<name>_count' / '<name>_sum'),
+                each keyed by the metric in Prometheus notation.
+        """
+        with self._lock:
+            snapshot = {"counters": {}, "gauges": {}, "summaries": {}}
+            for key, value in self._counters.items():
+                snapshot["counters"][_format(key)] = value
+            for key, value in self._gauges.items():
+                snapshot["gauges"][_format(key)] = value
+            for (name, labels), (count, total) in self._summaries.items():
+                snapshot["summaries"][_format((f"{name}_count", labels))] = count
+                snapshot["summaries"][_format((f"{name}_sum", labels))] = total
+            return snapshot
+
+
+    def prometheus_text(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            lines = []
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines.extend(f"{_format(key)} {value}" for key, value in metrics.items() if key[0] == name)
+            for name in sorted({name for name, _ in self._summaries}):
+                lines.append(f"# TYPE {name} summary")
+                for (metric, labels), (count, total) in self._summaries.items():
+                    if metric == name:
+                        lines.append(f"{_format((name + '_count', labels))} {count}")
+                        lines.append(f"{_format((name + '_sum', labels))} {total}")
+            return "\n".join(lines) + "\n"
+
+
+    def export(self):
+        """Writes the Prometheus text file, if one is configured, and flushes the JSONL file."""
+        if self.prometheus_path:
+            tmp_path = f"{self.prometheus_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.prometheus_path)
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+
+
+def _format(key: LabelKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    rendered = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{rendered}}}"
+
+
+_local = threading.local()
+
+
+def _active_stages() -> List[StageTimer]:
+    stack = getattr(_local, "stages", None)
+    if stack is None:
+        stack = _local.stages = []
+    return stack
+
+
+def record(**values: float):
+    """
+    Records quantities on the innermost stage running on this thread, if any.
+
+    Lets code inside an instrumented function report what it processed without
+    passing the timer around, e.g. record(bytes=os.path.getsize(path)).
+    """
+    stack = _active_stages()
+    if stack:
+        stack[-1].record(**values)
+
+
+def instrumented(stage: str, **labels) -> Callable:
+    """
+    Decorates a function so each call is timed as a stage of the shared registry.
+
+    Args:
+        stage (str): The stage name.
+        **labels: Extra labels for the stage's metrics.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_metrics().stage(stage, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class CountingCursor:
+    """Wraps a DB-API cursor and counts the statements sent to the server."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.round_trips = 0
+
+    def execute(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SamplingProfiler:
+    """
+    A low-overhead statistical profiler for one thread.
+
+    A background thread reads the target thread's current frame every interval
+    seconds and counts the collapsed call stacks; the profiled code itself runs
+    uninstrumented.
+
+    Attributes:
+        samples (int): Number of stacks sampled.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        """
+        Initializes the profiler.
+
+        Args:
+            thread_id (int, optional): Thread to sample. Defaults to the thread that starts the profiler.
+            interval (float): Seconds between samples.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def __enter__(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Returns the n most frequently sampled stacks and their counts."""
+        return self._stacks.most_common(n)
+
+    def write_folded(self, path: str):
+        """Writes the samples as collapsed stacks, one 'frame;frame;frame count' line each."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_default_metrics: Optional[Metrics] = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """
+    Returns the process-wide metrics registry, configured from the environment.
+
+    METRICS_JSONL_PATH, METRICS_PROMETHEUS_PATH and METRICS_PROFILE_DIR enable the
+    JSONL log, the Prometheus text file and the transcription profiler.
+
+    Returns:
+        Metrics: The shared registry.
+    """
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
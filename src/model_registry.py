@@ -0,0 +1,101 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import whisper
+
+logger = logging.getLogger(__name__)
+
+# whisper (and with it torch) is imported on the first model load, not at import time
+_models: Dict[Tuple[str, str], "whisper.Whisper"] = {}
+_lock = threading.Lock()
+
+
+def _resolve_device(device: Optional[str]) -> str:
+    """
+    Resolve the torch device a model should be placed on.
+
+    Args:
+        device (str, optional): Explicit device (e.g., 'cpu', 'cuda'). If None, 'cuda' is
+            used when available, otherwise 'cpu'. This mirrors whisper.load_model's default.
+
+    Returns:
+        str: The resolved device name.
+    """
+    if device is not None:
+        return device
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def get_model(model_size: str = 'base', device: Optional[str] = None) -> "whisper.Whisper":
+    """
+    Returns the process-wide Whisper model for the given size and device, loading it on first use.
+
+    Args:
+        model_size (str): The size of the Whisper model (e.g., 'tiny', 'base', 'small', 'medium', 'large').
+        device (str, optional): The torch device to load the model on. Defaults to cuda if available, else cpu.
+
+    Returns:
+        whisper.Whisper: The loaded Whisper model, shared by every caller in this process.
+    """
+    key = (model_size, _resolve_device(device))
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        # another thread may have finished loading while we waited on the lock
+        model = _models.get(key)
+        if model is None:
+            logger.info("Loading Whisper model size=%s device=%s", *key)
+            import whisper
+            model = whisper.load_model(key[0], device=key[1])
+            _models[key] = model
+    return model
+
+
+def warm_up(model_size: str = 'base', device: Optional[str] = None) -> None:
+    """
+    Eagerly loads a model so the first transcription does not pay the load cost.
+
+    Args:
+        model_size (str): The size of the Whisper model to load.
+        device (str, optional): The torch device to load the model on.
+    """
+    get_model(model_size, device)
+
+
+def release(model_size: Optional[str] = None, device: Optional[str] = None) -> int:
+    """
+    Drops cached models so their memory can be reclaimed.
+
+    Args:
+        model_size (str, optional): Only release models of this size. Releases all sizes if None.
+        device (str, optional): Only release models on this device. Releases all devices if None.
+
+    Returns:
+        int: The number of models released.
+    """
+    with _lock:
+        keys = [
+            key for key in _models
+            if (model_size is None or key[0] == model_size)
+            and (device is None or key[1] == device)
+        ]
+        for key in keys:
+            del _models[key]
+    if keys:
+        logger.info("Released %d Whisper model(s)", len(keys))
+    return len(keys)
+
+
+def loaded_models() -> list[Tuple[str, str]]:
+    """
+    Lists the (model_size, device) pairs currently resident in this process.
+
+    Returns:
+        list[tuple[str, str]]: The keys of the loaded models.
+    """
+    return list(_models)
@@ -0,0 +1,113 @@
+import numpy as np
+import os
+import subprocess
+import tempfile
+from typing import NamedTuple, Optional
+
+# whisper.audio.SAMPLE_RATE; every waveform in this package is 16 kHz mono float32
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = SAMPLE_RATE // 50  # 20 ms analysis frames, shared by long_audio and vad
+PCM_SUFFIX = ".f32"
+
+
+class PcmWindow(NamedTuple):
+    """A [start, end) sample range of a decoded PCM file, opened lazily by whoever transcribes it."""
+    path: str
+    start: int
+    end: int
+
+    def load(self) -> np.ndarray:
+        """Returns a zero-copy view of the window."""
+        return open_pcm(self.path)[self.start:self.end]
+
+
+def decode_to_pcm(audio_path: str, pcm_path: Optional[str] = None, delete_source: bool = False,
+                  chunk_size: int = 1024 * 1024) -> str:
+    """
+    Decodes an audio file once into raw 16 kHz mono float32 samples on disk.
+
+    ffmpeg's output is streamed to the file in chunks, so the decoded episode is
+    never held in memory. The file is written under a temporary name and renamed
+    when complete.
+
+    Args:
+        audio_path (str): Path to the compressed audio file.
+        pcm_path (str, optional): Path to write. Defaults to audio_path with PCM_SUFFIX appended.
+        delete_source (bool): Delete audio_path once it has been decoded.
+        chunk_size (int): Number of bytes copied from ffmpeg per write.
+
+    Returns:
+        str: The path to the PCM file.
+
+    Raises:
+        RuntimeError: If ffmpeg is not installed or cannot decode the file.
+    """
+    pcm_path = pcm_path or audio_path + PCM_SUFFIX
+    tmp_path = pcm_path + ".tmp"
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", audio_path,
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-loglevel", "error", "-",
+    ]
+    # stderr goes to a file rather than a pipe: ffmpeg blocks once a pipe's buffer fills,
+    # and nothing reads stderr until stdout is drained
+    with tempfile.TemporaryFile() as errors:
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+        except FileNotFoundError as e:
+            raise RuntimeError(
+                "ffmpeg not found. Please install ffmpeg and ensure it is available on your system's PATH."
+            ) from e
+
+        assert proc.stdout is not None
+        try:
+            with proc.stdout, open(tmp_path, "wb") as f:
+                for chunk in iter(lambda: proc.stdout.read(chunk_size), b""):
+                    f.write(chunk)
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if proc.wait() != 0:
+            os.remove(tmp_path)
+            errors.seek(0)
+            stderr = errors.read()
+            raise RuntimeError(f"Failed to decode audio {audio_path}: {stderr.decode(errors='replace')}")
+
+    os.replace(tmp_path, pcm_path)
+    if delete_source and os.path.exists(audio_path):
+        os.remove(audio_path)
+    return pcm_path
+
+
+def open_pcm(pcm_path: str) -> np.ndarray:
+    """
+    Maps a PCM file written by decode_to_pcm into memory without reading it.
+
+    The map is copy-on-write, so consumers that modify samples (e.g. torch
+    padding in place) never touch the file, and slicing it is zero-copy.
+
+    Args:
+        pcm_path (str): Path to the PCM file.
+
+    Returns:
+        np.ndarray: The float32 samples, as a np.memmap unless the file is empty.
+    """
+    if os.path.getsize(pcm_path) == 0:
+        # numpy refuses to map an empty file
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(pcm_path, dtype=np.float32, mode="c")
+
+
+def is_pcm_path(path: str) -> bool:
+    """
+    Tells whether a path names a decoded PCM file rather than a compressed audio file.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        bool: True for PCM files written by decode_to_pcm.
+    """
+    return path.endswith(PCM_SUFFIX)
@@ -1,31 +1,125 @@
 import feedparser
+import requests
+import tempfile
 import time
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, cast
+from typing import IO, Dict, Iterator, List, Optional, cast
+from src.feed_cache import FeedCache
+from src.rss_stream import UNKNOWN_DATE, NotRSSError, iter_rss_items
+from src.watermarks import Since, Watermark
+
+# consecutive out-of-window items, in reverse-chronological order, before a streaming read stops
+EARLY_STOP_PATIENCE = 5
+# bytes of a streamed document kept in memory for a fallback parse before the copy moves to a temp file
+FALLBACK_BUFFER_BYTES = 1024 * 1024
+
+
+class _TeeStream:
+    """Reads a stream while copying every byte read, so a fallback parser can start from the beginning."""
+
+    def __init__(self, stream: IO[bytes], copy: IO[bytes]):
+        self.stream = stream
+        self.copy = copy
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.copy.write(data)
+        return data
+
+
+def _in_window(
+    published: Optional[datetime],
+    guid: Optional[str],
+    filter_by_year: Optional[int],
+    since: Optional[Since],
+    until: Optional[datetime],
+) -> bool:
+    """Tells whether an entry falls in the requested window. Undated entries pass a since/until window."""
+    if filter_by_year is not None and (published is None or published.year != filter_by_year):
+        return False
+    if published is None:
+        return True
+    if isinstance(since, Watermark):
+        if not since.precedes(published, guid):
+            return False
+    elif since is not None and published < since:
+        return False
+    return until is None or published < until
+
+
+def _window_start(filter_by_year: Optional[int], since: Optional[Since]) -> Optional[datetime]:
+    """The earliest publication time the window can contain, used to stop streaming reads early."""
+    starts = []
+    if filter_by_year is not None:
+        starts.append(datetime(filter_by_year, 1, 1))
+    if since is not None:
+        starts.append(since.published if isinstance(since, Watermark) else since)
+    return max(starts) if starts else None
 
 class PodcastRSSFeedReader:
     """Parses a podcast RSS feed and extracts episode metadata.
 
     Attributes:
         rss_url (str): The URL of the RSS feed.
-        feed (feedparser.FeedParserDict): Parsed feed data.
+        feed (feedparser.FeedParserDict): Parsed feed data. None in streaming mode.
+        not_modified (bool): True if the server answered 304 Not Modified to a conditional fetch.
+        streaming (bool): Read the feed incrementally on each call instead of parsing it up front.
     """
 
-    def __init__(self, rss_url):
+    def __init__(
+        self,
+        rss_url,
+        cache: Optional[FeedCache] = None,
+        streaming: bool = False,
+        document: Optional[bytes] = None,
+    ):
         """Initializes the PodcastRSSFeedReader with a given RSS URL.
 
         Args:
             rss_url (str): The URL to the podcast RSS feed.
+            cache (FeedCache, optional): Validator cache used to make the fetch conditional.
+                If given, a feed that has not changed since its validators were last
+                committed is not re-parsed. New validators are recorded as pending.
+            streaming (bool): Don't parse the feed up front; instead read it incrementally each
+                time episodes are requested, stopping as soon as the requested window is passed.
+            document (bytes, optional): The feed document, already fetched from rss_url
+                (e.g. by AsyncFeedFetcher). It is parsed instead of fetching the feed again.
         """
         self.rss_url = rss_url
-        self.feed = feedparser.parse(rss_url)
+        self.cache = cache
+        self.streaming = streaming
+        self.feed = None
+        self.not_modified = False
+        if document is not None:
+            self.feed = feedparser.parse(document)
+            return
+        if streaming:
+            return
+        if cache is None:
+            self.feed = feedparser.parse(rss_url)
+        else:
+            validators = cache.validators(rss_url)
+            self.feed = feedparser.parse(rss_url, etag=validators["etag"], modified=validators["modified"])
+            cache.record(rss_url, self.feed.get("status"), self.feed.get("etag"), self.feed.get("modified"))
+        self.not_modified = self.feed.get("status") == 304
 
 
-    def get_episodes(self, filter_by_year:Optional[int]) -> List[Dict]:
-        """Extracts episode metadata from the RSS feed, optionally filtered by year.
+    def get_episodes(
+        self,
+        filter_by_year: Optional[int] = None,
+        since: Optional[Since] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """Extracts episode metadata from the RSS feed, optionally filtered by year or date range.
 
         Args:
-            filter_by_year (int, optional): Only include episodes published in this year. Defaults to 2024.
+            filter_by_year (int, optional): Only include episodes published in this year.
+            since (Watermark or datetime, optional): A feed watermark, to read only entries newer
+                than it (incremental runs), or a start date, to read entries published from then
+                on (backfills).
+            until (datetime, optional): Only include episodes published before this time.
 
         Returns:
             list: A list of dictionaries, each containing:
@@ -37,31 +131,153 @@ class PodcastRSSFeedReader:
                 - description (str): HTML description (if available).
                 - episode_link (str): Webpage link for the episode.
                 - feed_title (str): Title of the podcast feed.
+                - guid (str): The entry's GUID, or its audio URL if it has none.
+            The list is empty if the feed has not changed since the last cached fetch.
         """
+        if self.streaming:
+            return list(self.iter_episodes(filter_by_year, since, until))
+        if self.not_modified:
+            return []
+
         episodes = []
         for entry in self.feed.entries:
             published_parsed = getattr(entry, "published_parsed", None)
-            pub_year = published_parsed.tm_year if published_parsed else None # get year only for comparison
+            published = datetime(*published_parsed[:6]) if published_parsed else None
+            audio_url = entry.enclosures[0].href if entry.enclosures else "unknown audio_url"
+            guid = entry.get("id") or audio_url
 
-            if filter_by_year is not None and pub_year != filter_by_year:
+            if not _in_window(published, guid, filter_by_year, since, until):
                 continue
 
-            audio_url = entry.enclosures[0].href if entry.enclosures else "unknown audio_url"
-            published = datetime(*published_parsed[:6]) if published_parsed else datetime(1900, 1, 1)
-
             episodes.append({
                 "rss_url": self.rss_url,
                 "title": getattr(entry, "title", "unknown title"),
                 "audio_url": audio_url,
                 "summary": getattr(entry, "summary", "no summary"),
-                "published": published,
+                "published": published or UNKNOWN_DATE,
                 "description": getattr(entry, "description", "no description"),
                 "episode_link": getattr(entry, "link", "no episode link"),
-                "feed_title": self.feed.feed.get("title", "unknown title")  # type: ignore
+                "feed_title": self.feed.feed.get("title", "unknown title"),  # type: ignore
+                "guid": guid,
             })
         return episodes
 
 
+    @contextmanager
+    def _open_stream(self) -> Iterator[Optional[IO[bytes]]]:
+        """Opens the raw feed document, conditionally if a cache is set. Yields None on 304."""
+        if not self.rss_url.startswith(("http://", "https://")):
+            with open(self.rss_url, "rb") as f:
+                yield f
+            return
+
+        headers = {}
+        if self.cache is not None:
+            validators = self.cache.validators(self.rss_url)
+            if validators["etag"]:
+                headers["If-None-Match"] = validators["etag"]
+            if validators["modified"]:
+                headers["If-Modified-Since"] = validators["modified"]
+        with requests.get(self.rss_url, headers=headers, stream=True, timeout=(10, 60)) as r:
+            if r.status_code != 304:
+                r.raise_for_status()
+            if r.status_code == 304:
+                yield None
+            else:
+                r.raw.decode_content = True
+                yield r.raw
+            # only reached once the document was parsed, by the streaming parser or its fallback
+            if self.cache is not None:
+                self.cache.record(self.rss_url, r.status_code, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+
+
+    def iter_episodes(
+        self,
+        filter_by_year: Optional[int] = None,
+        since: Optional[Since] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict]:
+        """Lazily yields episode metadata, reading the feed incrementally.
+
+        While items arrive in reverse-chronological order, reading stops after
+        EARLY_STOP_PATIENCE consecutive items older than the requested year or
+        watermark, so the back catalog is never downloaded or parsed. If any item is newer than the one
+        before it, the feed is treated as unordered and read to the end. Documents that
+        are not RSS 2.0, or that are not well-formed XML (e.g. HTML entities such as
+        &nbsp; that feedparser accepts), fall back to a full feedparser parse of the same
+        download: the bytes read so far are kept as they stream past, so the feed is
+        never fetched twice. If the XML error comes part-way through, the items already
+        yielded are not yielded again: the fallback skips every GUID seen so far.
+        The feed's validators are recorded only once one of the parsers has read the
+        document; if neither can, the streaming parser's error is raised.
+
+        Args:
+            filter_by_year (int, optional): Only include episodes published in this year.
+            since (Watermark or datetime, optional): Only include entries newer than this watermark,
+                or published from this date on.
+            until (datetime, optional): Only include episodes published before this time.
+
+        Yields:
+            dict: Episode dictionaries with the same keys as get_episodes.
+        """
+        window_start = _window_start(filter_by_year, since)
+        yielded = set()
+        with self._open_stream() as stream:
+            self.not_modified = stream is None
+            if stream is None:
+                return
+            with tempfile.SpooledTemporaryFile(max_size=FALLBACK_BUFFER_BYTES) as copy:
+                try:
+                    items = iter_rss_items(_TeeStream(stream, copy))
+                    ordered = True
+                    previous = None
+                    older_run = 0
+                    for item in items:
+                        published = item["published"]
+                        if published is not None and previous is not None and published > previous:
+                            ordered = False
+                        if published is not None:
+                            previous = published
+
+                        audio_url = item["audio_url"] or "unknown audio_url"
+                        guid = item["guid"] or audio_url
+                        if not _in_window(published, guid, filter_by_year, since, until):
+                            older_run = older_run + 1 if published is not None and window_start is not None \
+                                and published < window_start else 0
+                            if ordered and older_run >= EARLY_STOP_PATIENCE:
+                                return
+                            continue
+                        older_run = 0
+
+                        yielded.add(guid)
+                        yield {
+                            "rss_url": self.rss_url,
+                            "title": item["title"] or "unknown title",
+                            "audio_url": audio_url,
+                            "summary": item["summary"] or "no summary",
+                            "published": published or UNKNOWN_DATE,
+                            "description": item["description"] or "no description",
+                            "episode_link": item["episode_link"] or "no episode link",
+                            "feed_title": item["feed_title"] or "unknown title",
+                            "guid": guid,
+                        }
+                    return
+                except (NotRSSError, ET.ParseError) as e:
+                    error = e
+                copy.write(stream.read())
+                copy.seek(0)
+                document = copy.read()
+
+            # not RSS 2.0, or not XML the streaming parser accepts: parse the whole document the usual way
+            fallback = PodcastRSSFeedReader(self.rss_url, document=document)
+            if fallback.feed.bozo and not fallback.feed.entries:
+                # neither parser can read it; raising skips recording the feed's validators
+                raise error
+            for episode in fallback.get_episodes(filter_by_year, since, until):
+                if episode["guid"] not in yielded:
+                    yield episode
+
+
 def main():
     rss_url = "https://feeds.megaphone.fm/VMP7924981569"
     reader = PodcastRSSFeedReader(rss_url)
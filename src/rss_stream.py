@@ -0,0 +1,86 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import IO, Dict, Iterator, Optional
+
+ITUNES_NS = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+UNKNOWN_DATE = datetime(1900, 1, 1)
+
+
+class NotRSSError(ValueError):
+    """Raised when a document is not RSS 2.0 (e.g. Atom), so it must go through feedparser."""
+
+
+def parse_pub_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an RFC 822 pubDate into a naive UTC datetime, as feedparser does.
+
+    Args:
+        value (str, optional): The pubDate text.
+
+    Returns:
+        datetime, optional: The publication time, or None if missing or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def iter_rss_items(stream: IO[bytes]) -> Iterator[Dict]:
+    """
+    Incrementally parses an RSS 2.0 document, yielding one dict per <item>.
+
+    Each item element is discarded as soon as it has been read, so memory use does
+    not grow with the number of items. Stopping iteration early stops reading the stream.
+
+    Args:
+        stream (IO[bytes]): The raw feed document.
+
+    Yields:
+        dict: A dictionary containing:
+            - title (str, optional): Title of the episode.
+            - audio_url (str, optional): URL of the first enclosure.
+            - summary (str, optional): description, falling back to itunes:summary, as feedparser does.
+            - published (datetime, optional): Publication time as naive UTC.
+            - description (str, optional): Description of the episode.
+            - episode_link (str, optional): Webpage link for the episode.
+            - feed_title (str, optional): Title of the podcast feed.
+            - guid (str, optional): The item's <guid>.
+
+    Raises:
+        NotRSSError: If the root element is not <rss>.
+    """
+    feed_title = None
+    stack = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if not stack and elem.tag != "rss":
+                raise NotRSSError(f"root element is <{elem.tag}>, not <rss>")
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag == "title" and len(stack) == 2 and stack[-1].tag == "channel":
+            feed_title = elem.text
+        elif elem.tag == "item":
+            enclosure = elem.find("enclosure")
+            description = elem.findtext("description")
+            yield {
+                "title": elem.findtext("title"),
+                "audio_url": enclosure.get("url") if enclosure is not None else None,
+                "summary": description or elem.findtext(f"{ITUNES_NS}summary"),
+                "published": parse_pub_date(elem.findtext("pubDate")),
+                "description": description,
+                "episode_link": elem.findtext("link"),
+                "feed_title": feed_title,
+                "guid": (elem.findtext("guid") or "").strip() or None,
+            }
+            # drop the finished item from its parent so the tree never holds more than one
+            if stack:
+                stack[-1].remove(elem)
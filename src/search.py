@@ -0,0 +1,361 @@
+import logging
+import os
+import pickle
+import re
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# postings pack (document number, token position) into one integer
+POSITION_BITS = 20
+MAX_POSITION = (1 << POSITION_BITS) - 64
+
+Phrases = Union[str, Iterable[str]]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase word tokens, the same word boundaries as REGEXP '\\b...\\b'.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        List[str]: The tokens, in order.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _as_phrases(phrases: Phrases) -> List[str]:
+    return [phrases] if isinstance(phrases, str) else list(phrases)
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+class SegmentIndex:
+    """
+    Local positional inverted index over transcript segments.
+
+    Each term maps to a compact array of postings, one per occurrence, packing
+    the segment's document number with the token position so phrase queries are
+    answered by intersecting shifted posting sets. Episodes are registered with
+    their feed title and publication time, so time-window filters and per-feed
+    counts never touch the database.
+
+    The index is maintained incrementally by db_writer's insert hooks; episodes
+    whose transaction rolls back are dropped with remove_episode.
+
+    Attributes:
+        path (str, optional): File the index is saved to and loaded from.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initializes the index, loading it from path if the file exists.
+
+        Args:
+            path (str, optional): File the index is saved to and loaded from.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._doc_episodes = array("q")
+        self._doc_segments = array("q")
+        self._postings: Dict[str, array] = {}
+        self._episodes: Dict[int, Tuple[Optional[str], Optional[datetime]]] = {}
+        self._removed: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            self._doc_episodes = state["doc_episodes"]
+            self._doc_segments = state["doc_segments"]
+            self._postings = state["postings"]
+            self._episodes = state["episodes"]
+            self._removed = state["removed"]
+
+
+    def add_episode(self, episode_id: int, feed_title: Optional[str], published=None):
+        """
+        Registers an episode's metadata.
+
+        Args:
+            episode_id (int): The episode's database id.
+            feed_title (str, optional): Title of the podcast feed.
+            published (datetime, optional): Publication time.
+        """
+        with self._lock:
+            self._episodes[episode_id] = (feed_title, _as_datetime(published))
+            self._removed.discard(episode_id)
+
+
+    def add_segments(self, episode_id: int, transcript_segments: Iterable) -> int:
+        """
+        Indexes an episode's segments.
+
+        Args:
+            episode_id (int): The episode the segments belong to.
+            transcript_segments (Iterable): Segments as returned by Audio2Text.transcribe.
+
+        Returns:
+            int: The number of segments indexed.
+        """
+        count = 0
+        with self._lock:
+            for segment in transcript_segments:
+                doc = len(self._doc_episodes)
+                self._doc_episodes.append(episode_id)
+                self._doc_segments.append(segment.get("whisper_segment_id"))
+                base = doc << POSITION_BITS
+                for position, term in enumerate(tokenize(segment.get("text") or "")[:MAX_POSITION]):
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = array("Q")
+                    postings.append(base | position)
+                count += 1
+        return count
+
+
+    def remove_episode(self, episode_id: int):
+        """
+        Drops an episode from query results, e.g. after its transaction rolled back.
+
+        Args:
+            episode_id (int): The episode's database id.
+        """
+        with self._lock:
+            self._removed.add(episode_id)
+            self._episodes.pop(episode_id, None)
+
+
+    def _phrase_documents(self, phrase: str) -> Set[int]:
+        """Returns the document numbers containing phrase. Caller holds the lock."""
+        terms = tokenize(phrase)
+        if not terms:
+            return set()
+        postings = [self._postings.get(term) for term in terms]
+        if any(p is None for p in postings):
+            return set()
+        # rarest term first keeps the candidate set small
+        order = sorted(range(len(terms)), key=lambda k: len(postings[k]))
+        first = order[0]
+        candidates = {p - first for p in postings[first]}
+        for k in order[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(p - k for p in postings[k])
+        return {p >> POSITION_BITS for p in candidates}
+
+
+    def _matches(self, phrases: Phrases, start, end) -> List[int]:
+        """Returns matching document numbers within the time window. Caller holds the lock."""
+        start, end = _as_datetime(start), _as_datetime(end)
+        docs: Set[int] = set()
+        for phrase in _as_phrases(phrases):
+            docs |= self._phrase_documents(phrase)
+        matches = []
+        for doc in docs:
+            episode_id = self._doc_episodes[doc]
+            if episode_id in self._removed:
+                continue
+            published = self._episodes.get(episode_id, (None, None))[1]
+            if (start or end) and published is None:
+                continue
+            if start and published < start:
+                continue
+            if end and published >= end:
+                continue
+            matches.append(doc)
+        return matches
+
+
+    def search(self, phrases: Phrases, start=None, end=None) -> List[Tuple[int, int]]:
+        """
+        Finds the segments containing any of the given phrases.
+
+        Args:
+            phrases (str | Iterable[str]): A phrase, or several phrases to match any of.
+            start (datetime, optional): Only episodes published at or after this time.
+            end (datetime, optional): Only episodes published before this time.
+
+        Returns:
+            List[Tuple[int, int]]: (episode_id, whisper_segment_id) pairs, ordered by
+                publication time, then episode, then segment.
+        """
+        with self._lock:
+            docs = self._matches(phrases, start, end)
+            results = [(self._doc_episodes[doc], self._doc_segments[doc]) for doc in docs]
+            never = datetime.min
+            results.sort(key=lambda r: (self._episodes.get(r[0], (None, None))[1] or never, r[0], r[1]))
+        return results
+
+
+    def count_by_feed(self, phrases: Phrases, start=None, end=None) -> Dict[Optional[str], int]:
+        """
+        Counts the segments containing any of the given phrases, per feed.
+
+        Args:
+            phrases (str | Iterable[str]): A phrase, or several phrases to match any of.
+            start (datetime, optional): Only episodes published at or after this time.
+            end (datetime, optional): Only episodes published before this time.
+
+        Returns:
+            Dict[str, int]: Matching segment count per feed title.
+        """
+        counts: Dict[Optional[str], int] = {}
+        with self._lock:
+            for doc in self._matches(phrases, start, end):
+                feed = self._episodes.get(self._doc_episodes[doc], (None, None))[0]
+                counts[feed] = counts.get(feed, 0) + 1
+        return counts
+
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns index size statistics.
+
+        Returns:
+            dict: A dictionary containing:
+                - segments (int): Indexed segments, including removed episodes'.
+                - terms (int): Distinct terms.
+                - postings (int): Total term occurrences.
+                - episodes (int): Registered episodes.
+        """
+        with self._lock:
+            return {
+                "segments": len(self._doc_episodes),
+                "terms": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+                "episodes": len(self._episodes),
+            }
+
+
+    def save(self):
+        """Writes the index to its path atomically. Does nothing if the index has no path."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            state = {
+                "doc_episodes": self._doc_episodes,
+                "doc_segments": self._doc_segments,
+                "postings": self._postings,
+                "episodes": self._episodes,
+                "removed": self._removed,
+            }
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        logger.info("Saved search index to %s", self.path)
+
+
+_default_index: Optional[SegmentIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_segment_index() -> Optional[SegmentIndex]:
+    """
+    Returns the process-wide local index, if one is configured.
+
+    The local index is optional: it is enabled by setting SEARCH_INDEX_PATH.
+
+    Returns:
+        SegmentIndex, optional: The shared index, or None if SEARCH_INDEX_PATH is unset.
+    """
+    global _default_index
+    if not DEFAULT_INDEX_PATH:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SegmentIndex(DEFAULT_INDEX_PATH)
+        return _default_index
+
+
+def boolean_phrase_query(phrases: Phrases) -> str:
+    """
+    Builds a MySQL boolean-mode FULLTEXT query matching any of the given phrases.
+
+    Args:
+        phrases (str | Iterable[str]): A phrase, or several phrases to match any of.
+
+    Returns:
+        str: The AGAINST expression, e.g. '"donald trump" "biden"'.
+    """
+    return " ".join(f'"{" ".join(tokenize(phrase))}"' for phrase in _as_phrases(phrases) if tokenize(phrase))
+
+
+def _window_sql(start, end) -> Tuple[str, list]:
+    """Builds the index-friendly published_at range filter (no DATE() wrapping)."""
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("e.published_at >= %s")
+        params.append(start)
+    if end is not None:
+        clauses.append("e.published_at < %s")
+        params.append(end)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def search_segments(cursor, phrases: Phrases, start=None, end=None, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Finds the stored segments containing any of the given phrases using the FULLTEXT index.
+
+    Args:
+        cursor: An open database cursor.
+        phrases (str | Iterable[str]): A phrase, or several phrases to match any of.
+        start (datetime, optional): Only episodes published at or after this time.
+        end (datetime, optional): Only episodes published before this time.
+        limit (int, optional): Maximum number of rows to return.
+
+    Returns:
+        List[Dict]: One dictionary per matching segment with episode_id, episode_title,
+            podcast_title, published_at, whisper_segment_id, segment_start and segment_text,
+            ordered by publication time.
+    """
+    window, params = _window_sql(start, end)
+    sql = f"""
+        SELECT e.episode_id, e.episode_title, e.feed_title, e.published_at,
+               t.whisper_segment_id, t.segment_start, t.segment_text
+        FROM transcript_segments t
+        JOIN episodes e ON e.episode_id = t.episode_id
+        WHERE MATCH(t.segment_text) AGAINST (%s IN BOOLEAN MODE){window}
+        ORDER BY e.published_at, e.episode_id, t.whisper_segment_id
+    """
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    cursor.execute(sql, (boolean_phrase_query(phrases), *params))
+    columns = ("episode_id", "episode_title", "podcast_title", "published_at",
+               "whisper_segment_id", "segment_start", "segment_text")
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def count_mentions_by_feed(cursor, phrases: Phrases, start=None, end=None) -> Dict[str, int]:
+    """
+    Counts the stored segments containing any of the given phrases, per feed.
+
+    Args:
+        cursor: An open database cursor.
+        phrases (str | Iterable[str]): A phrase, or several phrases to match any of.
+        start (datetime, optional): Only episodes published at or after this time.
+        end (datetime, optional): Only episodes published before this time.
+
+    Returns:
+        Dict[str, int]: Matching segment count per feed title.
+    """
+    window, params = _window_sql(start, end)
+    cursor.execute(f"""
+        SELECT e.feed_title, COUNT(*)
+        FROM transcript_segments t
+        JOIN episodes e ON e.episode_id = t.episode_id
+        WHERE MATCH(t.segment_text) AGAINST (%s IN BOOLEAN MODE){window}
+        GROUP BY e.feed_title
+    """, (boolean_phrase_query(phrases), *params))
+    return {feed: count for feed, count in cursor.fetchall()}
@@ -0,0 +1,232 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+from src.downloader import PART_SUFFIX, AudioDownloader, get_default_downloader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = os.getenv("SPOOL_DIR", ".spool")
+DEFAULT_SPOOL_MAX_BYTES = int(os.getenv("SPOOL_MAX_BYTES", 4 * 1024**3))
+# assumed size of a download in flight until real downloads have been seen (about an hour at 128 kbps)
+DEFAULT_ESTIMATE_BYTES = 64 * 1024 * 1024
+
+
+class SpoolManager:
+    """
+    Owns the directory downloaded audio is written to, and keeps it under a byte quota.
+
+    Every URL maps to its own file, named by a hash of the full URL plus a readable
+    part of its basename, so the many feeds whose enclosures are all called
+    'audio.mp3' or 'default.mp3' never overwrite each other. Downloads are written
+    to a '.part' file and renamed when complete (see AudioDownloader), so a path
+    returned by fetch() always holds a whole file.
+
+    Files handed out by fetch() (and anything derived from them, such as decoded
+    PCM files) are in use until release() is called for them. Released files, and
+    files left by earlier runs, are kept as a cache and evicted least recently used
+    first when a new download needs room. Files in use are never evicted, so the
+    quota can be exceeded by the episodes currently being processed, but never
+    by prefetching: has_room() tells callers whether to download further ahead.
+
+    Accounting is per process; give concurrent runs on one node separate directories.
+
+    Attributes:
+        directory (str): The spool directory.
+        max_bytes (int): The byte quota for everything in the directory.
+        downloader (AudioDownloader): The downloader used by fetch.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SPOOL_DIR, max_bytes: int = DEFAULT_SPOOL_MAX_BYTES,
+                 downloader: Optional[AudioDownloader] = None):
+        """
+        Initializes the spool, creating its directory if needed.
+
+        Args:
+            directory (str): The spool directory. Defaults to SPOOL_DIR or '.spool'.
+            max_bytes (int): The byte quota. Defaults to SPOOL_MAX_BYTES or 4 GiB.
+            downloader (AudioDownloader, optional): Defaults to the process-wide downloader.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.downloader = downloader or get_default_downloader()
+        self._cond = threading.Condition()
+        # released files and leftovers from earlier runs, path -> last use; the only eviction candidates
+        self._evictable: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        self._downloaded_bytes = 0
+        self._downloads = 0
+        self._counts = {"hits": 0, "downloads": 0, "evictions": 0, "evicted_bytes": 0}
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                self._evictable[entry.path] = entry.stat().st_mtime
+
+
+    def path_for(self, url: str) -> str:
+        """
+        Returns the spool path a URL is downloaded to.
+
+        Args:
+            url (str): The audio URL.
+
+        Returns:
+            str: '<directory>/<16 hex digits of sha256(url)>-<sanitized basename>'.
+        """
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        basename = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(urlparse(url).path))[-48:]
+        return os.path.join(self.directory, f"{digest}-{basename or 'audio'}")
+
+
+    def usage(self) -> int:
+        """Returns the bytes currently on disk in the spool directory, partial files included."""
+        total = 0
+        for entry in os.scandir(self.directory):
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+
+    def _estimate(self) -> int:
+        """Expected size of one download: the mean of those seen so far."""
+        return self._downloaded_bytes // self._downloads if self._downloads else DEFAULT_ESTIMATE_BYTES
+
+
+    def has_room(self) -> bool:
+        """
+        Tells a prefetcher whether one more download fits in the quota.
+
+        Files that could be evicted count as free space; downloads in flight count at their expected size.
+
+        Returns:
+            bool: True if another download can start without exceeding max_bytes.
+        """
+        with self._cond:
+            evictable = sum(_size(path) for path in self._evictable)
+            in_flight = sum(max(self._estimate() - _size(path + PART_SUFFIX), 0) for path in self._in_flight)
+            return self.usage() - evictable + in_flight + self._estimate() <= self.max_bytes
+
+
+    def _make_room(self, needed: int):
+        """Evicts released files, least recently used first, until needed more bytes fit. Call with the lock held."""
+        usage = self.usage()
+        for path in sorted(self._evictable, key=self._evictable.get):
+            if usage + needed <= self.max_bytes:
+                break
+            size = _size(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            del self._evictable[path]
+            usage -= size
+            self._counts["evictions"] += 1
+            self._counts["evicted_bytes"] += size
+            logger.info("Evicted %s (%d bytes) from spool", path, size)
+        if usage + needed > self.max_bytes:
+            logger.warning("Spool over quota: %d bytes in use, %d more expected, quota %d",
+                           usage, needed, self.max_bytes)
+
+
+    def fetch(self, url: str) -> str:
+        """
+        Returns a complete local copy of url, downloading it into the spool if needed.
+
+        A file already in the spool (e.g. kept from an earlier attempt) is reused.
+        Otherwise released files are evicted to make room, and the download is
+        written to a partial file that is renamed once complete.
+
+        Args:
+            url (str): The audio URL.
+
+        Returns:
+            str: The path of the complete file. It stays in use until release() is called.
+
+        Raises:
+            DownloadError: If the file could not be downloaded completely.
+        """
+        path = self.path_for(url)
+        with self._cond:
+            while path in self._in_flight:
+                # the same URL is already being downloaded; share its result
+                self._cond.wait()
+            self._evictable.pop(path + PART_SUFFIX, None)
+            self._evictable.pop(path, None)
+            if os.path.exists(path):
+                self._counts["hits"] += 1
+                return path
+            self._make_room(self._estimate())
+            self._in_flight.add(path)
+        try:
+            self.downloader.download(url, path)
+        finally:
+            with self._cond:
+                self._in_flight.discard(path)
+                self._cond.notify_all()
+        with self._cond:
+            self._downloads += 1
+            self._downloaded_bytes += _size(path)
+            self._counts["downloads"] += 1
+        return path
+
+
+    def release(self, path: str):
+        """
+        Marks a spool file as processed, so it may be evicted when space is needed.
+
+        A file its consumer already deleted is dropped from the spool's bookkeeping
+        instead. Releasing a file outside the spool is a no-op.
+
+        Args:
+            path (str): A path returned by fetch, or a file derived from one in the spool.
+        """
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return
+        with self._cond:
+            if os.path.exists(path):
+                self._evictable[path] = time.time()
+            else:
+                self._evictable.pop(path, None)
+
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the spool's usage and activity.
+
+        Returns:
+            dict: bytes on disk, quota, evictable files, hits, downloads, evictions and evicted bytes.
+        """
+        with self._cond:
+            return {"bytes": self.usage(), "max_bytes": self.max_bytes,
+                    "evictable": len(self._evictable), **self._counts}
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+_default_spool: Optional[SpoolManager] = None
+_default_spool_lock = threading.Lock()
+
+
+def get_spool() -> SpoolManager:
+    """
+    Returns the process-wide spool, configured by SPOOL_DIR and SPOOL_MAX_BYTES.
+
+    Returns:
+        SpoolManager: The shared spool.
+    """
+    global _default_spool
+    with _default_spool_lock:
+        if _default_spool is None:
+            _default_spool = SpoolManager()
+        return _default_spool
@@ -2,11 +2,18 @@ import logging
 import os
 from mysql.connector.cursor import MySQLCursor
 from pathlib import Path
-from typing import cast
+from typing import Callable, List, Optional, Tuple, cast
 from db_config import get_db_connection
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+# longest audio_url a uniquely indexed utf8mb4 VARCHAR can hold (InnoDB keys are at most 3072 bytes)
+AUDIO_URL_MAX_LENGTH = 768
+
+
+class MigrationBlockedError(RuntimeError):
+    """Raised when existing rows would be truncated or rejected by a migration."""
+
 def execute_sql_file(cursor: MySQLCursor, filepath: Path):
     """ 
     Execute the sql from a file given the cursor. 
@@ -19,6 +26,52 @@ def execute_sql_file(cursor: MySQLCursor, filepath: Path):
         sql = f.read()
     cursor.execute(sql)
 
+def index_exists(cursor: MySQLCursor, table: str, index_name: str) -> bool:
+    """
+    Check whether an index exists on a table in the current database.
+
+    Args:
+        cursor (MySQLCursor): MySQL connection cursor
+        table (str): table name.
+        index_name (str): index name.
+
+    Returns:
+        bool: True if the index exists.
+    """
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """,
+        (table, index_name),
+    )
+    return cursor.fetchone() is not None
+
+def audio_url_index_blockers(cursor: MySQLCursor) -> List[str]:
+    """
+    Lists the rows that stop audio_url from being narrowed and uniquely indexed.
+
+    Args:
+        cursor (MySQLCursor): MySQL connection cursor
+
+    Returns:
+        List[str]: One line per problem: URLs longer than AUDIO_URL_MAX_LENGTH, and duplicated URLs.
+    """
+    problems = []
+    cursor.execute(
+        "SELECT COUNT(*), MAX(CHAR_LENGTH(audio_url)) FROM episodes WHERE CHAR_LENGTH(audio_url) > %s",
+        (AUDIO_URL_MAX_LENGTH,),
+    )
+    too_long, longest = cursor.fetchone()
+    if too_long:
+        problems.append(f"{too_long} audio_url values exceed {AUDIO_URL_MAX_LENGTH} characters (longest: {longest})")
+    cursor.execute("SELECT COUNT(*) FROM (SELECT 1 FROM episodes GROUP BY audio_url HAVING COUNT(*) > 1) AS d")
+    duplicated = cursor.fetchone()[0]
+    if duplicated:
+        problems.append(f"{duplicated} audio_url values appear in more than one episode")
+    return problems
+
 def create_tables():
     """
     Create MySQL tables in AWS RDS using sql queries.
@@ -38,6 +91,26 @@ def create_tables():
         logging.info("Executing SQL file: %s", full_path)
         execute_sql_file(cursor, full_path)
 
+    # indexes added after the tables were first created; (table, index name, sql file, check for blocking rows)
+    migrations: List[Tuple[str, str, str, Optional[Callable[[MySQLCursor], List[str]]]]] = [
+        ("episodes", "uq_episodes_audio_url", "add_episodes_audio_url_index.sql", audio_url_index_blockers),
+        ("episodes", "idx_episodes_published_at", "add_episodes_published_at_index.sql", None),
+        ("transcript_segments", "segment_text", "add_transcript_segments_fulltext_index.sql", None),
+    ]
+    for table, index_name, sql_file, blockers in migrations:
+        if index_exists(cursor, table, index_name):
+            continue
+        problems = blockers(cursor) if blockers is not None else []
+        if problems:
+            cursor.close()
+            conn.close()
+            raise MigrationBlockedError(
+                f"Not running {sql_file}; fix these rows first: " + "; ".join(problems)
+            )
+        full_path = base_path / sql_file
+        logging.info("Executing migration: %s", full_path)
+        execute_sql_file(cursor, full_path)
+
     conn.commit()
     logging.info("Closing database connection...")
     cursor.close()
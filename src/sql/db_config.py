@@ -1,16 +1,209 @@
+import logging
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from pathlib import Path
-import mysql.connector
+from typing import Iterator, Optional
 
 # go to the project root and load the '.env' file
 load_dotenv(dotenv_path=Path(__file__).resolve().parents[2] / ".env")
 
-def get_db_connection():
-    return mysql.connector.connect(
+logger = logging.getLogger(__name__)
+
+
+def _mysql():
+    """Imports mysql.connector on first use, so SQLite runs and CLI commands that never connect skip it."""
+    import mysql.connector
+    return mysql.connector
+
+
+def connect():
+    """
+    Opens a new, unpooled connection using the settings in '.env'.
+
+    With DB_BACKEND=sqlite the connection is a local SQLite stand-in at
+    DB_SQLITE_PATH instead of MySQL, for offline runs and benchmarks.
+    """
+    if os.getenv("DB_BACKEND", "mysql") == "sqlite":
+        from src.sql import sqlite_stand_in
+        return sqlite_stand_in.connect(os.getenv("DB_SQLITE_PATH", "podcasts.sqlite3"))
+    return _mysql().connect(
         host=os.getenv("DB_HOST"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         database=os.getenv("DB_NAME"),
-        port=int(os.getenv("DB_PORT", 3306))
-    )
\ No newline at end of file
+        port=int(os.getenv("DB_PORT", 3306)),
+        allow_local_infile=os.getenv("DB_ALLOW_LOCAL_INFILE", "0") == "1"
+    )
+
+
+class PooledConnection:
+    """
+    A connection borrowed from a ConnectionPool.
+
+    Behaves like the underlying mysql.connector connection, except that close()
+    rolls back any uncommitted work and returns the connection to the pool.
+    """
+
+    def __init__(self, pool: "ConnectionPool", conn, created_at: float):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._pool._release(self._conn, self._created_at)
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of MySQL connections with recycling and pre-ping.
+
+    Attributes:
+        size (int): Maximum number of open connections.
+        recycle_seconds (float): Connections older than this are closed instead of reused.
+        timeout (float): Seconds to wait for a free connection before raising.
+    """
+
+    def __init__(self, size: int = 5, recycle_seconds: float = 3600, timeout: float = 30, connect_fn=connect):
+        """
+        Initializes an empty pool; connections are opened on demand.
+
+        Args:
+            size (int): Maximum number of open connections.
+            recycle_seconds (float): Connections older than this are closed instead of reused.
+            timeout (float): Seconds to wait for a free connection before raising.
+            connect_fn (callable): Opens a new connection.
+        """
+        self.size = size
+        self.recycle_seconds = recycle_seconds
+        self.timeout = timeout
+        self._connect = connect_fn
+        self._idle: "queue.LifoQueue[tuple]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+
+    def acquire(self) -> PooledConnection:
+        """
+        Borrows a healthy connection, opening one if no idle connection is usable.
+
+        Returns:
+            PooledConnection: The borrowed connection. Call close() to return it.
+
+        Raises:
+            TimeoutError: If all connections stay checked out for longer than timeout.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection free after {self.timeout}s (pool size {self.size})")
+        try:
+            while True:
+                try:
+                    conn, created_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return PooledConnection(self, self._connect(), time.monotonic())
+                if time.monotonic() - created_at > self.recycle_seconds:
+                    self._discard(conn)
+                    continue
+                try:
+                    # pre-ping: a connection dropped by the server or tunnel is replaced, not handed out
+                    conn.ping(reconnect=False)
+                except _mysql().Error:
+                    self._discard(conn)
+                    continue
+                return PooledConnection(self, conn, created_at)
+        except BaseException:
+            self._slots.release()
+            raise
+
+
+    def _release(self, conn, created_at: float):
+        """Returns a connection to the idle queue, discarding it if it is unusable."""
+        try:
+            conn.rollback()
+        except _mysql().Error:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, created_at))
+        finally:
+            self._slots.release()
+
+
+    def _discard(self, conn):
+        """Closes a connection that will not be reused."""
+        try:
+            conn.close()
+        except _mysql().Error as e:
+            logger.debug("Ignoring error while closing connection: %s", e)
+
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, configured from the environment.
+
+    DB_POOL_SIZE (default 5), DB_POOL_RECYCLE seconds (default 3600) and
+    DB_POOL_TIMEOUT seconds (default 30) control the pool. A forked child
+    process gets its own pool rather than sharing its parent's sockets.
+
+    Returns:
+        ConnectionPool: The shared pool.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(
+                size=int(os.getenv("DB_POOL_SIZE", 5)),
+                recycle_seconds=float(os.getenv("DB_POOL_RECYCLE", 3600)),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def get_db_connection() -> PooledConnection:
+    """
+    Borrows a connection from the process-wide pool. Call close() to return it.
+
+    Returns:
+        PooledConnection: The borrowed connection.
+    """
+    return get_pool().acquire()
+
+
+@contextmanager
+def db_connection() -> Iterator[PooledConnection]:
+    """
+    Borrows a pooled connection for the duration of a with-block.
+
+    Uncommitted work is rolled back when the block exits, whether or not it raised.
+
+    Yields:
+        PooledConnection: The borrowed connection.
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
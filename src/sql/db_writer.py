@@ -1,8 +1,8 @@
-import mysql.connector
-from prefect import get_run_logger, task
-from prefect.tasks import exponential_backoff
-from typing import List, Dict
-from src.sql.db_config import get_db_connection
+import os
+import tempfile
+import warnings
+from typing import Iterable, List, Dict, Optional, Set
+from src.search import SegmentIndex
 
 
 def episode_exists(cursor, audio_url: str) -> bool:
@@ -11,12 +11,54 @@ def episode_exists(cursor, audio_url: str) -> bool:
     result = cursor.fetchone()
     exists = result is not None
 
+    from prefect import get_run_logger
     logger = get_run_logger()
     logger.info(f"Episode with audio_url={audio_url} exists? {exists}")
 
     return exists
 
-def insert_episode(cursor, episode: dict) -> int:
+def existing_audio_urls(cursor, audio_urls: Iterable[str], batch_size: int = 500) -> Set[str]:
+    """Returns the subset of the given audio URLs that are already stored.
+
+    URLs are looked up with one indexed `IN (...)` query per batch rather than one query each.
+
+    Args:
+        cursor: An open database cursor.
+        audio_urls (Iterable[str]): Candidate audio URLs.
+        batch_size (int): Maximum number of URLs per query.
+
+    Returns:
+        Set[str]: The audio URLs that already have a row in the episodes table.
+    """
+    urls = list(dict.fromkeys(audio_urls))
+    existing = set()
+    for i in range(0, len(urls), batch_size):
+        batch = urls[i:i + batch_size]
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"SELECT audio_url FROM episodes WHERE audio_url IN ({placeholders})", tuple(batch))
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+def filter_new_episodes(cursor, episodes: List[Dict]) -> List[Dict]:
+    """Returns the episodes whose audio URL is not yet stored, dropping in-feed duplicates.
+
+    Args:
+        cursor: An open database cursor.
+        episodes (List[Dict]): Candidate episode dictionaries, each with an 'audio_url' key.
+
+    Returns:
+        List[Dict]: The new episodes, in their original order.
+    """
+    existing = existing_audio_urls(cursor, (episode["audio_url"] for episode in episodes))
+    new_episodes = []
+    for episode in episodes:
+        if episode["audio_url"] in existing:
+            continue
+        existing.add(episode["audio_url"])
+        new_episodes.append(episode)
+    return new_episodes
+
+def insert_episode(cursor, episode: dict, index: Optional[SegmentIndex] = None) -> int:
     cursor.execute("""
         INSERT INTO episodes (
             episode_title, feed_title, description, summary,
@@ -32,45 +74,118 @@ def insert_episode(cursor, episode: dict) -> int:
         episode.get("episode_link"),
         episode.get("published")
     ))
-    return cursor.lastrowid
+    episode_id = cursor.lastrowid
+    if index is not None:
+        index.add_episode(episode_id, episode.get("feed_title"), episode.get("published"))
+    return episode_id
+
+SEGMENT_COLUMNS = "episode_id, whisper_segment_id, segment_start, segment_end, segment_text"
 
-def insert_transcript_segments(cursor, episode_id: int, transcript_segments: List[Dict]):
+def _segment_rows(episode_id: int, transcript_segments: Iterable[Dict]):
+    """Yields one insert tuple per transcript segment."""
     for segment in transcript_segments:
-        cursor.execute("""
-            INSERT INTO transcript_segments (
-                episode_id, whisper_segment_id,
-                segment_start, segment_end, segment_text
-            ) VALUES (%s, %s, %s, %s, %s)
-        """, (
+        yield (
             episode_id,
             segment.get("whisper_segment_id"),
             segment.get("start"),
             segment.get("end"),
             segment.get("text")
-        ))
-
-@task(
-    retries=3,
-    retry_delay_seconds=exponential_backoff(backoff_factor=30),
-    retry_jitter_factor=1,
-)
-def store_episode_data(episode: dict, transcript_segments: list[dict]):
-    """Stores episode and transcript data in the database if not already present."""
-    logger = get_run_logger()
-    conn = get_db_connection()
-    cursor = conn.cursor()
+        )
+
+def insert_transcript_segments(
+    cursor,
+    episode_id: int,
+    transcript_segments: List[Dict],
+    batch_size: int = 1000,
+    index: Optional[SegmentIndex] = None,
+) -> int:
+    """Inserts transcript segments with multi-row batches.
+
+    mysql.connector rewrites each executemany batch into a single multi-row INSERT,
+    so an episode costs one round trip per batch_size segments instead of one per segment.
+
+    Args:
+        cursor: An open database cursor.
+        episode_id (int): The episode the segments belong to.
+        transcript_segments (List[Dict]): Segment dictionaries as returned by Audio2Text.transcribe.
+        batch_size (int): Maximum number of rows per INSERT statement.
+        index (SegmentIndex, optional): Local search index to add the segments to.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    sql = f"INSERT INTO transcript_segments ({SEGMENT_COLUMNS}) VALUES (%s, %s, %s, %s, %s)"
+    rows = list(_segment_rows(episode_id, transcript_segments))
+    for i in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[i:i + batch_size])
+    if index is not None:
+        index.add_segments(episode_id, transcript_segments)
+    return len(rows)
+
+def _tsv_field(value) -> str:
+    """Formats one value in LOAD DATA's default backslash-escaped text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+def load_transcript_segments_infile(
+    cursor,
+    episode_id: int,
+    transcript_segments: List[Dict],
+    index: Optional[SegmentIndex] = None,
+) -> int:
+    """Bulk loads transcript segments by streaming a generated TSV file with LOAD DATA LOCAL INFILE.
+
+    The connection must be opened with allow_local_infile=True (DB_ALLOW_LOCAL_INFILE=1),
+    and the server must have local_infile enabled. Like the INSERT path, the load joins
+    the caller's transaction, so the episode and its segments still commit together.
+
+    Args:
+        cursor: An open database cursor.
+        episode_id (int): The episode the segments belong to.
+        transcript_segments (List[Dict]): Segment dictionaries as returned by Audio2Text.transcribe.
+        index (SegmentIndex, optional): Local search index to add the segments to.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    rows = 0
+    with tempfile.NamedTemporaryFile("w", suffix=".tsv", encoding="utf-8", newline="\n", delete=False) as f:
+        tsv_path = f.name
+        for row in _segment_rows(episode_id, transcript_segments):
+            f.write("\t".join(_tsv_field(value) for value in row))
+            f.write("\n")
+            rows += 1
     try:
-        if episode_exists(cursor, episode["audio_url"]):
-            logger.info(f"Episode already exists: {episode['audio_url']}")
-            return
-
-        episode_id = insert_episode(cursor, episode)
-        insert_transcript_segments(cursor, episode_id, transcript_segments)
-        conn.commit()
-        logger.info(f"Inserted episode {episode['title']} with {len(transcript_segments)} segments")
-    except Exception as e:
-        logger.error(f"Failed to insert episode: {e}")
-        raise
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE transcript_segments
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t'
+            LINES TERMINATED BY '\\n'
+            ({SEGMENT_COLUMNS})
+        """, (tsv_path,))
     finally:
-        cursor.close()
-        conn.close()
+        os.remove(tsv_path)
+    if index is not None:
+        index.add_segments(episode_id, transcript_segments)
+    return rows
+
+
+def __getattr__(name: str):
+    """Resolves the deprecated store_episode_data, which now lives in pipeline, on first access."""
+    if name == "store_episode_data":
+        warnings.warn(
+            "src.sql.db_writer.store_episode_data is deprecated; use pipeline.store_episode_data",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        # imported here: pipeline imports this module, and importing it loads Prefect
+        from pipeline import store_episode_data
+        return store_episode_data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,7 @@
+-- audio_url becomes VARCHAR(768): the longest utf8mb4 column InnoDB can key uniquely (3072 bytes).
+-- Longer URLs would be truncated or rejected, and duplicates would fail the unique key, so
+-- create_db_tables.py checks for both and refuses to run this until such rows are fixed.
+-- Episodes with longer audio URLs cannot be stored once this has run.
+ALTER TABLE episodes
+    MODIFY audio_url VARCHAR(768),
+    ADD UNIQUE KEY uq_episodes_audio_url (audio_url);
@@ -0,0 +1,3 @@
+-- lets time-window searches range-scan published_at instead of reading every episode
+ALTER TABLE episodes
+    ADD KEY idx_episodes_published_at (published_at);
\ No newline at end of file
@@ -0,0 +1,4 @@
+-- same name MySQL gives the unnamed FULLTEXT key in create_transcript_segments_table.sql,
+-- so only tables created before that key was added are altered
+ALTER TABLE transcript_segments
+    ADD FULLTEXT INDEX segment_text (segment_text);
\ No newline at end of file
@@ -5,7 +5,9 @@ CREATE TABLE IF NOT EXISTS episodes (
     description TEXT,
     summary TEXT,
     rss_url TEXT,
-    audio_url TEXT,
+    audio_url VARCHAR(768), -- the longest utf8mb4 column InnoDB can key uniquely (3072 bytes)
     episode_link TEXT,
-    published_at DATETIME
+    published_at DATETIME,
+    UNIQUE KEY uq_episodes_audio_url (audio_url),
+    KEY idx_episodes_published_at (published_at)
 );
@@ -0,0 +1,17 @@
+USE podcasts;
+
+-- Indexed version of presidential-candidate-query.sql: the FULLTEXT index finds the
+-- matching segments and the published_at index bounds the window, instead of
+-- scanning every segment with REGEXP. The end date is exclusive.
+SELECT DISTINCT e.episode_id,
+       e.episode_title,
+       e.feed_title AS podcast_title,
+       e.published_at,
+       t.segment_text
+FROM transcript_segments t
+JOIN episodes e
+  ON e.episode_id = t.episode_id
+WHERE MATCH(t.segment_text) AGAINST ('"trump" "biden"' IN BOOLEAN MODE)
+  AND e.published_at >= '2024-10-22'
+  AND e.published_at < '2024-11-20'
+ORDER BY e.published_at ASC;
\ No newline at end of file
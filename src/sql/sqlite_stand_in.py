@@ -0,0 +1,108 @@
+import sqlite3
+
+# SQLite equivalents of the MySQL tables in queries/
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    episode_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode_title TEXT,
+    feed_title TEXT,
+    description TEXT,
+    summary TEXT,
+    rss_url TEXT,
+    audio_url TEXT UNIQUE,
+    episode_link TEXT,
+    published_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS transcript_segments (
+    segment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode_id INTEGER REFERENCES episodes(episode_id) ON DELETE CASCADE,
+    whisper_segment_id INTEGER,
+    segment_start REAL,
+    segment_end REAL,
+    segment_text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_published_at ON episodes(published_at);
+"""
+
+
+class StandInCursor:
+    """
+    Wraps a sqlite3 cursor so MySQL-style '%s' placeholders work unchanged.
+
+    Only the subset of the MySQL cursor API used by db_writer is provided.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+        self.round_trips = 0
+
+    def execute(self, sql: str, params=()):
+        self.round_trips += 1
+        self._cursor.execute(sql.replace("%s", "?"), params)
+
+    def executemany(self, sql: str, seq_of_params):
+        self.round_trips += 1
+        self._cursor.executemany(sql.replace("%s", "?"), seq_of_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """
+    A SQLite connection exposing the mysql.connector connection methods the pipeline uses.
+
+    Lets db_writer functions and tasks run against a local file or in-memory
+    database for tests and offline benchmarks.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        # several pooled connections may write to the same file; wait for the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def cursor(self) -> StandInCursor:
+        return StandInCursor(self._conn.cursor())
+
+    def ping(self, reconnect: bool = False):
+        self._conn.execute("SELECT 1")
+
+    def start_transaction(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path: str = ":memory:") -> StandInConnection:
+    """
+    Opens a SQLite stand-in database with the pipeline's schema.
+
+    Args:
+        path (str): Path to the SQLite file, or ':memory:' for a private in-memory database.
+
+    Returns:
+        StandInConnection: The connection.
+    """
+    return StandInConnection(path)
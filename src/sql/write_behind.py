@@ -0,0 +1,432 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, ContextManager, Dict, List, NamedTuple, Optional, Set, Tuple
+from src.ledger import decode_episode, encode_episode
+from src.metrics import CountingCursor, get_metrics
+from src.search import get_segment_index
+from src.sql.db_config import db_connection
+from src.sql.db_writer import (
+    existing_audio_urls,
+    insert_episode,
+    insert_transcript_segments,
+    load_transcript_segments_infile,
+)
+from src.transcript_segments import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_PATH = os.getenv("WRITE_BEHIND_SPILL_PATH", ".write_behind.jsonl")
+DEFAULT_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", 20))
+DEFAULT_MAX_DELAY = float(os.getenv("WRITE_BEHIND_MAX_DELAY", 30))
+
+
+class WriteBehindClosedError(RuntimeError):
+    """Raised when an episode is submitted to a writer that has been closed."""
+
+
+class _EpisodeFailed(Exception):
+    """Aborts an optimistic batch write so it can be redone with per-episode savepoints."""
+
+
+class PendingWrite(NamedTuple):
+    """One buffered episode waiting for its transaction."""
+    seq: int
+    episode: dict
+    segments: TranscriptSegments
+    submitted: float
+    attempts: int = 0
+
+
+class WriteBehindWriter:
+    """
+    Buffers finished episodes and writes them to the database in the background.
+
+    submit() returns as soon as the episode is appended to a spill file on local
+    disk, so transcription never waits on the database. A background thread
+    flushes the buffer whenever max_batch episodes are waiting or the oldest has
+    waited max_delay seconds. Each flush is one transaction:
+    - one lookup for already-stored audio URLs, which are skipped like
+      episode_exists does;
+    - every other episode is inserted as usual;
+    - one commit for the whole batch.
+    If an episode fails, that transaction is rolled back and the batch is written
+    again with a savepoint around each episode. The failing episode is then rolled
+    back alone, and the rest of the batch is committed.
+    A flush that fails (e.g. the database is unreachable) leaves the batch buffered
+    and is retried with exponential backoff.
+
+    The spill file is an append-only JSONL log of submitted and committed episodes.
+    A writer replays it on start, so episodes buffered when a run crashed are
+    written by the next run. One writer should own a spill file at a time.
+
+    Attributes:
+        spill_path (str): Path of the JSONL spill file.
+        max_batch (int): Episodes that trigger a flush, and the most written per transaction.
+        max_delay (float): Seconds the oldest buffered episode may wait before a flush.
+        use_load_data (bool): Load segments with LOAD DATA LOCAL INFILE instead of batched INSERTs.
+        max_attempts (int): Failed attempts after which an episode is moved to spill_path + '.failed'.
+    """
+
+    def __init__(
+        self,
+        spill_path: str = DEFAULT_SPILL_PATH,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        use_load_data: bool = False,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+        connection: Callable[[], ContextManager] = db_connection,
+        on_stored: Optional[Callable[[dict], None]] = None,
+    ):
+        """
+        Initializes the writer, replays its spill file and starts the flush thread.
+
+        Args:
+            spill_path (str): Path of the JSONL spill file. Defaults to WRITE_BEHIND_SPILL_PATH or '.write_behind.jsonl'.
+            max_batch (int): Episodes per transaction. Defaults to WRITE_BEHIND_MAX_BATCH or 20.
+            max_delay (float): Seconds before a partial batch is flushed. Defaults to WRITE_BEHIND_MAX_DELAY or 30.
+            use_load_data (bool): Load segments with LOAD DATA LOCAL INFILE instead of batched INSERTs.
+            max_attempts (int): Failed attempts after which an episode is set aside.
+            retry_delay (float): Seconds before retrying a failed flush; doubled after each further failure.
+            max_retry_delay (float): Upper bound for the retry delay.
+            connection (Callable[[], ContextManager]): Yields a database connection; defaults to the shared pool.
+            on_stored (Callable[[dict], None], optional): Called from the flush thread with each episode
+                once it is committed or found already stored (e.g. FeedWatermarks.mark_stored).
+                Episodes replayed from the spill file may be flushed as soon as the writer opens,
+                so whatever on_stored updates must be ready for them first.
+        """
+        self.spill_path = spill_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.use_load_data = use_load_data
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.connection = connection
+        self.on_stored = on_stored
+        self._cond = threading.Condition()
+        self._pending: "OrderedDict[int, PendingWrite]" = OrderedDict()
+        self._next_seq = 0
+        self._closing = False
+        self._flush_requested = False
+        self._counts = {"flushed": 0, "skipped": 0, "failed": 0, "commits": 0}
+        self._last_error: Optional[str] = None
+        self._replay()
+        self._spill = open(spill_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+
+    def _replay(self):
+        """Loads episodes left in the spill file by a previous run and rewrites it compactly."""
+        if not os.path.exists(self.spill_path):
+            return
+        puts: Dict[int, dict] = {}
+        with open(self.spill_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a line cut short by a crash mid-append
+                    logger.warning("Ignoring truncated line in %s", self.spill_path)
+                    continue
+                if entry["op"] == "put":
+                    puts[entry["seq"]] = entry
+                else:
+                    for seq in entry["seqs"]:
+                        puts.pop(seq, None)
+        now = time.monotonic()
+        tmp_path = self.spill_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq, entry in enumerate(puts.values()):
+                entry["seq"] = seq
+                f.write(json.dumps(entry) + "\n")
+                self._pending[seq] = PendingWrite(
+                    seq, decode_episode(entry["episode"]), TranscriptSegments.from_dicts(entry["segments"]), now
+                )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spill_path)
+        self._next_seq = len(puts)
+        if puts:
+            logger.info("Recovered %d unwritten episodes from %s", len(puts), self.spill_path)
+
+
+    def _append(self, entry: dict):
+        """Durably appends one entry to the spill file. Call with the lock held."""
+        self._spill.write(json.dumps(entry) + "\n")
+        self._spill.flush()
+        os.fsync(self._spill.fileno())
+
+
+    def submit(self, episode: dict, transcript_segments):
+        """
+        Buffers an episode and its transcript for writing. Returns once they are on local disk.
+
+        Args:
+            episode (dict): Metadata dictionary for the episode.
+            transcript_segments (TranscriptSegments | list[dict]): The episode's transcript.
+
+        Raises:
+            WriteBehindClosedError: If the writer has been closed.
+        """
+        segments = TranscriptSegments.from_dicts(transcript_segments)
+        with self._cond:
+            if self._closing:
+                raise WriteBehindClosedError(f"Cannot submit {episode['audio_url']}: writer is closed")
+            seq = self._next_seq
+            self._next_seq += 1
+            self._append({"op": "put", "seq": seq, "episode": encode_episode(episode), "segments": segments.to_dicts()})
+            self._pending[seq] = PendingWrite(seq, episode, segments, time.monotonic())
+            self._report()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+
+    def pending_audio_urls(self) -> Set[str]:
+        """Returns the audio URLs of episodes buffered but not yet committed."""
+        with self._cond:
+            return {write.episode["audio_url"] for write in self._pending.values()}
+
+
+    def _oldest_age(self) -> float:
+        if not self._pending:
+            return 0.0
+        return time.monotonic() - next(iter(self._pending.values())).submitted
+
+
+    def _report(self):
+        """Publishes the backlog gauges. Call with the lock held."""
+        metrics = get_metrics()
+        metrics.set_gauge("pipeline_write_behind_backlog", len(self._pending))
+        metrics.set_gauge("pipeline_write_behind_oldest_seconds", self._oldest_age())
+
+
+    def _run(self):
+        """Flush thread: waits for a full batch, an old enough episode, a flush() or close()."""
+        delay = self.retry_delay
+        while True:
+            with self._cond:
+                while not (self._pending and (
+                    self._closing or self._flush_requested
+                    or len(self._pending) >= self.max_batch or self._oldest_age() >= self.max_delay
+                )):
+                    if self._closing:
+                        return
+                    self._cond.wait(self.max_delay - self._oldest_age() if self._pending else None)
+                batch = list(self._pending.values())[:self.max_batch]
+            try:
+                self._flush_batch(batch)
+            except Exception as e:
+                logger.warning("Write-behind flush of %d episodes failed, retrying in %.0fs: %s",
+                               len(batch), delay, e)
+                get_metrics().inc("pipeline_write_behind_flush_failures_total")
+                with self._cond:
+                    self._last_error = str(e)
+                    self._cond.notify_all()
+                    if self._closing:
+                        logger.warning("%d episodes stay in %s for the next run",
+                                       len(self._pending), self.spill_path)
+                        return
+                    self._cond.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+            else:
+                delay = self.retry_delay
+
+
+    def _write(self, batch: List[PendingWrite], isolate: bool) -> Tuple[List[PendingWrite], List[PendingWrite], Dict[int, str], int]:
+        """
+        Writes one batch in a single transaction.
+
+        Without isolate, a failing episode aborts the whole transaction with _EpisodeFailed.
+        With isolate, every episode gets a savepoint, and failing episodes are rolled back alone.
+
+        Returns:
+            Tuple: The stored writes, the writes skipped as already stored, errors by seq, and rows inserted.
+        """
+        metrics = get_metrics()
+        index = get_segment_index()
+        stored: List[PendingWrite] = []
+        skipped: List[PendingWrite] = []
+        failed: Dict[int, str] = {}
+        indexed: List[int] = []
+        rows = 0
+        with metrics.stage("store_flush", isolated=isolate) as stage, self.connection() as conn:
+            # explicit, so releasing a savepoint never ends the transaction
+            conn.start_transaction()
+            cursor = CountingCursor(conn.cursor())
+            try:
+                existing = existing_audio_urls(cursor, (write.episode["audio_url"] for write in batch))
+                for write in batch:
+                    if write.episode["audio_url"] in existing:
+                        skipped.append(write)
+                        continue
+                    if isolate:
+                        cursor.execute("SAVEPOINT episode")
+                    episode_id = None
+                    try:
+                        episode_id = insert_episode(cursor, write.episode, index=index)
+                        if self.use_load_data:
+                            n = load_transcript_segments_infile(cursor, episode_id, write.segments, index=index)
+                        else:
+                            n = insert_transcript_segments(cursor, episode_id, write.segments, index=index)
+                        if isolate:
+                            cursor.execute("RELEASE SAVEPOINT episode")
+                    except Exception as e:
+                        if index is not None and episode_id is not None:
+                            index.remove_episode(episode_id)
+                        if not isolate:
+                            raise _EpisodeFailed(write.episode["audio_url"]) from e
+                        # if the connection itself is gone this raises too, and the whole batch is retried
+                        cursor.execute("ROLLBACK TO SAVEPOINT episode")
+                        logger.error("Failed to write episode %s: %s", write.episode["audio_url"], e)
+                        failed[write.seq] = str(e)
+                        continue
+                    if index is not None:
+                        indexed.append(episode_id)
+                    existing.add(write.episode["audio_url"])
+                    stored.append(write)
+                    rows += n + 1
+                conn.commit()
+            except BaseException:
+                if index is not None:
+                    for episode_id in indexed:
+                        index.remove_episode(episode_id)
+                raise
+            finally:
+                cursor.close()
+            # + START TRANSACTION and COMMIT
+            stage.record(episodes=len(stored), rows=rows, round_trips=cursor.round_trips + 2, commits=1)
+        return stored, skipped, failed, rows
+
+
+    def _flush_batch(self, batch: List[PendingWrite]):
+        """Writes one batch, then drops the finished episodes from the buffer and the spill file."""
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            # the common case costs no savepoint round trips
+            stored, skipped, failed, rows = self._write(batch, isolate=False)
+        except _EpisodeFailed as e:
+            logger.warning("Episode %s failed in a batch; rewriting the batch episode by episode", e)
+            stored, skipped, failed, rows = self._write(batch, isolate=True)
+
+        elapsed = time.perf_counter() - started
+        now = time.monotonic()
+        metrics.observe("pipeline_write_behind_flush_seconds", elapsed)
+        for write in stored:
+            metrics.observe("pipeline_write_behind_latency_seconds", now - write.submitted)
+
+        with self._cond:
+            done = [write.seq for write in stored + skipped]
+            for seq, error in failed.items():
+                write = self._pending[seq]._replace(attempts=self._pending[seq].attempts + 1)
+                if write.attempts >= self.max_attempts:
+                    self._set_aside(write, error)
+                    done.append(seq)
+                else:
+                    self._pending[seq] = write
+            for seq in done:
+                self._pending.pop(seq)
+            if self._pending:
+                self._append({"op": "done", "seqs": done})
+            else:
+                # nothing left to recover; start the log afresh
+                self._spill.truncate(0)
+            self._counts["flushed"] += len(stored)
+            self._counts["skipped"] += len(skipped)
+            self._counts["commits"] += 1
+            self._last_error = None
+            if not self._pending:
+                self._flush_requested = False
+            self._report()
+            self._cond.notify_all()
+        logger.info("Wrote %d episodes (%d rows, %d already stored, %d failed) in one transaction in %.2fs",
+                    len(stored), rows, len(skipped), len(failed), elapsed)
+        if self.on_stored is not None:
+            for write in stored + skipped:
+                try:
+                    self.on_stored(write.episode)
+                except Exception:
+                    # the batch is committed either way; a lost notification only costs a re-read
+                    logger.exception("on_stored failed for %s", write.episode["audio_url"])
+
+
+    def _set_aside(self, write: PendingWrite, error: str):
+        """Moves an episode that keeps failing to the .failed file. Call with the lock held."""
+        logger.error("Giving up on episode %s after %d attempts: %s",
+                     write.episode["audio_url"], write.attempts, error)
+        with open(self.spill_path + ".failed", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"episode": encode_episode(write.episode), "segments": write.segments.to_dicts(),
+                                "error": error}) + "\n")
+        self._counts["failed"] += 1
+        get_metrics().inc("pipeline_write_behind_failed_episodes_total")
+
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Writes everything buffered now instead of waiting for a full batch.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Waits indefinitely if None.
+
+        Returns:
+            bool: True if the buffer was emptied, False if a flush failed or the timeout passed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._last_error = None
+            self._cond.notify_all()
+            while self._pending and self._last_error is None and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return not self._pending
+
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the writer's progress.
+
+        Returns:
+            dict: backlog, oldest_seconds, flushed, skipped (already stored), failed (set aside),
+                commits and last_error.
+        """
+        with self._cond:
+            return {"backlog": len(self._pending), "oldest_seconds": round(self._oldest_age(), 3),
+                    **self._counts, "last_error": self._last_error}
+
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Flushes what is buffered and stops the flush thread.
+
+        Episodes that cannot be written now (e.g. the database is down) stay in
+        the spill file and are written by the next writer opened on it.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the final flushes.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Write-behind flush still running after %ss; %s stays open", timeout, self.spill_path)
+            return
+        self._spill.close()
+
+
+    def __enter__(self) -> "WriteBehindWriter":
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.async_feeds import AsyncFeedFetcher
+from src.feed_cache import FeedCache
+from src.podcast_rss_reader import PodcastRSSFeedReader
+
+
+def feed_xml(name: str) -> bytes:
+    items = "".join(
+        f"<item><title>{name} {i}</title><pubDate>{format_datetime(datetime(2024, 6, 1) - timedelta(days=90 * i))}</pubDate>"
+        f'<enclosure url="https://example.com/{name}/{i}.mp3" type="audio/mpeg" length="1"/></item>'
+        for i in range(4)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>{items}</channel></rss>'.encode()
+
+
+class FeedHost:
+    """A local feed host with artificial latency that records its peak concurrency."""
+
+    def __init__(self, latency: float = 0.1, failures: int = 0):
+        self.latency = latency
+        self.failures = failures
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+        host = self
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with lock:
+                    host.requests += 1
+                    host.active += 1
+                    host.peak = max(host.peak, host.active)
+                    fail = host.failures > 0
+                    host.failures -= fail
+                time.sleep(host.latency)
+                with lock:
+                    host.active -= 1
+                if fail:
+                    self.send_error(503)
+                    return
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = feed_xml(self.path.strip("/"))
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_concurrent_fetch_matches_reader_and_respects_host_limits():
+    hosts = [FeedHost(), FeedHost()]
+    try:
+        urls = [f"{host.url}/show{i}" for host in hosts for i in range(6)]
+        started = time.perf_counter()
+        episodes = AsyncFeedFetcher(per_host=3).fetch_all(urls, 2024)
+        elapsed = time.perf_counter() - started
+
+        for url in urls:
+            assert episodes[url] == PodcastRSSFeedReader(url).get_episodes(filter_by_year=2024)
+            assert len(episodes[url]) == 2
+        assert all(host.peak <= 3 for host in hosts)
+        # 6 feeds per host, 3 at a time, 0.1 s each: about 0.2 s rather than 12 x 0.1 s
+        assert elapsed < 1.0
+    finally:
+        for host in hosts:
+            host.close()
+
+
+def test_retries_within_budget_and_conditional_fetch(tmp_path):
+    host = FeedHost(latency=0.0, failures=2)
+    try:
+        cache = FeedCache(str(tmp_path / "feed_cache.json"))
+        fetcher = AsyncFeedFetcher(cache=cache, backoff=0.01, retry_budget=1)
+        urls = [f"{host.url}/a", f"{host.url}/b"]
+        first = fetcher.fetch_all(urls, 2024)
+        # one retry was allowed: one feed recovers, the other gives up
+        assert len(fetcher.errors) == 1
+        assert sum(len(episodes) for episodes in first.values()) == 2
+        for url in urls:
+            cache.commit(url)
+
+        second = AsyncFeedFetcher(cache=cache).fetch_all(urls, 2024)
+        ok_url = next(url for url in urls if url not in fetcher.errors)
+        assert second[ok_url] == []  # 304 Not Modified
+        assert cache.stats()["hits"] == 1
+    finally:
+        host.close()
+
+
+def test_failed_parse_does_not_record_validators(tmp_path, monkeypatch):
+    class BrokenReader(PodcastRSSFeedReader):
+        def get_episodes(self, *args):
+            raise ValueError("unparseable feed")
+
+    host = FeedHost(latency=0.0)
+    try:
+        cache = FeedCache(str(tmp_path / "feed_cache.json"))
+        url = f"{host.url}/a"
+        monkeypatch.setattr("src.async_feeds.PodcastRSSFeedReader", BrokenReader)
+        fetcher = AsyncFeedFetcher(cache=cache)
+        fetcher.fetch_all([url], 2024)
+        assert url in fetcher.errors
+        cache.commit(url)
+
+        # nothing was kept, so the feed is fetched and parsed in full again
+        monkeypatch.undo()
+        assert len(AsyncFeedFetcher(cache=cache).fetch_all([url], 2024)[url]) == 2
+    finally:
+        host.close()
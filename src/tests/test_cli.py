@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from src.cli import main, read_episodes
+from src.ledger import encode_episode
+from src.tests.test_async_feeds import FeedHost, feed_xml
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def write_feeds(tmp_path, names):
+    rows = ["rss_url"]
+    for name in names:
+        path = tmp_path / f"{name}.xml"
+        path.write_bytes(feed_xml(name))
+        rows.append(str(path))
+    csv_path = tmp_path / "feeds.csv"
+    csv_path.write_text("\n".join(rows) + "\n")
+    return str(csv_path)
+
+
+def cli(*args, env=None, stdin=""):
+    return subprocess.run([sys.executable, "-m", "src.cli", *args], input=stdin, capture_output=True, text=True,
+                          cwd=ROOT, env={**os.environ, **(env or {})}, check=True).stdout
+
+
+def test_discover_writes_episode_lines(tmp_path):
+    csv_path = write_feeds(tmp_path, ["a", "b"])
+    out = tmp_path / "episodes.jsonl"
+
+    assert main(["discover", "--csv", csv_path, "--year", "2024", "--no-cache", "--output", str(out)]) == 0
+
+    with open(out) as f:
+        episodes = list(read_episodes(f))
+    assert [episode["title"] for episode in episodes] == ["a 0", "a 1", "b 0", "b 1"]
+    assert isinstance(episodes[0]["published"], datetime)
+
+
+def test_discover_and_store_skip_heavy_imports(tmp_path):
+    csv_path = write_feeds(tmp_path, ["a"])
+    probe = """
+import json, runpy, sys
+sys.argv = ["src.cli", *sys.argv[1:]]
+try:
+    runpy.run_module("src.cli", run_name="__main__")
+except SystemExit:
+    pass
+print(json.dumps([m for m in ("whisper", "torch", "prefect.tasks", "mysql.connector") if m in sys.modules]),
+      file=sys.stderr)
+"""
+    result = subprocess.run([sys.executable, "-c", probe, "discover", "--csv", csv_path, "--no-cache"],
+                            capture_output=True, text=True, cwd=ROOT, check=True)
+    assert json.loads(result.stderr.strip().splitlines()[-1]) == []
+
+    env = {"DB_BACKEND": "sqlite", "DB_SQLITE_PATH": str(tmp_path / "db.sqlite3"),
+           "WRITE_BEHIND_SPILL_PATH": str(tmp_path / "spill.jsonl"),
+           "FEED_WATERMARKS_PATH": str(tmp_path / "watermarks.json")}
+    episodes = list(read_episodes(result.stdout.splitlines()))
+    transcribed = "".join(
+        encode_episode({**episode, "segments": [{"whisper_segment_id": 0, "start": 0.0, "end": 1.0, "text": "hi"}]})
+        + "\n" for episode in episodes
+    )
+    cli("store", env=env, stdin=transcribed)
+
+    assert cli("dedupe", env=env, stdin=result.stdout) == ""
+
+
+def test_store_stage_does_not_hide_episodes_dropped_upstream(tmp_path):
+    csv_path = write_feeds(tmp_path, ["a"])
+    env = {"DB_BACKEND": "sqlite", "DB_SQLITE_PATH": str(tmp_path / "db.sqlite3"),
+           "WRITE_BEHIND_SPILL_PATH": str(tmp_path / "spill.jsonl"),
+           "FEED_WATERMARKS_PATH": str(tmp_path / "watermarks.json"), "FEED_INITIAL_SINCE": "2023-01-01"}
+    listed = cli("discover", "--csv", csv_path, "--no-cache", "--incremental", env=env)
+    episodes = list(read_episodes(listed.splitlines()))
+    assert [episode["title"] for episode in episodes] == ["a 0", "a 1", "a 2", "a 3"]
+
+    # only the newest episode survives download; the older ones failed there
+    newest = {**episodes[0], "segments": [{"whisper_segment_id": 0, "start": 0.0, "end": 1.0, "text": "hi"}]}
+    cli("store", env=env, stdin=encode_episode(newest) + "\n")
+
+    listed = cli("discover", "--csv", csv_path, "--no-cache", "--incremental", env=env)
+    assert [episode["title"] for episode in read_episodes(listed.splitlines())] == ["a 0", "a 1", "a 2", "a 3"]
+    assert cli("dedupe", env=env, stdin=listed) == "".join(line + "\n" for line in listed.splitlines()[1:])
+
+
+def test_backfill_discover_ignores_cached_validators(tmp_path):
+    host = FeedHost(latency=0)
+    try:
+        url = f"{host.url}/show"
+        csv_path = tmp_path / "feeds.csv"
+        csv_path.write_text(f"rss_url\n{url}\n")
+        cache_path = tmp_path / "feed_cache.json"
+        # an earlier incremental run committed the feed's validators
+        cache_path.write_text(json.dumps({url: {"etag": '"v1"', "modified": None}}))
+        env = {"FEED_CACHE_PATH": str(cache_path), "FEED_WATERMARKS_PATH": str(tmp_path / "watermarks.json"),
+               "FEED_INITIAL_SINCE": "2023-01-01"}
+
+        assert cli("discover", "--csv", str(csv_path), "--incremental", env=env) == ""
+        listed = cli("discover", "--csv", str(csv_path), "--year", "2023", env=env)
+        assert [episode["title"] for episode in read_episodes(listed.splitlines())] == ["show 2", "show 3"]
+    finally:
+        host.close()
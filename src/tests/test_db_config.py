@@ -0,0 +1,78 @@
+import mysql.connector
+import pytest
+from src.sql.db_config import ConnectionPool
+
+
+class FakeConnection:
+    """Records how the pool treats a connection."""
+    opened = 0
+
+    def __init__(self):
+        FakeConnection.opened += 1
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise mysql.connector.errors.InterfaceError("connection lost")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(size=2, connect_fn=FakeConnection)
+    first = pool.acquire()
+    raw = first._conn
+    first.close()
+    second = pool.acquire()
+    assert second._conn is raw
+    assert raw.rollbacks == 1
+    second.close()
+
+
+def test_pool_replaces_dead_and_expired_connections():
+    pool = ConnectionPool(size=1, connect_fn=FakeConnection)
+    conn = pool.acquire()
+    dead = conn._conn
+    conn.close()
+    dead.alive = False
+    conn = pool.acquire()
+    assert conn._conn is not dead and dead.closed
+    conn.close()
+
+    pool.recycle_seconds = -1
+    expired = conn._conn
+    conn = pool.acquire()
+    assert conn._conn is not expired and expired.closed
+    conn.close()
+
+
+def test_pool_times_out_when_exhausted():
+    pool = ConnectionPool(size=1, timeout=0.05, connect_fn=FakeConnection)
+    held = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    held.close()
+    pool.acquire().close()
+
+
+def test_sqlite_backend_for_offline_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_SQLITE_PATH", str(tmp_path / "podcasts.sqlite3"))
+    pool = ConnectionPool(size=1)
+    conn = pool.acquire()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO episodes (episode_title) VALUES (%s)", ("Offline",))
+    conn.commit()
+    conn.close()
+
+    conn = pool.acquire()  # pre-pinged and reused
+    cursor = conn.cursor()
+    cursor.execute("SELECT episode_title FROM episodes")
+    assert cursor.fetchall() == [("Offline",)]
+    conn.close()
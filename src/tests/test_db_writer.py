@@ -0,0 +1,75 @@
+import pytest
+from src.sql import db_writer, sqlite_stand_in
+from src.sql.db_writer import (
+    existing_audio_urls,
+    filter_new_episodes,
+    insert_episode,
+    insert_transcript_segments,
+)
+
+
+def make_episode(i: int) -> dict:
+    return {
+        "title": f"Episode {i}",
+        "feed_title": "Test Podcast",
+        "description": "Test description",
+        "summary": "Short summary",
+        "rss_url": "https://example.com/rss",
+        "audio_url": f"https://example.com/{i}.mp3",
+        "episode_link": f"https://example.com/ep{i}",
+        "published": "2024-01-01 00:00:00",
+    }
+
+
+def test_filter_new_episodes_uses_batched_lookups():
+    conn = sqlite_stand_in.connect()
+    cursor = conn.cursor()
+    for i in range(0, 10, 2):
+        insert_episode(cursor, make_episode(i))
+    conn.commit()
+
+    candidates = [make_episode(i) for i in range(10)] + [make_episode(1)]
+    cursor.round_trips = 0
+    new_episodes = filter_new_episodes(cursor, candidates)
+
+    assert [ep["title"] for ep in new_episodes] == [f"Episode {i}" for i in range(1, 10, 2)]
+    assert cursor.round_trips == 1
+    conn.close()
+
+
+def test_existing_audio_urls_splits_batches():
+    conn = sqlite_stand_in.connect()
+    cursor = conn.cursor()
+    for i in range(5):
+        insert_episode(cursor, make_episode(i))
+    urls = [f"https://example.com/{i}.mp3" for i in range(8)]
+
+    cursor.round_trips = 0
+    existing = existing_audio_urls(cursor, urls, batch_size=3)
+
+    assert existing == set(urls[:5])
+    assert cursor.round_trips == 3
+    conn.close()
+
+
+def test_insert_transcript_segments_batches_rows():
+    conn = sqlite_stand_in.connect()
+    cursor = conn.cursor()
+    episode_id = insert_episode(cursor, make_episode(0))
+    segments = [{"whisper_segment_id": i, "start": float(i), "end": i + 1.0, "text": f"s{i}"} for i in range(25)]
+
+    cursor.round_trips = 0
+    rows = insert_transcript_segments(cursor, episode_id, segments, batch_size=10)
+
+    assert rows == 25
+    assert cursor.round_trips == 3
+    cursor.execute("SELECT COUNT(*) FROM transcript_segments WHERE episode_id = %s", (episode_id,))
+    assert cursor.fetchone()[0] == 25
+    conn.close()
+
+
+def test_store_episode_data_is_a_deprecated_alias():
+    pipeline = pytest.importorskip("pipeline")
+
+    with pytest.warns(DeprecationWarning, match="pipeline.store_episode_data"):
+        assert db_writer.store_episode_data is pipeline.store_episode_data
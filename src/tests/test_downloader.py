@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.downloader import AudioDownloader, PART_SUFFIX
+
+AUDIO = os.urandom(3 * 1024 * 1024 + 17)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves AUDIO at every path, honouring 'Range: bytes=N-' requests."""
+    delay = 0.0
+    requests_seen: list = []
+
+    def do_GET(self):
+        RangeHandler.requests_seen.append(self.headers.get("Range"))
+        time.sleep(self.delay)
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(AUDIO):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(AUDIO)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(AUDIO) - 1}/{len(AUDIO)}")
+        else:
+            self.send_response(200)
+        body = AUDIO[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def test_download_writes_complete_file(tmp_path):
+    server, base_url = start_server()
+    try:
+        target = str(tmp_path / "episode.mp3")
+        path = AudioDownloader().download(f"{base_url}/episode.mp3", target)
+        assert path == target
+        with open(path, "rb") as f:
+            assert f.read() == AUDIO
+        assert not os.path.exists(target + PART_SUFFIX)
+    finally:
+        server.shutdown()
+
+
+def test_download_resumes_partial_file(tmp_path):
+    server, base_url = start_server()
+    RangeHandler.requests_seen = []
+    try:
+        target = str(tmp_path / "episode.mp3")
+        with open(target + PART_SUFFIX, "wb") as f:
+            f.write(AUDIO[:1000])
+        AudioDownloader().download(f"{base_url}/episode.mp3", target)
+        assert RangeHandler.requests_seen == ["bytes=1000-"]
+        with open(target, "rb") as f:
+            assert f.read() == AUDIO
+    finally:
+        server.shutdown()
+
+
+def test_download_many_runs_concurrently(tmp_path):
+    server, base_url = start_server()
+    RangeHandler.delay = 0.3
+    try:
+        items = [(f"{base_url}/{i}.mp3", str(tmp_path / f"{i}.mp3")) for i in range(4)]
+        started = time.perf_counter()
+        paths = AudioDownloader(max_workers=4).download_many(items)
+        elapsed = time.perf_counter() - started
+        assert paths == [filename for _, filename in items]
+        assert all(os.path.getsize(p) == len(AUDIO) for p in paths)
+        assert elapsed < 4 * RangeHandler.delay
+    finally:
+        RangeHandler.delay = 0.0
+        server.shutdown()
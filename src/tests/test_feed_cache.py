@@ -0,0 +1,124 @@
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.feed_cache import FeedCache
+from src.podcast_rss_reader import PodcastRSSFeedReader
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Test Podcast</title>
+<item><title>Episode 1</title><pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate>
+<enclosure url="http://example.com/1.mp3" type="audio/mpeg" length="1"/></item>
+</channel></rss>"""
+ETAG = '"v1"'
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """Serves FEED with an ETag and answers 304 when the client already has it."""
+
+    feed = FEED
+    requests = 0
+
+    def do_GET(self):
+        ConditionalHandler.requests += 1
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(self.feed)))
+        self.end_headers()
+        self.wfile.write(self.feed)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_conditional_fetch_short_circuits(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ConditionalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rss_url = f"http://127.0.0.1:{server.server_port}/feed.rss"
+    try:
+        cache = FeedCache(str(tmp_path / "feed_cache.json"))
+        first = PodcastRSSFeedReader(rss_url, cache=cache)
+        assert len(first.get_episodes(filter_by_year=2024)) == 1
+        # the run stored every episode of the feed
+        cache.commit(rss_url)
+
+        # a fresh cache object re-reads the validators persisted by the first run
+        cache = FeedCache(str(tmp_path / "feed_cache.json"))
+        second = PodcastRSSFeedReader(rss_url, cache=cache)
+        assert second.not_modified
+        assert second.get_episodes(filter_by_year=2024) == []
+        assert cache.stats() == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+    finally:
+        server.shutdown()
+
+
+def test_failed_run_does_not_keep_validators(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ConditionalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rss_url = f"http://127.0.0.1:{server.server_port}/feed.rss"
+    try:
+        for streaming in (False, True):
+            path = str(tmp_path / f"feed_cache_{streaming}.json")
+            # the first run fetches the feed, then fails before storing its episode
+            first = PodcastRSSFeedReader(rss_url, cache=FeedCache(path), streaming=streaming)
+            assert len(first.get_episodes(filter_by_year=2024)) == 1
+
+            # so the next run is not answered with a 304 and still sees the episode
+            cache = FeedCache(path)
+            second = PodcastRSSFeedReader(rss_url, cache=cache, streaming=streaming)
+            assert len(second.get_episodes(filter_by_year=2024)) == 1
+            assert not second.not_modified
+            cache.commit(rss_url)
+
+            third = PodcastRSSFeedReader(rss_url, cache=FeedCache(path), streaming=streaming)
+            assert third.get_episodes(filter_by_year=2024) == []
+            assert third.not_modified
+    finally:
+        server.shutdown()
+
+
+def serve(feed: bytes):
+    ConditionalHandler.feed = feed
+    ConditionalHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ConditionalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/feed.rss"
+
+
+def test_streaming_fallback_reparses_the_download(tmp_path):
+    # well-formed for feedparser, but &nbsp; is not an XML entity
+    server, rss_url = serve(FEED.replace(b"Episode 1", b"Episode&nbsp;1"))
+    try:
+        cache = FeedCache(str(tmp_path / "feed_cache.json"))
+        episodes = PodcastRSSFeedReader(rss_url, cache=cache, streaming=True).get_episodes(filter_by_year=2024)
+
+        assert [episode["title"] for episode in episodes] == ["Episode\xa01"]
+        assert ConditionalHandler.requests == 1
+        # the document was parsed, so its validators count
+        cache.commit(rss_url)
+        assert cache.validators(rss_url)["etag"] == ETAG
+    finally:
+        server.shutdown()
+        ConditionalHandler.feed = FEED
+
+
+def test_unparseable_document_does_not_record_validators(tmp_path):
+    # e.g. an error page served with a 200
+    server, rss_url = serve(b"Service temporarily unavailable")
+    try:
+        cache = FeedCache(str(tmp_path / "feed_cache.json"))
+        reader = PodcastRSSFeedReader(rss_url, cache=cache, streaming=True)
+        with pytest.raises(ET.ParseError):
+            reader.get_episodes()
+
+        cache.commit(rss_url)
+        assert cache.validators(rss_url) == {"etag": None, "modified": None}
+        assert ConditionalHandler.requests == 1
+    finally:
+        server.shutdown()
+        ConditionalHandler.feed = FEED
@@ -0,0 +1,84 @@
+import os
+import time
+from datetime import datetime
+import pytest
+from src.ledger import DISCOVERED, STORED, TRANSCRIBED, LeaseLostError, WorkLedger
+
+SEGMENTS = [{"whisper_segment_id": 0, "start": 0.0, "end": 2.5, "text": "Welcome to the show."}]
+
+
+def make_episode(i: int) -> dict:
+    return {"title": f"Episode {i}", "audio_url": f"https://example.com/{i}.mp3", "published": datetime(2024, 5, i + 1)}
+
+
+def test_resume_from_last_completed_stage(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    audio_path = str(tmp_path / "0.mp3")
+    open(audio_path, "wb").close()
+
+    ledger = WorkLedger(path, owner="node-a", lease_seconds=60)
+    assert ledger.discover([make_episode(0), make_episode(1)]) == 2
+    assert ledger.discover([make_episode(0)]) == 0
+    entry, = ledger.claim()
+    assert entry.stage == DISCOVERED and entry.episode == make_episode(0)
+    ledger.mark_downloaded(entry.audio_url, audio_path)
+    ledger.mark_transcribed(entry.audio_url, SEGMENTS)
+    ledger.release(entry.audio_url, "database unavailable")  # the store failed; the run dies here
+    ledger.close()
+
+    # a restarted run picks the transcribed episode up first and does not redo its transcript
+    ledger = WorkLedger(path, owner="node-a-restarted", lease_seconds=60)
+    entry, = ledger.claim()
+    assert entry.stage == TRANSCRIBED and entry.attempts == 1
+    assert ledger.transcript(entry.audio_url) == SEGMENTS
+    ledger.mark_stored(entry.audio_url)
+    assert not os.path.exists(audio_path)
+    assert ledger.transcript(entry.audio_url) is None
+    assert ledger.stats()[STORED] == 1 and ledger.stats()[DISCOVERED] == 1
+
+
+def test_leases_keep_nodes_apart_until_they_expire(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    node_a = WorkLedger(path, owner="node-a", lease_seconds=60)
+    node_b = WorkLedger(path, owner="node-b", lease_seconds=60)
+    node_a.discover([make_episode(0)])
+    node_b.discover([make_episode(0)])
+
+    entry, = node_a.claim()
+    assert node_b.claim() == []
+    with pytest.raises(LeaseLostError):
+        node_b.mark_downloaded(entry.audio_url, "elsewhere.mp3")
+
+    # node a stalls past its lease; node b takes over and node a's late update is refused
+    node_a.lease_seconds = node_b.lease_seconds = -1
+    node_a.renew(entry.audio_url)
+    taken, = node_b.claim()
+    assert taken.audio_url == entry.audio_url
+    with pytest.raises(LeaseLostError):
+        node_a.mark_transcribed(entry.audio_url, SEGMENTS)
+
+
+def test_claim_skips_episodes_out_of_attempts(tmp_path):
+    ledger = WorkLedger(str(tmp_path / "ledger.sqlite3"), owner="node-a")
+    ledger.discover([make_episode(0)])
+    for _ in range(3):
+        entry, = ledger.claim(max_attempts=3)
+        ledger.release(entry.audio_url, "corrupt audio")
+    assert ledger.claim(max_attempts=3) == []
+
+
+def test_heartbeat_keeps_a_long_stage_leased(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    node_a = WorkLedger(path, owner="node-a", lease_seconds=0.3)
+    node_b = WorkLedger(path, owner="node-b", lease_seconds=0.3)
+    assert node_a._conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    node_a.discover([make_episode(0)])
+    entry, = node_a.claim()
+
+    with node_a.heartbeat(entry.audio_url, interval=0.05):
+        # a transcription running well past the lease
+        time.sleep(1.0)
+        assert node_b.claim() == []
+        node_a.mark_transcribed(entry.audio_url, SEGMENTS)
+    node_a.mark_stored(entry.audio_url)
+    assert node_a.stats()[STORED] == 1
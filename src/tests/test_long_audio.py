@@ -0,0 +1,89 @@
+import os
+import time
+import numpy as np
+import pytest
+from src.long_audio import SAMPLE_RATE, plan_windows, stitch_segments
+
+
+def synthetic_speech(seconds: int, gap_every: float = 7.0, gap_length: float = 0.8) -> np.ndarray:
+    """A 200 Hz tone with a silent gap every gap_every seconds, standing in for speech with pauses."""
+    t = np.arange(seconds * SAMPLE_RATE) / SAMPLE_RATE
+    audio = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+    for start in np.arange(gap_every, seconds, gap_every):
+        audio[int(start * SAMPLE_RATE):int((start + gap_length) * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+def test_windows_cut_in_silence_and_cover_audio():
+    audio = synthetic_speech(300)
+    windows = plan_windows(audio, window_seconds=60, overlap_seconds=2, search_seconds=5)
+
+    assert len(windows) == 5
+    assert windows[0].core_start == 0 and windows[-1].core_end == len(audio)
+    for prev, cur in zip(windows, windows[1:]):
+        assert prev.core_end == cur.core_start
+        assert np.all(audio[cur.core_start - 80:cur.core_start + 80] == 0.0)
+        assert cur.start == cur.core_start - 2 * SAMPLE_RATE
+
+
+def test_stitch_offsets_dedupes_and_renumbers():
+    audio = synthetic_speech(120)
+    windows = plan_windows(audio, window_seconds=60, overlap_seconds=2, search_seconds=5)
+    assert len(windows) == 2
+
+    # each window reports one segment per 2 s of its own audio, on its own local clock
+    window_segments = []
+    for w in windows:
+        length = (w.end - w.start) / SAMPLE_RATE
+        window_segments.append([
+            {"whisper_segment_id": i, "start": float(s), "end": float(min(s + 2, length)), "text": f"w{s}"}
+            for i, s in enumerate(np.arange(0, length, 2))
+        ])
+
+    stitched = stitch_segments(windows, window_segments)
+
+    assert [seg["whisper_segment_id"] for seg in stitched] == list(range(len(stitched)))
+    assert all(a["end"] <= b["start"] for a, b in zip(stitched, stitched[1:]))
+    assert stitched[0]["start"] == 0.0
+    assert stitched[-1]["end"] == pytest.approx(len(audio) / SAMPLE_RATE, abs=2.0)
+    # the overlap region is transcribed by both windows but kept only once
+    assert len(stitched) < sum(len(segments) for segments in window_segments)
+    assert set(stitched[0]) == {"whisper_segment_id", "start", "end", "text"}
+
+
+def test_parallel_long_audio_speedup(tmp_path):
+    whisper = pytest.importorskip("whisper")
+    from src.audio2text import Audio2Text
+    from src.transcription_pool import TranscriptionPool
+
+    path = str(tmp_path / "long.wav")
+    audio = synthetic_speech(240)
+    import wave
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+    transcriber = Audio2Text(model_size="tiny")
+    started = time.perf_counter()
+    sequential = transcriber.transcribe_long(path, window_seconds=60, delete_file=False)
+    sequential_seconds = time.perf_counter() - started
+
+    pool = TranscriptionPool(workers=4, model_size="tiny")
+    try:
+        pool.transcribe_arrays([whisper.pad_or_trim(audio)])  # start workers and load models
+        started = time.perf_counter()
+        parallel = transcriber.transcribe_long(path, window_seconds=60, pool=pool, delete_file=False)
+        parallel_seconds = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+    print(f"sequential {sequential_seconds:.1f}s, parallel {parallel_seconds:.1f}s, "
+          f"speedup {sequential_seconds / parallel_seconds:.2f}x")
+    for segments in (sequential, parallel):
+        assert [seg["whisper_segment_id"] for seg in segments] == list(range(len(segments)))
+        assert all(a["end"] <= b["start"] for a, b in zip(segments, segments[1:]))
+        assert all(seg["end"] <= len(audio) / SAMPLE_RATE + 1 for seg in segments)
+    if (os.cpu_count() or 1) >= 8:
+        assert parallel_seconds < sequential_seconds
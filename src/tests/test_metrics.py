@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from src.metrics import CountingCursor, Metrics, SamplingProfiler, instrumented, record
+from src.sql import sqlite_stand_in
+
+
+def test_stage_records_times_quantities_and_derived_rates(tmp_path):
+    jsonl_path = str(tmp_path / "metrics.jsonl")
+    metrics = Metrics(jsonl_path=jsonl_path, prometheus_path=str(tmp_path / "metrics.prom"))
+
+    with metrics.stage("whisper", model="tiny") as stage:
+        time.sleep(0.02)
+        stage.record(audio_seconds=1.0, segments=3)
+    metrics.set_gauge("pipeline_queue_depth", 2, queue="downloads")
+    metrics.export()
+
+    event = json.loads(open(jsonl_path).read())
+    assert event["stage"] == "whisper" and event["model"] == "tiny" and event["segments"] == 3
+    assert event["wall"] >= 0.02 and event["cpu"] < event["wall"]
+    assert abs(event["real_time_factor"] - event["wall"]) < 1e-5
+    text = open(tmp_path / "metrics.prom").read()
+    assert 'pipeline_segments_total{model="tiny",stage="whisper"} 3' in text
+    assert 'pipeline_stage_wall_seconds_count{model="tiny",stage="whisper"} 1' in text
+    assert 'pipeline_queue_depth{queue="downloads"} 2' in text
+
+
+def test_instrumented_functions_record_on_the_active_stage(monkeypatch):
+    metrics = Metrics(jsonl_path=None, prometheus_path=None, profile_dir=None)
+    monkeypatch.setattr("src.metrics._default_metrics", metrics)
+
+    @instrumented("download")
+    def download(size):
+        record(bytes=size)
+        return size
+
+    download(100)
+    download(50)
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]['pipeline_bytes_total{stage="download"}'] == 150
+    assert snapshot["summaries"]['pipeline_stage_wall_seconds_count{stage="download"}'] == 2
+    assert 'pipeline_throughput_bytes_per_second{stage="download"}' in snapshot["gauges"]
+
+
+def test_counting_cursor_counts_round_trips():
+    cursor = CountingCursor(sqlite_stand_in.connect().cursor())
+    cursor.execute("SELECT 1")
+    cursor.executemany("INSERT INTO episodes (episode_title) VALUES (%s)", [("a",), ("b",)])
+    assert cursor.round_trips == 2
+    assert cursor.fetchall() == []
+
+
+def test_sampling_profiler_collects_stacks(tmp_path):
+    def busy():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+
+    with SamplingProfiler(interval=0.002) as profiler:
+        busy()
+    path = str(tmp_path / "busy.folded")
+    profiler.write_folded(path)
+
+    assert profiler.samples > 0
+    assert any(stack.endswith("test_metrics.py:busy") for stack, _ in profiler.top())
+    assert os.path.getsize(path) > 0
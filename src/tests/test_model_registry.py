@@ -0,0 +1,70 @@
+import sys
+import threading
+import time
+import types
+import pytest
+from src import model_registry
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replaces whisper with a stub whose load_model is slow and counted."""
+    calls = []
+    lock = threading.Lock()
+
+    def load_model(model_size, device=None):
+        with lock:
+            calls.append((model_size, device))
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+    monkeypatch.setattr(model_registry, "_models", {})
+    return calls
+
+
+def test_concurrent_get_model_loads_once(loads):
+    barrier = threading.Barrier(8)
+    models = []
+
+    def worker():
+        barrier.wait()
+        models.append(model_registry.get_model("tiny", device="cpu"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [("tiny", "cpu")]
+    assert len(models) == 8
+    assert all(model is models[0] for model in models)
+    assert model_registry.loaded_models() == [("tiny", "cpu")]
+
+
+def test_models_are_keyed_by_size_and_device(loads):
+    tiny_cpu = model_registry.get_model("tiny", device="cpu")
+    base_cpu = model_registry.get_model("base", device="cpu")
+    tiny_cuda = model_registry.get_model("tiny", device="cuda")
+
+    assert len({id(tiny_cpu), id(base_cpu), id(tiny_cuda)}) == 3
+    assert model_registry.get_model("tiny", device="cpu") is tiny_cpu
+    assert len(loads) == 3
+
+
+def test_release_evicts_matching_models(loads):
+    first = model_registry.get_model("tiny", device="cpu")
+    model_registry.get_model("base", device="cpu")
+    model_registry.get_model("tiny", device="cuda")
+
+    assert model_registry.release("tiny", device="cpu") == 1
+    assert sorted(model_registry.loaded_models()) == [("base", "cpu"), ("tiny", "cuda")]
+
+    # the next caller loads a fresh model
+    assert model_registry.get_model("tiny", device="cpu") is not first
+    assert loads.count(("tiny", "cpu")) == 2
+
+    assert model_registry.release() == 3
+    assert model_registry.loaded_models() == []
+    assert model_registry.release() == 0
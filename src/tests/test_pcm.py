@@ -0,0 +1,85 @@
+import os
+import sys
+import shutil
+import wave
+import numpy as np
+import pytest
+from src.pcm import PCM_SUFFIX, SAMPLE_RATE, PcmWindow, decode_to_pcm, open_pcm
+
+
+def test_open_pcm_maps_without_copying(tmp_path):
+    path = str(tmp_path / f"episode.mp3{PCM_SUFFIX}")
+    samples = np.linspace(-1, 1, SAMPLE_RATE * 3, dtype=np.float32)
+    samples.tofile(path)
+
+    audio = open_pcm(path)
+    window = PcmWindow(path, SAMPLE_RATE, 2 * SAMPLE_RATE).load()
+
+    assert isinstance(audio, np.memmap)
+    assert np.array_equal(audio, samples)
+    assert np.array_equal(window, samples[SAMPLE_RATE:2 * SAMPLE_RATE])
+    # copy-on-write: in-place edits by a consumer never reach the file
+    audio[:10] = 0
+    assert np.array_equal(open_pcm(path)[:10], samples[:10])
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_decode_to_pcm_streams_16k_mono(tmp_path):
+    source = str(tmp_path / "episode.wav")
+    t = np.arange(SAMPLE_RATE * 2) / SAMPLE_RATE
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+    with wave.open(source, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(tone.tobytes())
+
+    pcm_path = decode_to_pcm(source, delete_source=True)
+
+    audio = open_pcm(pcm_path)
+    assert pcm_path == source + PCM_SUFFIX
+    assert len(audio) == len(tone)
+    assert np.allclose(audio, tone / 32768.0, atol=1e-3)
+    assert not (tmp_path / "episode.wav").exists()
+
+
+FAKE_FFMPEG = """#!{python}
+import sys
+import numpy as np
+# far more diagnostics than a pipe buffer holds, before any samples
+sys.stderr.write("warning: {noise}\\n" * 20000)
+sys.stderr.flush()
+sys.stdout.buffer.write(np.arange({samples}, dtype=np.float32).tobytes())
+sys.exit({status})
+"""
+
+
+def install_fake_ffmpeg(tmp_path, monkeypatch, samples=0, status=0, noise="noisy"):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, samples=samples, status=status, noise=noise))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+
+
+def test_decode_to_pcm_survives_a_chatty_ffmpeg(tmp_path, monkeypatch):
+    install_fake_ffmpeg(tmp_path, monkeypatch, samples=SAMPLE_RATE)
+    source = str(tmp_path / "episode.mp3")
+    open(source, "wb").close()
+
+    pcm_path = decode_to_pcm(source)
+
+    assert np.array_equal(open_pcm(pcm_path), np.arange(SAMPLE_RATE, dtype=np.float32))
+
+
+def test_decode_to_pcm_reports_ffmpeg_errors(tmp_path, monkeypatch):
+    install_fake_ffmpeg(tmp_path, monkeypatch, status=1, noise="invalid data found")
+    source = str(tmp_path / "episode.mp3")
+    open(source, "wb").close()
+
+    with pytest.raises(RuntimeError, match="invalid data found"):
+        decode_to_pcm(source)
+
+    assert not os.path.exists(source + PCM_SUFFIX)
+    assert not os.path.exists(source + PCM_SUFFIX + ".tmp")
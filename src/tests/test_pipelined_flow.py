@@ -0,0 +1,187 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+
+pipeline = pytest.importorskip("pipeline")
+
+from src.feed_cache import FeedCache
+from src.watermarks import FeedWatermarks
+
+RSS_URL = "https://example.com/rss"
+
+
+def make_episodes(n: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "title": f"Episode {i}",
+            "feed_title": "Test Podcast",
+            "rss_url": RSS_URL,
+            "audio_url": f"https://example.com/{i}.mp3",
+            "guid": f"guid-{i}",
+            "published": start + timedelta(days=i),
+        }
+        for i in range(n)
+    ]
+
+
+def index_of(audio: str) -> int:
+    return int(audio.rsplit("/", 1)[-1].split(".")[0])
+
+
+class StubTask:
+    """Stands in for a Prefect task, whether it is submitted or called directly."""
+
+    def __init__(self, submit):
+        self.submit = submit
+
+    def __call__(self, *args):
+        return self.submit(*args).result()
+
+
+class Recorder:
+    """Records what the stubbed stages saw, and how many were outstanding at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.downloads_started = []
+        self.downloads_ahead = []
+        self.stores_in_flight = 0
+        self.max_stores_in_flight = 0
+        self.logged = []
+        self.stored = []
+        self.fetch_use_cache = None
+
+
+@pytest.fixture
+def run_flow(tmp_path, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=16)
+    recorder = Recorder()
+
+    def run(episodes, flow=pipeline.pipelined_audio_pipeline, **kwargs):
+        def download(url):
+            # later episodes finish downloading first, to shuffle completion order
+            time.sleep(0.002 * (len(episodes) - index_of(url)))
+            return f"/spool/{index_of(url)}.mp3"
+
+        def submit_download(url):
+            with recorder.lock:
+                recorder.downloads_started.append(index_of(url))
+            return executor.submit(download, url)
+
+        def submit_transcribe(audio_path, model_size, workers):
+            i = index_of(audio_path)
+            with recorder.lock:
+                recorder.downloads_ahead.append(sum(1 for j in recorder.downloads_started if j > i))
+            return executor.submit(lambda: [{"start": 0.0, "end": 1.0, "text": f"episode {i}"}])
+
+        def store(episode, segments):
+            time.sleep(0.01)
+            with recorder.lock:
+                recorder.stored.append((episode["audio_url"], segments[0]["text"]))
+                recorder.stores_in_flight -= 1
+
+        def submit_store(episode, segments):
+            with recorder.lock:
+                recorder.stores_in_flight += 1
+                recorder.max_stores_in_flight = max(recorder.max_stores_in_flight, recorder.stores_in_flight)
+            return executor.submit(store, episode, segments)
+
+        class Spool:
+            def has_room(self):
+                return True
+
+        monkeypatch.setattr(pipeline, "feed_cache", FeedCache(str(tmp_path / "feed_cache.json")))
+        monkeypatch.setattr(pipeline, "feed_watermarks", FeedWatermarks(str(tmp_path / "watermarks.json")))
+        monkeypatch.setattr(pipeline, "read_rss_csv", lambda path: [RSS_URL])
+        def fetch_all(rss_urls, year, use_cache, since=None, until=None):
+            recorder.fetch_use_cache = use_cache
+            return [episodes]
+
+        monkeypatch.setattr(pipeline, "fetch_all_episodes", fetch_all)
+        monkeypatch.setattr(pipeline, "dedupe_episodes", lambda feed_episodes: list(feed_episodes))
+        monkeypatch.setattr(pipeline, "warm_up_model", lambda model_size: None)
+        monkeypatch.setattr(pipeline, "log_episode_transcript", lambda episode, segments: recorder.logged.append(
+            (episode["audio_url"], segments[0]["text"])))
+        monkeypatch.setattr(pipeline, "get_spool", lambda: Spool())
+        monkeypatch.setattr(pipeline, "download_audio", StubTask(submit_download))
+        monkeypatch.setattr(pipeline, "transcribe_audio", StubTask(submit_transcribe))
+        monkeypatch.setattr(pipeline, "store_episode_data", StubTask(submit_store))
+        monkeypatch.setattr(pipeline, "get_segment_index", lambda: None)
+
+        flow.fn(csv_path="unused.csv", **kwargs)
+        return recorder
+
+    yield run
+    executor.shutdown(wait=True)
+
+
+@pytest.mark.parametrize("prefetch,store_workers", [(1, 1), (2, 2), (3, 2)])
+def test_windows_stay_bounded_and_results_keep_episode_order(run_flow, prefetch, store_workers):
+    episodes = make_episodes(8)
+
+    recorder = run_flow(episodes, prefetch=prefetch, store_workers=store_workers)
+
+    expected = [(episode["audio_url"], f"episode {i}") for i, episode in enumerate(episodes)]
+    assert recorder.logged == expected
+    assert sorted(recorder.stored) == sorted(expected)
+    assert recorder.downloads_started == list(range(len(episodes)))
+    assert max(recorder.downloads_ahead) == prefetch
+    assert recorder.max_stores_in_flight <= store_workers
+    # every episode stored, so the feed's watermark reaches the newest one
+    assert pipeline.feed_watermarks.get(RSS_URL).guid == "guid-7"
+
+
+@pytest.mark.parametrize("window,use_cache", [
+    ({}, True),
+    ({"year": 2024}, False),
+    ({"since": datetime(2023, 1, 1)}, False),
+    ({"until": datetime(2025, 1, 1)}, False),
+])
+def test_backfills_fetch_without_feed_cache_validators(run_flow, window, use_cache):
+    recorder = run_flow(make_episodes(2), **window)
+
+    # a 304 against the last incremental read would hide the whole backfill window
+    assert recorder.fetch_use_cache is use_cache
+
+
+class ReplayingWriter:
+    """A write-behind writer whose spill file held the newest episode, flushed as soon as it opens."""
+
+    replayed = None
+    failing = None
+
+    def __init__(self, on_stored=None):
+        self.on_stored = on_stored
+        self.submitted = []
+        on_stored(self.replayed)
+
+    def pending_audio_urls(self):
+        return set()
+
+    def submit(self, episode, segments):
+        self.submitted.append(episode)
+
+    def close(self):
+        for episode in self.submitted:
+            if episode is not self.failing:
+                self.on_stored(episode)
+
+    def stats(self):
+        return {}
+
+
+@pytest.mark.parametrize("flow", ["audio_pipeline", "pipelined_audio_pipeline"])
+def test_replayed_episodes_do_not_move_the_watermark_past_unstored_ones(run_flow, monkeypatch, flow):
+    episodes = make_episodes(4)
+    monkeypatch.setattr(ReplayingWriter, "replayed", episodes[3])
+    # the oldest episode of this run never commits
+    monkeypatch.setattr(ReplayingWriter, "failing", episodes[0])
+    monkeypatch.setattr(pipeline, "WriteBehindWriter", ReplayingWriter)
+
+    run_flow(episodes, flow=getattr(pipeline, flow), write_behind=True)
+
+    assert pipeline.feed_watermarks.get(RSS_URL) is None
+    assert pipeline.feed_watermarks.pending(RSS_URL) == 1
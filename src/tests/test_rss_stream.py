@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from src.podcast_rss_reader import PodcastRSSFeedReader
+
+
+def write_feed(path, dates, trailer=""):
+    items = "".join(
+        f"<item><title>Episode {i}</title><pubDate>{format_datetime(d)}</pubDate>"
+        f'<enclosure url="https://example.com/{i}.mp3" type="audio/mpeg" length="1"/></item>'
+        for i, d in enumerate(dates)
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<?xml version="1.0"?><rss version="2.0"><channel><title>Test</title>{items}{trailer}')
+        if not trailer:
+            f.write("</channel></rss>")
+
+
+def test_streaming_matches_feedparser(tmp_path):
+    path = str(tmp_path / "feed.rss")
+    write_feed(path, [datetime(2025, 1, 10) - timedelta(days=30 * i) for i in range(30)])
+
+    full = PodcastRSSFeedReader(path).get_episodes(filter_by_year=2024)
+    streamed = PodcastRSSFeedReader(path, streaming=True).get_episodes(filter_by_year=2024)
+
+    assert len(full) == 12
+    assert streamed == full
+
+
+def test_streaming_stops_before_back_catalog(tmp_path):
+    # a broken document after the 2023 items proves the reader never gets that far
+    path = str(tmp_path / "feed.rss")
+    dates = [datetime(2024, 12, 1) - timedelta(days=30 * i) for i in range(20)]
+    write_feed(path, dates, trailer="<item><title>unterminated")
+
+    episodes = PodcastRSSFeedReader(path, streaming=True).get_episodes(filter_by_year=2024)
+
+    assert [ep["published"].year for ep in episodes] == [2024] * 12
+
+
+def test_streaming_reads_unordered_feed_to_the_end(tmp_path):
+    path = str(tmp_path / "feed.rss")
+    dates = [datetime(2024, 6, 1)] + [datetime(2020, 1, 1) + timedelta(days=i) for i in range(10)] + [datetime(2024, 7, 1)]
+    write_feed(path, dates)
+
+    episodes = PodcastRSSFeedReader(path, streaming=True).get_episodes(filter_by_year=2024)
+
+    assert [ep["title"] for ep in episodes] == ["Episode 0", "Episode 11"]
+
+
+def test_streaming_falls_back_on_entities_without_repeating_items(tmp_path):
+    # the first item is well-formed; the second uses an HTML entity XML does not define
+    path = str(tmp_path / "feed.rss")
+    write_feed(path, [datetime(2024, 6, 1), datetime(2024, 5, 1)])
+    with open(path, encoding="utf-8") as f:
+        document = f.read().replace("Episode 1", "Episode&nbsp;1")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(document)
+
+    streamed = PodcastRSSFeedReader(path, streaming=True).get_episodes(filter_by_year=2024)
+
+    assert [ep["title"] for ep in streamed] == ["Episode 0", "Episode\xa01"]
+    assert streamed == PodcastRSSFeedReader(path).get_episodes(filter_by_year=2024)
@@ -0,0 +1,68 @@
+from datetime import datetime
+from src.search import SegmentIndex, boolean_phrase_query
+from src.sql import sqlite_stand_in
+from src.sql.db_writer import insert_episode, insert_transcript_segments
+
+
+def make_episode(i: int, feed: str, published: datetime) -> dict:
+    return {
+        "title": f"Episode {i}",
+        "feed_title": feed,
+        "audio_url": f"https://example.com/{i}.mp3",
+        "published": published,
+    }
+
+
+def make_segments(*texts: str) -> list[dict]:
+    return [
+        {"whisper_segment_id": i, "start": i * 2.0, "end": i * 2.0 + 2.0, "text": text}
+        for i, text in enumerate(texts)
+    ]
+
+
+def build_index(path=None) -> SegmentIndex:
+    conn = sqlite_stand_in.connect()
+    cursor = conn.cursor()
+    index = SegmentIndex(path)
+    episodes = [
+        (make_episode(1, "Politics Daily", datetime(2024, 10, 25)),
+         make_segments("Donald Trump spoke in Ohio.", "Nothing to see here.")),
+        (make_episode(2, "Politics Daily", datetime(2024, 11, 2)),
+         make_segments("Biden and Trump, Donald, debated.", "President Biden responded.")),
+        (make_episode(3, "Sports Hour", datetime(2024, 9, 1)),
+         make_segments("Donald Trump threw the first pitch.")),
+    ]
+    for episode, segments in episodes:
+        episode_id = insert_episode(cursor, episode, index=index)
+        insert_transcript_segments(cursor, episode_id, segments, index=index)
+    conn.commit()
+    conn.close()
+    return index
+
+
+def test_phrase_search_time_window_and_feed_counts():
+    index = build_index()
+    window = {"start": datetime(2024, 10, 22), "end": datetime(2024, 11, 20)}
+
+    assert index.search("donald trump") == [(3, 0), (1, 0)]
+    assert index.search("Donald Trump", **window) == [(1, 0)]
+    # words in the wrong order are not the phrase
+    assert index.search("trump donald") == [(2, 0)]
+    assert index.search(["trump", "biden"], **window) == [(1, 0), (2, 0), (2, 1)]
+    assert index.count_by_feed(["trump", "biden"]) == {"Politics Daily": 3, "Sports Hour": 1}
+    assert index.search("kamala") == []
+
+
+def test_rolled_back_episode_is_dropped_and_index_persists(tmp_path):
+    path = str(tmp_path / "index.pickle")
+    index = build_index(path)
+    index.remove_episode(3)
+    index.save()
+
+    reloaded = SegmentIndex(path)
+    assert reloaded.search("donald trump") == [(1, 0)]
+    assert reloaded.stats()["episodes"] == 2
+
+
+def test_boolean_phrase_query_quotes_each_phrase():
+    assert boolean_phrase_query(["Donald Trump", 'say "biden"']) == '"donald trump" "say biden"'
@@ -0,0 +1,72 @@
+import os
+from src.spool import SpoolManager
+from src.tests.test_downloader import AUDIO, RangeHandler, start_server
+
+
+def test_same_basename_from_different_feeds_gets_distinct_paths(tmp_path):
+    server, base_url = start_server()
+    RangeHandler.delay = 0.0
+    try:
+        spool = SpoolManager(str(tmp_path / "spool"), max_bytes=10 * len(AUDIO))
+        first = spool.fetch(f"{base_url}/feed-a/audio.mp3")
+        second = spool.fetch(f"{base_url}/feed-b/audio.mp3")
+        assert first != second
+        assert first.endswith("-audio.mp3") and second.endswith("-audio.mp3")
+        assert os.path.getsize(first) == os.path.getsize(second) == len(AUDIO)
+    finally:
+        server.shutdown()
+
+
+def test_refetch_reuses_file_until_released_and_evicted(tmp_path):
+    server, base_url = start_server()
+    RangeHandler.delay = 0.0
+    RangeHandler.requests_seen = []
+    try:
+        spool = SpoolManager(str(tmp_path / "spool"), max_bytes=3 * len(AUDIO) + 100)
+        first = spool.fetch(f"{base_url}/1.mp3")
+        assert spool.fetch(f"{base_url}/1.mp3") == first
+        assert len(RangeHandler.requests_seen) == 1
+        assert spool.stats()["hits"] == 1
+
+        second = spool.fetch(f"{base_url}/2.mp3")
+        third = spool.fetch(f"{base_url}/3.mp3")
+        # all three files are in use: no room to prefetch another
+        assert not spool.has_room()
+
+        spool.release(first)
+        spool.release(third)
+        fourth = spool.fetch(f"{base_url}/4.mp3")
+        # the least recently released file goes first; the unreleased one stays
+        assert not os.path.exists(first)
+        assert os.path.exists(second) and os.path.exists(third) and os.path.exists(fourth)
+        assert spool.stats()["evictions"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_leftovers_from_earlier_runs_are_evictable(tmp_path):
+    directory = tmp_path / "spool"
+    directory.mkdir()
+    (directory / "old.mp3").write_bytes(b"x" * 1000)
+    spool = SpoolManager(str(directory), max_bytes=500)
+    assert spool.has_room() is False
+    spool._make_room(400)
+    assert not (directory / "old.mp3").exists()
+
+
+def test_release_of_a_deleted_file_forgets_it(tmp_path):
+    directory = tmp_path / "spool"
+    directory.mkdir()
+    path = directory / "episode.mp3"
+    path.write_bytes(b"x" * 1000)
+    spool = SpoolManager(str(directory), max_bytes=5000)
+    spool.release(str(path))
+    assert spool.stats()["evictable"] == 1
+
+    # the transcriber deleted it after a later fetch handed it out again
+    path.unlink()
+    spool.release(str(path))
+
+    assert spool.stats()["evictable"] == 0
+    spool._make_room(4500)
+    assert spool.stats()["evictions"] == 0
@@ -0,0 +1,80 @@
+import os
+from src.transcript_cache import TranscriptCache
+
+SEGMENTS = [{"whisper_segment_id": 0, "start": 0.0, "end": 2.5, "text": "Welcome to the show."}]
+
+
+def write_audio(path, content: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_identical_audio_is_transcribed_once(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    calls = []
+
+    def transcribe(path):
+        calls.append(path)
+        os.remove(path)
+        return SEGMENTS
+
+    # same bytes downloaded under two different names, e.g. via two tracking redirects
+    first = write_audio(tmp_path / "a.mp3", b"ID3 same audio")
+    second = write_audio(tmp_path / "b.mp3", b"ID3 same audio")
+    assert cache.get_or_transcribe(first, "base", transcribe) == SEGMENTS
+    assert cache.get_or_transcribe(second, "base", transcribe) == SEGMENTS
+
+    assert calls == [first]
+    assert not os.path.exists(second)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # a different model size is a different transcript
+    third = write_audio(tmp_path / "c.mp3", b"ID3 same audio")
+    cache.get_or_transcribe(third, "small", transcribe)
+    assert calls == [first, third]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = TranscriptCache(directory, max_bytes=7_000, memory_entries=0)
+    for i in range(3):
+        cache.put(f"base-{i}", SEGMENTS * 40)
+        os.utime(os.path.join(directory, f"base-{i}.tsg"), (i, i))
+    cache.get("base-0")  # touch the oldest entry so it becomes the most recently used
+
+    cache.put("base-3", SEGMENTS * 40)
+
+    remaining = sorted(name for name in os.listdir(directory) if name.endswith(".tsg"))
+    assert "base-1.tsg" not in remaining
+    assert "base-0.tsg" in remaining and "base-3.tsg" in remaining
+    assert cache.stats()["bytes"] <= 7_000
+    # a fresh instance sees the persisted entries
+    assert TranscriptCache(directory).get("base-3") == SEGMENTS * 40
+
+
+def test_vad_and_split_transcripts_are_cached_separately(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    calls = []
+
+    def transcribe(path):
+        calls.append(path)
+        return SEGMENTS
+
+    audio = write_audio(tmp_path / "a.mp3", b"ID3 same audio")
+    for vad, split in [(False, False), (True, False), (False, True), (True, True), (True, False)]:
+        cache.get_or_transcribe(audio, "base", transcribe, delete_file=False, vad=vad, split=split)
+
+    assert len(calls) == 4
+    assert cache.stats()["hits"] == 1
+
+
+def test_truncated_entry_is_a_miss(tmp_path):
+    directory = tmp_path / "cache"
+    cache = TranscriptCache(str(directory), memory_entries=0)
+    cache.put("key", SEGMENTS * 3)
+    path = directory / "key.tsg"
+    path.write_bytes(path.read_bytes()[:-5])
+
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
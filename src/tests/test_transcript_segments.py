@@ -0,0 +1,38 @@
+import pickle
+import pytest
+from src.transcript_segments import TranscriptSegments
+
+SEGMENTS = [
+    {"whisper_segment_id": 0, "start": 0.0, "end": 2.5, "text": "Welcome to the show."},
+    {"whisper_segment_id": 1, "start": 2.5, "end": 4.0, "text": "Grüße aus Köln — 你好!"},
+    {"whisper_segment_id": 2, "start": 4.0, "end": 4.0, "text": ""},
+]
+
+
+def test_rows_behave_like_segment_dicts():
+    segments = TranscriptSegments.from_dicts(SEGMENTS)
+
+    assert len(segments) == 3
+    assert segments[1]["text"] == "Grüße aus Köln — 你好!"
+    assert segments[-1].get("text") == ""
+    assert segments[0].get("missing", "default") == "default"
+    assert [dict(seg.items()) for seg in segments] == SEGMENTS
+    assert segments[1:] == SEGMENTS[1:]
+
+
+def test_binary_round_trip_and_pickle():
+    segments = TranscriptSegments.from_dicts(SEGMENTS)
+
+    assert TranscriptSegments.from_bytes(segments.to_bytes()) == segments
+    restored = pickle.loads(pickle.dumps(segments))
+    assert isinstance(restored, TranscriptSegments)
+    assert restored.to_dicts() == SEGMENTS
+    assert TranscriptSegments.from_bytes(TranscriptSegments().to_bytes()) == []
+
+
+@pytest.mark.parametrize("cut", [1, 10, 40, 100])
+def test_truncated_bytes_are_rejected(cut):
+    data = TranscriptSegments.from_dicts(SEGMENTS).to_bytes()
+
+    with pytest.raises(ValueError):
+        TranscriptSegments.from_bytes(data[:len(data) - cut])
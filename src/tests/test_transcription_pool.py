@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pytest
+from src import transcription_pool
+from src.transcription_pool import TranscriptionPool
+
+
+DURATIONS = {"short.mp3": 60.0, "long.mp3": 3600.0, "medium.mp3": 900.0}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A pool whose workers are one in-process thread, so jobs run in dispatch order without Whisper."""
+    executors = []
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+                executors.append(self._executor)
+            return self._executor
+
+    monkeypatch.setattr(TranscriptionPool, "_get_executor", get_executor)
+    monkeypatch.setattr(transcription_pool, "estimate_duration", DURATIONS.get)
+    pool = TranscriptionPool(workers=1, max_restarts=2)
+    pool.executors = executors
+    yield pool
+    pool.shutdown()
+
+
+def stub_job(calls, crash=lambda audio: False):
+    def job(audio, delete_file):
+        name = f"array{len(audio)}" if isinstance(audio, np.ndarray) else audio
+        calls.append(name)
+        if crash(name):
+            raise BrokenProcessPool("worker died")
+        return [{"start": 0.0, "end": 1.0, "text": name}]
+    return job
+
+
+def test_transcribe_many_dispatches_longest_first_and_keeps_input_order(pool, monkeypatch):
+    calls = []
+    monkeypatch.setattr(transcription_pool, "_transcribe_job", stub_job(calls))
+
+    results = pool.transcribe_many(["short.mp3", "long.mp3", "medium.mp3", "short.mp3"])
+
+    assert calls == ["long.mp3", "medium.mp3", "short.mp3"]
+    assert [segments[0]["text"] for segments in results] == ["short.mp3", "long.mp3", "medium.mp3", "short.mp3"]
+
+
+def test_transcribe_arrays_dispatches_longest_first_and_keeps_input_order(pool, monkeypatch):
+    calls = []
+    monkeypatch.setattr(transcription_pool, "_transcribe_job", stub_job(calls))
+
+    results = pool.transcribe_arrays([np.zeros(10), np.zeros(30), np.zeros(20)])
+
+    assert calls == ["array30", "array20", "array10"]
+    assert [segments[0]["text"] for segments in results] == ["array10", "array30", "array20"]
+
+
+def test_crashed_pool_is_restarted_for_unfinished_jobs_only(pool, monkeypatch):
+    calls = []
+    crashed = set()
+
+    def crash_once(name):
+        if name == "medium.mp3" and name not in crashed:
+            crashed.add(name)
+            return True
+        return False
+
+    monkeypatch.setattr(transcription_pool, "_transcribe_job", stub_job(calls, crash_once))
+
+    results = pool.transcribe_many(["short.mp3", "long.mp3", "medium.mp3"])
+
+    assert [segments[0]["text"] for segments in results] == ["short.mp3", "long.mp3", "medium.mp3"]
+    assert len(pool.executors) == 2
+    # only the job lost in the crash is run again
+    assert calls == ["long.mp3", "medium.mp3", "short.mp3", "medium.mp3"]
+
+
+def test_pool_gives_up_after_max_restarts(pool, monkeypatch):
+    calls = []
+    monkeypatch.setattr(transcription_pool, "_transcribe_job", stub_job(calls, lambda name: name == "long.mp3"))
+
+    with pytest.raises(RuntimeError, match="crashed 3 times"):
+        pool.transcribe_many(["short.mp3", "long.mp3"])
+
+    assert calls.count("long.mp3") == 3
+    assert calls.count("short.mp3") == 1
+    assert len(pool.executors) == 3
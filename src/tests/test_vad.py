@@ -0,0 +1,67 @@
+import numpy as np
+from src.vad import SAMPLE_RATE, VoiceActivityDetector, restore_segment_times, to_original_time
+
+rng = np.random.default_rng(0)
+
+
+def voiced(seconds: float) -> np.ndarray:
+    """A 140 Hz harmonic series shaped by three formants and a 4 Hz syllable envelope, standing in for speech."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = np.zeros_like(t)
+    for k in range(1, 28):
+        weight = 0.2 + sum(np.exp(-((k * 140 - formant) / 250) ** 2) for formant in (500, 1500, 2500))
+        audio += weight * np.sin(2 * np.pi * k * 140 * t)
+    return (0.05 * audio * 0.5 * (1 + np.sin(2 * np.pi * 4 * t))).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return rng.normal(0, 1e-4, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def noise(seconds: float) -> np.ndarray:
+    return rng.normal(0, 0.1, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def bass_bed(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 55 * t) + 0.2 * np.sin(2 * np.pi * 110 * t)).astype(np.float32)
+
+
+def test_detects_speech_and_rejects_noise_and_music():
+    audio = np.concatenate([silence(10), voiced(5), silence(10), noise(5), bass_bed(5), silence(5), voiced(3)])
+    regions = VoiceActivityDetector(pad_seconds=0.3).detect(audio)
+
+    assert [(r.start / SAMPLE_RATE, r.end / SAMPLE_RATE) for r in regions] == [(9.7, 15.3), (39.7, 43.0)]
+
+
+def test_compact_maps_times_back_to_episode():
+    audio = np.concatenate([silence(10), voiced(5), silence(20), voiced(3)])
+    vad = VoiceActivityDetector(pad_seconds=0.3, gap_seconds=0.3)
+    compacted, spans, skipped = vad.compact(audio)
+
+    assert len(compacted) == int((5.6 + 0.3 + 3.3) * SAMPLE_RATE)
+    assert abs(skipped - (len(audio) / SAMPLE_RATE - 8.9)) < 1e-6
+    assert to_original_time(0.5, spans) == 10.2
+    # inside the inserted gap: clamped to the end of the first region
+    assert to_original_time(5.7, spans) == 15.3
+    assert to_original_time(6.0, spans) == 34.8
+
+    segments = [{"id": 0, "start": 0.3, "end": 5.3, "text": "one"}, {"id": 1, "start": 5.9, "end": 9.0, "text": "two"}]
+    restored = restore_segment_times(segments, spans)
+    assert [(s["start"], s["end"], s["text"]) for s in restored] == [(10.0, 15.0, "one"), (34.7, 37.8, "two")]
+    assert segments[0]["start"] == 0.3
+
+
+def test_mostly_speech_is_left_whole():
+    audio = np.concatenate([voiced(10), silence(2), voiced(10)])
+    compacted, spans, skipped = VoiceActivityDetector(min_skip_seconds=5).compact(audio)
+
+    assert compacted is audio and skipped == 0.0
+    assert to_original_time(12.5, spans) == 12.5
+
+
+def test_no_speech_compacts_to_nothing():
+    compacted, spans, skipped = VoiceActivityDetector().compact(np.concatenate([silence(10), noise(10)]))
+
+    assert len(compacted) == 0 and spans == []
+    assert skipped == 20.0
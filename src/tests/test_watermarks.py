@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from src.podcast_rss_reader import PodcastRSSFeedReader
+from src.tests.test_rss_stream import write_feed
+from src.watermarks import FeedWatermarks, Watermark
+
+FEED = "https://example.com/feed.rss"
+
+
+def episode(day: int) -> dict:
+    return {"rss_url": FEED, "audio_url": f"https://example.com/{day}.mp3",
+            "published": datetime(2024, 1, day), "guid": f"guid-{day}"}
+
+
+def test_watermark_only_passes_stored_episodes(tmp_path):
+    path = str(tmp_path / "watermarks.json")
+    watermarks = FeedWatermarks(path)
+    found = [episode(day) for day in (1, 2, 3, 4)]
+    # day 1 is already in the database; the rest still have to be stored
+    watermarks.begin(FEED, found, found[1:])
+    assert watermarks.get(FEED) == Watermark(datetime(2024, 1, 1), "guid-1")
+
+    # day 4 commits first, but day 2 is still pending, so the watermark must not pass it
+    watermarks.mark_stored(found[3])
+    assert watermarks.get(FEED).published == datetime(2024, 1, 1)
+    watermarks.mark_stored(found[1])
+    assert watermarks.get(FEED).published == datetime(2024, 1, 2)
+    watermarks.mark_stored(found[2])
+    assert watermarks.get(FEED) == Watermark(datetime(2024, 1, 4), "guid-4")
+
+    reloaded = FeedWatermarks(path)
+    assert reloaded.get(FEED) == Watermark(datetime(2024, 1, 4), "guid-4")
+    assert reloaded.since([FEED, "other"], default=datetime(2024, 1, 1)) == {
+        FEED: Watermark(datetime(2024, 1, 4), "guid-4"), "other": datetime(2024, 1, 1),
+    }
+
+
+def test_reader_reads_past_watermark_or_date_range(tmp_path):
+    path = str(tmp_path / "feed.rss")
+    dates = [datetime(2024, 12, 1) - timedelta(days=30 * i) for i in range(20)]
+    # a broken document after the first items proves a streaming read stops at the watermark
+    write_feed(path, dates, trailer="<item><title>unterminated")
+    mark = Watermark(dates[3], "https://example.com/3.mp3")
+
+    streamed = PodcastRSSFeedReader(path, streaming=True).get_episodes(since=mark)
+    assert [ep["title"] for ep in streamed] == ["Episode 0", "Episode 1", "Episode 2"]
+    assert streamed[0]["guid"] == "https://example.com/0.mp3"
+
+    write_feed(path, dates)
+    backfill = PodcastRSSFeedReader(path).get_episodes(since=datetime(2024, 1, 1), until=datetime(2024, 4, 1))
+    assert [ep["published"].month for ep in backfill] == [3, 2, 1]
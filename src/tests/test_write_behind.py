@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from src.sql import sqlite_stand_in
+from src.sql.db_writer import insert_episode
+from src.sql.write_behind import WriteBehindWriter
+
+
+def make_episode(i: int) -> dict:
+    return {
+        "title": f"Episode {i}",
+        "feed_title": "Test Podcast",
+        "rss_url": "https://example.com/rss",
+        "audio_url": f"https://example.com/{i}.mp3",
+        "published": "2024-01-01 00:00:00",
+    }
+
+
+def make_segments(n: int) -> list:
+    return [{"whisper_segment_id": i, "start": float(i), "end": i + 1.0, "text": f"s{i}"} for i in range(n)]
+
+
+def sqlite_connection(path: str):
+    @contextmanager
+    def connection():
+        conn = sqlite_stand_in.connect(path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return connection
+
+
+@contextmanager
+def unreachable():
+    raise ConnectionError("database unreachable")
+    yield
+
+
+def stored(db_path: str):
+    conn = sqlite_stand_in.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT audio_url FROM episodes ORDER BY episode_id")
+    urls = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT COUNT(*) FROM transcript_segments")
+    segments = cursor.fetchone()[0]
+    conn.close()
+    return urls, segments
+
+
+def test_coalesces_episodes_into_one_transaction(tmp_path):
+    db_path = str(tmp_path / "db.sqlite3")
+    conn = sqlite_stand_in.connect(db_path)
+    insert_episode(conn.cursor(), make_episode(0))
+    conn.commit()
+    conn.close()
+
+    writer = WriteBehindWriter(str(tmp_path / "spill.jsonl"), max_batch=5, max_delay=60,
+                               connection=sqlite_connection(db_path))
+    for i in range(5):
+        writer.submit(make_episode(i), make_segments(3))
+    assert writer.flush(timeout=10)
+    writer.close()
+
+    assert stored(db_path) == ([f"https://example.com/{i}.mp3" for i in range(5)], 12)
+    stats = writer.stats()
+    assert (stats["commits"], stats["flushed"], stats["skipped"], stats["backlog"]) == (1, 4, 1, 0)
+    assert (tmp_path / "spill.jsonl").read_text() == ""
+
+
+def test_bad_episode_is_rolled_back_alone_and_set_aside(tmp_path):
+    db_path = str(tmp_path / "db.sqlite3")
+    writer = WriteBehindWriter(str(tmp_path / "spill.jsonl"), max_batch=10, max_delay=60, max_attempts=1,
+                               connection=sqlite_connection(db_path))
+    bad = {**make_episode(1), "title": ["not", "a", "string"]}
+    for episode in (make_episode(0), bad, make_episode(2)):
+        writer.submit(episode, make_segments(2))
+    writer.flush(timeout=10)
+    writer.close()
+
+    assert stored(db_path) == (["https://example.com/0.mp3", "https://example.com/2.mp3"], 4)
+    assert writer.stats()["failed"] == 1
+    assert "https://example.com/1.mp3" in (tmp_path / "spill.jsonl.failed").read_text()
+
+
+def test_buffered_episodes_survive_an_outage(tmp_path):
+    db_path = str(tmp_path / "db.sqlite3")
+    spill = str(tmp_path / "spill.jsonl")
+    writer = WriteBehindWriter(spill, max_batch=10, max_delay=60, retry_delay=0.01, connection=unreachable)
+    for i in range(3):
+        writer.submit(make_episode(i), make_segments(2))
+    assert not writer.flush(timeout=10)
+    assert "unreachable" in writer.stats()["last_error"]
+    writer.close()
+
+    recovered = WriteBehindWriter(spill, max_batch=10, max_delay=60, connection=sqlite_connection(db_path))
+    assert recovered.pending_audio_urls() == {f"https://example.com/{i}.mp3" for i in range(3)}
+    recovered.close()
+
+    assert stored(db_path) == ([f"https://example.com/{i}.mp3" for i in range(3)], 6)
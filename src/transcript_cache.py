@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
+from src.transcript_segments import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", ".transcript_cache")
+DEFAULT_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", 1024 ** 3))
+CACHE_SUFFIX = ".tsg"
+
+
+def audio_fingerprint(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Computes the SHA-256 of an audio file's contents.
+
+    Args:
+        path (str): Path to the audio file.
+        chunk_size (int): Number of bytes hashed per read.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    Size-bounded transcript store keyed by audio content hash and transcription settings.
+
+    The settings are the Whisper model size and whether voice activity detection
+    and split-and-stitch were used, since each changes the transcript. (Tuning
+    through VAD_PAD_SECONDS and the like is not part of the key.)
+
+    The same MP3 reached through a different tracking redirect or query string
+    hashes to the same key, so it is never transcribed twice. Entries live on disk
+    in the compact TranscriptSegments binary form, evicted least-recently-used first once the directory exceeds
+    max_bytes; recently used entries are also held in memory.
+
+    Attributes:
+        directory (str): Directory holding the cache files.
+        max_bytes (int): Maximum total size of the cache files.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that required a transcription.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, memory_entries: int = 64):
+        """
+        Initializes the cache, creating its directory if needed.
+
+        Args:
+            directory (str): Directory holding the cache files.
+            max_bytes (int): Maximum total size of the cache files.
+            memory_entries (int): Number of recently used transcripts also kept in memory.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, TranscriptSegments]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(CACHE_SUFFIX)
+        )
+
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{CACHE_SUFFIX}")
+
+
+    @staticmethod
+    def key(fingerprint: str, model_size: str, vad: bool = False, split: bool = False) -> str:
+        """
+        Builds the cache key for an audio fingerprint and the settings of its transcription.
+
+        Args:
+            fingerprint (str): The audio content hash.
+            model_size (str): The Whisper model size the transcript was made with.
+            vad (bool): Non-speech audio was removed before the model ran.
+            split (bool): Long audio was transcribed in pieces and stitched together.
+
+        Returns:
+            str: The cache key, e.g. 'base-vad-<hash>'.
+        """
+        return "-".join([model_size] + ["vad"] * vad + ["split"] * split + [fingerprint])
+
+
+    def get(self, key: str) -> Optional[TranscriptSegments]:
+        """
+        Looks up a transcript, counting a hit or a miss.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            TranscriptSegments, optional: The cached segments, or None on a miss.
+        """
+        with self._lock:
+            segments = self._memory.get(key)
+            if segments is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return segments
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                segments = TranscriptSegments.from_bytes(f.read())
+            os.utime(path)  # mark as recently used for LRU eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, segments)
+        return segments
+
+
+    def put(self, key: str, segments: Union[TranscriptSegments, List[Dict]]):
+        """
+        Stores a transcript, evicting least-recently-used entries if the cache is over budget.
+
+        Args:
+            key (str): The cache key.
+            segments (TranscriptSegments or List[Dict]): The transcript segments.
+        """
+        segments = TranscriptSegments.from_dicts(segments)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(segments.to_bytes())
+        size = os.path.getsize(tmp_path)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes += size - old_size
+            self._remember(key, segments)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+
+    def _remember(self, key: str, segments: TranscriptSegments):
+        """Adds an entry to the in-memory LRU. Caller holds the lock."""
+        self._memory[key] = segments
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+    def _evict(self):
+        """Deletes the least recently used files until the cache fits its budget. Caller holds the lock."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(CACHE_SUFFIX)),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self._total_bytes -= size
+            self._memory.pop(entry.name[:-len(CACHE_SUFFIX)], None)
+            logger.info("Evicted cached transcript %s (%d bytes)", entry.name, size)
+
+
+    def get_or_transcribe(
+        self,
+        audio_path: str,
+        model_size: str,
+        transcribe: Callable[[str], Union[TranscriptSegments, List[Dict]]],
+        delete_file: bool = True,
+        vad: bool = False,
+        split: bool = False,
+    ) -> TranscriptSegments:
+        """
+        Returns the cached transcript of an audio file, transcribing it only on a miss.
+
+        Args:
+            audio_path (str): Path to the downloaded audio file.
+            model_size (str): The Whisper model size used by transcribe.
+            transcribe (Callable): Transcribes the file (and deletes it if it should).
+            delete_file (bool): On a hit, delete the audio file just as a transcription would have.
+            vad (bool): transcribe removes non-speech audio first.
+            split (bool): transcribe splits long audio into pieces.
+
+        Returns:
+            TranscriptSegments: The transcript segments.
+        """
+        key = self.key(audio_fingerprint(audio_path), model_size, vad=vad, split=split)
+        segments = self.get(key)
+        if segments is not None:
+            if delete_file and os.path.exists(audio_path):
+                os.remove(audio_path)
+            return segments
+        segments = TranscriptSegments.from_dicts(transcribe(audio_path))
+        self.put(key, segments)
+        return segments
+
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns cache statistics for this process.
+
+        Returns:
+            dict: A dictionary containing:
+                - hits (int): Lookups answered from the cache.
+                - misses (int): Lookups that required a transcription.
+                - hit_rate (float): hits / (hits + misses), or 0.0 if nothing was looked up.
+                - bytes (int): Total size of the cache files.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self._total_bytes,
+        }
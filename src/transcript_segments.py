@@ -0,0 +1,246 @@
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Union, overload
+
+MAGIC = b"TSG1"
+# magic, segment count, text buffer length
+HEADER = struct.Struct("<4sQQ")
+FIELDS = ("whisper_segment_id", "start", "end", "text")
+
+
+class Segment:
+    """
+    A read-only, dict-like view of one row of a TranscriptSegments container.
+
+    Supports segment["text"], segment.get("start"), keys()/items() and comparison
+    with plain dicts, so code written against the list-of-dicts form keeps working.
+    """
+    __slots__ = ("_owner", "_index")
+
+    def __init__(self, owner: "TranscriptSegments", index: int):
+        self._owner = owner
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        owner, i = self._owner, self._index
+        if key == "whisper_segment_id":
+            return owner.ids[i]
+        if key == "start":
+            return owner.starts[i]
+        if key == "end":
+            return owner.ends[i]
+        if key == "text":
+            return owner.text(i)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return FIELDS
+
+    def items(self):
+        return [(key, self[key]) for key in FIELDS]
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __contains__(self, key) -> bool:
+        return key in FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Segment, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+class TranscriptSegments:
+    """
+    Compact, array-backed storage for the utterances of one transcript.
+
+    Ids, start and end times live in typed arrays, and all text lives in one
+    UTF-8 buffer addressed by offsets, instead of one dict (and several boxed
+    objects) per segment. Indexing and iteration yield Segment views that behave
+    like the original utterance dictionaries. Pickling uses the compact binary
+    form from to_bytes, which keeps Prefect task results small.
+
+    Attributes:
+        ids (array): whisper_segment_id per segment.
+        starts (array): Start time per segment, in seconds.
+        ends (array): End time per segment, in seconds.
+    """
+    __slots__ = ("ids", "starts", "ends", "_text", "_offsets")
+
+    def __init__(self):
+        """Initializes an empty container."""
+        self.ids = array("q")
+        self.starts = array("d")
+        self.ends = array("d")
+        self._text = bytearray()
+        self._offsets = array("Q", [0])
+
+
+    @classmethod
+    def from_dicts(cls, segments: Iterable[Dict]) -> "TranscriptSegments":
+        """
+        Builds a container from utterance dictionaries.
+
+        Args:
+            segments (Iterable[Dict]): Dictionaries with whisper_segment_id, start, end and text keys.
+
+        Returns:
+            TranscriptSegments: The container.
+        """
+        if isinstance(segments, TranscriptSegments):
+            return segments
+        container = cls()
+        for seg in segments:
+            container.append(seg["whisper_segment_id"], seg["start"], seg["end"], seg["text"])
+        return container
+
+
+    def append(self, whisper_segment_id: int, start: float, end: float, text: str):
+        """
+        Adds one segment.
+
+        Args:
+            whisper_segment_id (int): Whisper segment identifier.
+            start (float): Start time of the utterance in seconds.
+            end (float): End time of the utterance in seconds.
+            text (str): Transcribed text of the utterance.
+        """
+        self.ids.append(whisper_segment_id)
+        self.starts.append(start)
+        self.ends.append(end)
+        self._text += text.encode("utf-8")
+        self._offsets.append(len(self._text))
+
+
+    def text(self, i: int) -> str:
+        """
+        Returns the text of segment i.
+
+        Args:
+            i (int): Segment index.
+
+        Returns:
+            str: The decoded text.
+        """
+        return self._text[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, i: int) -> Segment: ...
+    @overload
+    def __getitem__(self, i: slice) -> "TranscriptSegments": ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Segment, "TranscriptSegments"]:
+        if isinstance(i, slice):
+            return TranscriptSegments.from_dicts(self[j] for j in range(*i.indices(len(self))))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("segment index out of range")
+        return Segment(self, i)
+
+    def __iter__(self) -> Iterator[Segment]:
+        for i in range(len(self)):
+            yield Segment(self, i)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TranscriptSegments):
+            return (self.ids == other.ids and self.starts == other.starts and self.ends == other.ends
+                    and self._offsets == other._offsets and self._text == other._text)
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TranscriptSegments({len(self)} segments)"
+
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Expands the container back into the list-of-dicts form.
+
+        Returns:
+            List[Dict]: One utterance dictionary per segment.
+        """
+        return [segment.to_dict() for segment in self]
+
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the container into a compact little-endian binary form.
+
+        Returns:
+            bytes: The header, the id/start/end/offset arrays, then the UTF-8 text buffer.
+        """
+        parts = [HEADER.pack(MAGIC, len(self), len(self._text))]
+        for column in (self.ids, self.starts, self.ends, self._offsets):
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        parts.append(bytes(self._text))
+        return b"".join(parts)
+
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TranscriptSegments":
+        """
+        Restores a container serialized by to_bytes.
+
+        Args:
+            data (bytes): The serialized container.
+
+        Returns:
+            TranscriptSegments: The container.
+
+        Raises:
+            ValueError: If data is not a serialized TranscriptSegments, or is truncated.
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("not a serialized TranscriptSegments")
+        magic, count, text_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a serialized TranscriptSegments")
+        container = cls()
+        columns = (("ids", count), ("starts", count), ("ends", count), ("_offsets", count + 1))
+        expected = HEADER.size + text_length + sum(
+            length * array(getattr(container, name).typecode).itemsize for name, length in columns
+        )
+        if len(data) != expected:
+            # e.g. a cache file cut short by a crash
+            raise ValueError(f"serialized TranscriptSegments is {len(data)} bytes, expected {expected}")
+        pos = HEADER.size
+        for name, length in columns:
+            column = array(getattr(container, name).typecode)
+            size = length * column.itemsize
+            column.frombytes(data[pos:pos + size])
+            if sys.byteorder == "big":
+                column.byteswap()
+            setattr(container, name, column)
+            pos += size
+        container._text = bytearray(data[pos:pos + text_length])
+        return container
+
+
+    def __reduce__(self):
+        return (TranscriptSegments.from_bytes, (self.to_bytes(),))
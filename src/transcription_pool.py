@@ -0,0 +1,301 @@
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from typing import Dict, List, Optional, Union
+from src import model_registry
+from src.audio2text import Audio2Text
+from src.pcm import SAMPLE_RATE, PcmWindow, is_pcm_path
+from src.transcript_segments import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+
+# bytes per second of a 128 kbps MP3, used when ffprobe cannot read a duration
+FALLBACK_BYTES_PER_SECOND = 16000
+
+_worker_model_size = 'base'
+_worker_device: Optional[str] = None
+
+
+def _init_worker(model_size: str, device: Optional[str], torch_threads: int):
+    """
+    Runs once in each worker process: pins the torch thread count and loads the model.
+
+    Args:
+        model_size (str): The size of the Whisper model to load.
+        device (str, optional): The torch device to load the model on.
+        torch_threads (int): Number of intra-op threads torch may use in this worker.
+    """
+    global _worker_model_size, _worker_device
+    import torch
+    torch.set_num_threads(torch_threads)
+    _worker_model_size = model_size
+    _worker_device = device
+    model_registry.warm_up(model_size, device)
+
+
+def _transcribe_job(audio: Union[str, np.ndarray, PcmWindow], delete_file: bool) -> TranscriptSegments:
+    """Transcribes one file, waveform or PCM window with the worker's resident model."""
+    return Audio2Text(_worker_model_size, _worker_device).transcribe(audio, delete_file=delete_file)
+
+
+def estimate_duration(audio_path: str) -> float:
+    """
+    Estimates the duration of an audio file in seconds.
+
+    PCM files are sized exactly; otherwise ffprobe is used when available,
+    falling back to the file size at 128 kbps.
+
+    Args:
+        audio_path (str): Path to the audio file.
+
+    Returns:
+        float: The estimated duration in seconds.
+    """
+    if is_pcm_path(audio_path):
+        return os.path.getsize(audio_path) / (4 * SAMPLE_RATE)
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", audio_path],
+            capture_output=True, check=True, timeout=30,
+        ).stdout
+        return float(json.loads(out)["format"]["duration"])
+    except (OSError, subprocess.SubprocessError, KeyError, ValueError):
+        return os.path.getsize(audio_path) / FALLBACK_BYTES_PER_SECOND
+
+
+class TranscriptionPool:
+    """
+    A pool of worker processes, each holding its own resident Whisper model.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        model_size (str): The size of the Whisper model each worker loads.
+        device (str, optional): The torch device each worker uses.
+        threads_per_worker (int): Torch intra-op threads per worker, so workers do not oversubscribe cores.
+        max_restarts (int): Number of times a crashed pool is restarted within one transcribe_many call.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        model_size: str = 'base',
+        device: Optional[str] = None,
+        threads_per_worker: Optional[int] = None,
+        max_restarts: int = 2,
+    ):
+        """
+        Initializes the pool. Worker processes are started on first use.
+
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to cpu_count // threads_per_worker,
+                or cpu_count // 4 if neither is given.
+            model_size (str): The size of the Whisper model each worker loads.
+            device (str, optional): The torch device each worker uses.
+            threads_per_worker (int, optional): Torch threads per worker. Defaults to cpu_count // workers.
+            max_restarts (int): Number of times a crashed pool is restarted within one transcribe_many call.
+        """
+        cpus = os.cpu_count() or 1
+        if workers is None:
+            workers = max(1, cpus // (threads_per_worker or 4))
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, cpus // workers)
+        self.model_size = model_size
+        self.device = device
+        self.max_restarts = max_restarts
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Returns the running executor, starting worker processes if needed."""
+        with self._lock:
+            if self._executor is None:
+                logger.info(
+                    "Starting %d transcription workers (model=%s, %d torch threads each)",
+                    self.workers, self.model_size, self.threads_per_worker,
+                )
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # torch is not fork-safe once initialized, so workers always start from a clean interpreter
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_size, self.device, self.threads_per_worker),
+                )
+            return self._executor
+
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """
+        Discards a broken executor so the next call starts fresh workers.
+
+        Args:
+            broken (ProcessPoolExecutor): The executor that failed. If another caller has
+                already replaced it, the replacement is left running.
+        """
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False)
+
+
+    def submit(self, audio_path: str, delete_file: bool = True) -> "Future[TranscriptSegments]":
+        """
+        Queues one file for transcription.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            delete_file (bool): Delete the file once it has been transcribed.
+
+        Returns:
+            Future[TranscriptSegments]: Resolves to the file's utterances.
+        """
+        return self._get_executor().submit(_transcribe_job, audio_path, delete_file)
+
+
+    def transcribe(self, audio_path: str, delete_file: bool = True) -> TranscriptSegments:
+        """
+        Transcribes one file on the pool, restarting crashed workers.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            delete_file (bool): Delete the file once it has been transcribed.
+
+        Returns:
+            TranscriptSegments: The utterances, as returned by Audio2Text.transcribe.
+        """
+        return self.transcribe_many([audio_path], delete_file=delete_file)[0]
+
+
+    def _run_jobs(self, jobs: List[Union[str, np.ndarray, PcmWindow]], delete_file: bool) -> List[TranscriptSegments]:
+        """
+        Transcribes jobs in the order given, restarting the pool if a worker dies.
+
+        Every unfinished job is resubmitted after a crash, up to max_restarts times.
+
+        Args:
+            jobs (List[str | np.ndarray | PcmWindow]): Audio file paths, 16 kHz waveforms or PCM windows,
+                in dispatch order.
+            delete_file (bool): Delete each file once it has been transcribed.
+
+        Returns:
+            List[TranscriptSegments]: One transcript per job, in the order given.
+
+        Raises:
+            RuntimeError: If the workers keep crashing after max_restarts restarts.
+        """
+        remaining = list(range(len(jobs)))
+        results: Dict[int, TranscriptSegments] = {}
+
+        for attempt in range(self.max_restarts + 1):
+            executor = self._get_executor()
+            futures = {i: executor.submit(_transcribe_job, jobs[i], delete_file) for i in remaining}
+            broken = False
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    broken = True
+            if not broken:
+                break
+            remaining = [i for i in remaining if i not in results]
+            self._restart(executor)
+            if attempt < self.max_restarts:
+                logger.warning(
+                    "Transcription worker crashed; restarting pool for %d unfinished jobs (restart %d of %d)",
+                    len(remaining), attempt + 1, self.max_restarts,
+                )
+        else:
+            raise RuntimeError(f"Transcription workers crashed {self.max_restarts + 1} times; giving up")
+
+        return [results[i] for i in range(len(jobs))]
+
+
+    def transcribe_many(self, audio_paths: List[str], delete_file: bool = True) -> List[TranscriptSegments]:
+        """
+        Transcribes several files, longest first, to minimize the time until all are done.
+
+        Args:
+            audio_paths (List[str]): Paths to the audio files.
+            delete_file (bool): Delete each file once it has been transcribed.
+
+        Returns:
+            List[TranscriptSegments]: One transcript per path, in the order given.
+
+        Raises:
+            RuntimeError: If the workers keep crashing after max_restarts restarts.
+        """
+        unique_paths = list(dict.fromkeys(audio_paths))
+        durations = {path: estimate_duration(path) for path in unique_paths}
+        ordered = sorted(unique_paths, key=lambda path: durations[path], reverse=True)
+        results = dict(zip(ordered, self._run_jobs(ordered, delete_file)))
+        return [results[path] for path in audio_paths]
+
+
+    def transcribe_arrays(self, waveforms: List[Union[np.ndarray, PcmWindow]]) -> List[TranscriptSegments]:
+        """
+        Transcribes several waveforms, longest first.
+
+        In-memory arrays are pickled to the workers; PcmWindows are sent as
+        (path, start, end) and mapped by each worker, so no samples are copied.
+
+        Args:
+            waveforms (List[np.ndarray | PcmWindow]): 16 kHz mono float32 waveforms or PCM windows.
+
+        Returns:
+            List[TranscriptSegments]: One transcript per waveform, in the order given.
+
+        Raises:
+            RuntimeError: If the workers keep crashing after max_restarts restarts.
+        """
+        def length(waveform):
+            return waveform.end - waveform.start if isinstance(waveform, PcmWindow) else len(waveform)
+
+        order = sorted(range(len(waveforms)), key=lambda i: length(waveforms[i]), reverse=True)
+        ordered_results = self._run_jobs([waveforms[i] for i in order], delete_file=False)
+        results = dict(zip(order, ordered_results))
+        return [results[i] for i in range(len(waveforms))]
+
+
+    def shutdown(self):
+        """Stops the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_pools: Dict[tuple, TranscriptionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_transcription_pool(workers: Optional[int] = None, model_size: str = 'base') -> TranscriptionPool:
+    """
+    Returns the process-wide transcription pool for the given worker count and model size.
+
+    Args:
+        workers (int, optional): Number of worker processes.
+        model_size (str): The size of the Whisper model each worker loads.
+
+    Returns:
+        TranscriptionPool: The shared pool.
+    """
+    key = (workers, model_size)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = TranscriptionPool(workers=workers, model_size=model_size)
+        return _pools[key]
+
+
+def shutdown_pools():
+    """Stops every pool created by get_transcription_pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
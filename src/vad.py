@@ -0,0 +1,242 @@
+import os
+import numpy as np
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from src.pcm import FRAME_SAMPLES, SAMPLE_RATE
+
+FFT_SIZE = 512
+SPEECH_BAND = (200.0, 4000.0)
+FULL_BAND = (60.0, 8000.0)
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() in ("1", "true", "yes")
+VAD_PAD_SECONDS = float(os.getenv("VAD_PAD_SECONDS", 0.3))
+VAD_ENERGY_MARGIN_DB = float(os.getenv("VAD_ENERGY_MARGIN_DB", 12.0))
+
+
+class SpeechRegion(NamedTuple):
+    """A [start, end) sample range of a waveform that contains speech."""
+    start: int
+    end: int
+
+
+class TimelineSpan(NamedTuple):
+    """Where one speech region sits in the compacted waveform and in the original one, in samples."""
+    compact_start: int
+    original_start: int
+    length: int
+
+
+class VoiceActivityDetector:
+    """
+    Fast energy and spectral voice activity detection on 16 kHz waveforms.
+
+    Each 20 ms frame counts as speech when it is loud enough relative to the
+    episode's own noise floor, most of its energy lies in the speech band
+    (200-4000 Hz), and its spectrum is not flat like noise. The frame decisions
+    are smoothed into regions: short pauses are bridged, blips are dropped, and
+    every region is padded so word onsets and endings are not clipped.
+
+    Attributes:
+        energy_margin_db (float): How far above the noise floor a frame must be.
+        min_energy_db (float): Absolute floor for the energy threshold, in dBFS.
+        min_band_ratio (float): Minimum share of frame energy in the speech band.
+        max_flatness (float): Maximum spectral flatness (1.0 is white noise).
+        min_speech_seconds (float): Shorter speech runs are dropped.
+        min_silence_seconds (float): Shorter non-speech gaps are bridged.
+        pad_seconds (float): Audio kept on either side of each region.
+        min_skip_seconds (float): If less than this would be skipped, the waveform is left whole.
+        gap_seconds (float): Silence inserted between regions when they are concatenated.
+    """
+
+    def __init__(
+        self,
+        energy_margin_db: float = 12.0,
+        min_energy_db: float = -55.0,
+        min_band_ratio: float = 0.4,
+        max_flatness: float = 0.45,
+        min_speech_seconds: float = 0.3,
+        min_silence_seconds: float = 1.0,
+        pad_seconds: float = 0.3,
+        min_skip_seconds: float = 5.0,
+        gap_seconds: float = 0.3,
+    ):
+        """
+        Initializes the detector; see the class attributes for the parameters.
+        """
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.min_band_ratio = min_band_ratio
+        self.max_flatness = max_flatness
+        self.min_speech_seconds = min_speech_seconds
+        self.min_silence_seconds = min_silence_seconds
+        self.pad_seconds = pad_seconds
+        self.min_skip_seconds = min_skip_seconds
+        self.gap_seconds = gap_seconds
+
+
+    def frame_features(self, audio: np.ndarray, chunk_frames: int = 8192) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Computes per-frame energy (dBFS), speech-band energy ratio and spectral flatness.
+
+        Frames are processed in chunks so an hour-long episode never needs its whole
+        spectrogram in memory.
+
+        Args:
+            audio (np.ndarray): 16 kHz mono waveform.
+            chunk_frames (int): Frames transformed per chunk.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: energy_db, band_ratio and flatness, one value per full frame.
+        """
+        n_frames = len(audio) // FRAME_SAMPLES
+        freqs = np.fft.rfftfreq(FFT_SIZE, 1 / SAMPLE_RATE)
+        speech = (freqs >= SPEECH_BAND[0]) & (freqs <= SPEECH_BAND[1])
+        full = (freqs >= FULL_BAND[0]) & (freqs <= FULL_BAND[1])
+        window = np.hanning(FRAME_SAMPLES).astype(np.float32)
+        energy_db = np.empty(n_frames, dtype=np.float32)
+        band_ratio = np.empty(n_frames, dtype=np.float32)
+        flatness = np.empty(n_frames, dtype=np.float32)
+        for first in range(0, n_frames, chunk_frames):
+            last = min(n_frames, first + chunk_frames)
+            frames = np.asarray(audio[first * FRAME_SAMPLES:last * FRAME_SAMPLES], dtype=np.float32)
+            frames = frames.reshape(last - first, FRAME_SAMPLES)
+            energy_db[first:last] = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+            power = np.abs(np.fft.rfft(frames * window, n=FFT_SIZE, axis=1)) ** 2 + 1e-12
+            full_power = power[:, full]
+            band_ratio[first:last] = power[:, speech].sum(axis=1) / full_power.sum(axis=1)
+            flatness[first:last] = np.exp(np.mean(np.log(full_power), axis=1)) / np.mean(full_power, axis=1)
+        return energy_db, band_ratio, flatness
+
+
+    def detect(self, audio: np.ndarray) -> List[SpeechRegion]:
+        """
+        Finds the speech regions of a waveform.
+
+        Args:
+            audio (np.ndarray): 16 kHz mono waveform.
+
+        Returns:
+            List[SpeechRegion]: Padded, non-overlapping regions in increasing order.
+        """
+        energy_db, band_ratio, flatness = self.frame_features(audio)
+        if len(energy_db) == 0:
+            return []
+        noise_floor = float(np.percentile(energy_db, 10))
+        threshold = max(noise_floor + self.energy_margin_db, self.min_energy_db)
+        speech = (energy_db > threshold) & (band_ratio >= self.min_band_ratio) & (flatness <= self.max_flatness)
+
+        frames_per_second = SAMPLE_RATE / FRAME_SAMPLES
+        runs = _runs(speech)
+        # bridge short pauses, then drop what is still too short to be speech
+        min_gap = self.min_silence_seconds * frames_per_second
+        merged: List[List[int]] = []
+        for start, end in runs:
+            if merged and start - merged[-1][1] < min_gap:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        min_run = self.min_speech_seconds * frames_per_second
+        pad = int(self.pad_seconds * SAMPLE_RATE)
+
+        regions: List[SpeechRegion] = []
+        for start, end in merged:
+            if end - start < min_run:
+                continue
+            start = max(0, start * FRAME_SAMPLES - pad)
+            end = min(len(audio), end * FRAME_SAMPLES + pad)
+            if regions and start <= regions[-1].end:
+                regions[-1] = SpeechRegion(regions[-1].start, end)
+            else:
+                regions.append(SpeechRegion(start, end))
+        return regions
+
+
+    def compact(self, audio: np.ndarray) -> Tuple[np.ndarray, List[TimelineSpan], float]:
+        """
+        Removes non-speech audio, concatenating the speech regions with short silences between them.
+
+        Args:
+            audio (np.ndarray): 16 kHz mono waveform.
+
+        Returns:
+            Tuple[np.ndarray, List[TimelineSpan], float]: The waveform to transcribe, the spans that
+                map its timeline back to the original, and the seconds of audio skipped. If less than
+                min_skip_seconds would be skipped, the original waveform is returned with one span.
+        """
+        regions = self.detect(audio)
+        kept = sum(region.end - region.start for region in regions)
+        skipped = (len(audio) - kept) / SAMPLE_RATE
+        if skipped < self.min_skip_seconds:
+            return audio, [TimelineSpan(0, 0, len(audio))], 0.0
+
+        gap = np.zeros(int(self.gap_seconds * SAMPLE_RATE), dtype=np.float32)
+        pieces, spans, position = [], [], 0
+        for region in regions:
+            if pieces:
+                pieces.append(gap)
+                position += len(gap)
+            pieces.append(np.asarray(audio[region.start:region.end], dtype=np.float32))
+            spans.append(TimelineSpan(position, region.start, region.end - region.start))
+            position += region.end - region.start
+        compacted = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+        return compacted, spans, skipped
+
+
+def to_original_time(seconds: float, spans: List[TimelineSpan]) -> float:
+    """
+    Maps a time in a compacted waveform back to the original waveform.
+
+    Times inside the silence inserted between two regions map to the end of the earlier region.
+
+    Args:
+        seconds (float): Time in the compacted waveform.
+        spans (List[TimelineSpan]): The spans returned by VoiceActivityDetector.compact.
+
+    Returns:
+        float: The corresponding time in the original waveform.
+    """
+    if not spans:
+        return seconds
+    sample = seconds * SAMPLE_RATE
+    index = int(np.searchsorted([span.compact_start for span in spans], sample, side="right")) - 1
+    span = spans[max(index, 0)]
+    offset = min(max(sample - span.compact_start, 0), span.length)
+    return (span.original_start + offset) / SAMPLE_RATE
+
+
+def restore_segment_times(segments: Iterable[Dict], spans: List[TimelineSpan]) -> List[Dict]:
+    """
+    Moves Whisper segments from the compacted timeline back onto the episode's timeline.
+
+    Args:
+        segments (Iterable[Dict]): Segments with 'start' and 'end' in compacted seconds.
+        spans (List[TimelineSpan]): The spans returned by VoiceActivityDetector.compact.
+
+    Returns:
+        List[Dict]: Copies of the segments with 'start' and 'end' in original seconds.
+    """
+    restored = []
+    for seg in segments:
+        seg = dict(seg)
+        seg["start"] = round(to_original_time(seg["start"], spans), 3)
+        seg["end"] = round(max(to_original_time(seg["end"], spans), seg["start"]), 3)
+        restored.append(seg)
+    return restored
+
+
+def get_default_vad() -> Optional[VoiceActivityDetector]:
+    """
+    Returns the detector configured by VAD_ENABLED, VAD_PAD_SECONDS and VAD_ENERGY_MARGIN_DB.
+
+    Returns:
+        VoiceActivityDetector, optional: A detector, or None if VAD_ENABLED is not set.
+    """
+    if not VAD_ENABLED:
+        return None
+    return VoiceActivityDetector(energy_margin_db=VAD_ENERGY_MARGIN_DB, pad_seconds=VAD_PAD_SECONDS)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Returns the [start, end) index ranges where mask is True."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Union
+from src.rss_stream import UNKNOWN_DATE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATERMARKS_PATH = os.getenv("FEED_WATERMARKS_PATH", ".feed_watermarks.json")
+# where feeds without a watermark start; unset means their whole back catalog
+DEFAULT_INITIAL_SINCE = os.getenv("FEED_INITIAL_SINCE", "2024-01-01")
+
+
+class Watermark(NamedTuple):
+    """The newest episode of a feed known to be stored, and everything older with it."""
+    published: datetime
+    guid: Optional[str]
+
+    def precedes(self, published: datetime, guid: Optional[str]) -> bool:
+        """
+        Tells whether an entry is newer than this watermark.
+
+        Entries published at the same moment as the watermark count as newer unless
+        they are the watermark's own entry, so episodes sharing a timestamp are not lost.
+
+        Args:
+            published (datetime): The entry's publication time.
+            guid (str, optional): The entry's GUID.
+
+        Returns:
+            bool: True if the entry should be read.
+        """
+        return published > self.published or (published == self.published and guid != self.guid)
+
+
+# a feed's read window: a watermark (strictly newer entries) or a start date (entries from then on)
+Since = Union[Watermark, datetime]
+
+
+class FeedWatermarks:
+    """
+    On-disk per-feed high-water marks: the last published time and GUID stored for each feed.
+
+    A steady-state run reads only the entries newer than each feed's watermark, so
+    fetching, dedupe lookups and everything downstream scale with the number of new
+    episodes rather than with the size of the scanned window.
+
+    A watermark only moves past episodes that are known to be stored. begin() lists
+    the episodes a run found for a feed and which of them it still has to process;
+    mark_stored() is called as each one commits, and the watermark advances to the
+    newest stored episode that no unfinished episode is older than. An episode that
+    fails therefore holds its feed's watermark back until a later run stores it.
+    The watermark is saved after the database commit, so a crash in between only
+    makes the next run re-read a few entries, which dedupe then skips.
+
+    Episodes without a publication date can't be ordered: they never move a
+    watermark, and readers always return them.
+
+    Attributes:
+        path (str): Path to the JSON file backing the watermarks.
+        advanced (int): Number of times a watermark moved forward in this process.
+    """
+
+    def __init__(self, path: str = DEFAULT_WATERMARKS_PATH):
+        """
+        Initializes the watermarks, loading any saved by a previous run.
+
+        Args:
+            path (str): Path to the JSON file backing the watermarks.
+        """
+        self.path = path
+        self.advanced = 0
+        self._lock = threading.Lock()
+        self._marks: Dict[str, Watermark] = {}
+        # per feed: audio_url -> publication time of episodes found this run and not yet stored
+        self._pending: Dict[str, Dict[str, datetime]] = {}
+        # per feed: audio URLs of undated episodes not yet stored; they never hold a watermark back
+        self._pending_undated: Dict[str, Set[str]] = {}
+        # per feed: stored episodes not yet covered by the watermark
+        self._stored: Dict[str, List[Watermark]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                self._marks = {
+                    rss_url: Watermark(datetime.fromisoformat(entry["published"]), entry.get("guid"))
+                    for rss_url, entry in entries.items()
+                }
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Ignoring unreadable feed watermarks %s: %s", path, e)
+
+
+    def get(self, rss_url: str) -> Optional[Watermark]:
+        """
+        Returns a feed's watermark.
+
+        Args:
+            rss_url (str): The URL of the RSS feed.
+
+        Returns:
+            Watermark, optional: The watermark, or None if nothing from the feed has been stored yet.
+        """
+        with self._lock:
+            return self._marks.get(rss_url)
+
+
+    def since(self, rss_urls: Iterable[str], default: Optional[datetime] = None) -> Dict[str, Since]:
+        """
+        Returns the read window of each feed, for an incremental run.
+
+        Args:
+            rss_urls (Iterable[str]): The feed URLs.
+            default (datetime, optional): Start date for feeds without a watermark.
+                If None, those feeds are read in full.
+
+        Returns:
+            Dict[str, Since]: The watermark, or the default start date, of each feed that has one.
+        """
+        windows: Dict[str, Since] = {}
+        with self._lock:
+            for rss_url in rss_urls:
+                mark = self._marks.get(rss_url, default)
+                if mark is not None:
+                    windows[rss_url] = mark
+        return windows
+
+
+    def begin(self, rss_url: str, episodes: Iterable[Dict], pending: Iterable[Dict]):
+        """
+        Records the episodes a run found for a feed.
+
+        Args:
+            rss_url (str): The URL of the RSS feed.
+            episodes (Iterable[Dict]): Every episode read from the feed.
+            pending (Iterable[Dict]): The subset still to be stored; the rest are already in the database.
+        """
+        pending_urls = {episode["audio_url"] for episode in pending}
+        with self._lock:
+            waiting = self._pending.setdefault(rss_url, {})
+            stored = self._stored.setdefault(rss_url, [])
+            for episode in episodes:
+                if episode["published"] == UNKNOWN_DATE:
+                    if episode["audio_url"] in pending_urls:
+                        self._pending_undated.setdefault(rss_url, set()).add(episode["audio_url"])
+                    continue
+                if episode["audio_url"] in pending_urls:
+                    waiting[episode["audio_url"]] = episode["published"]
+                else:
+                    stored.append(Watermark(episode["published"], episode.get("guid")))
+            self._advance(rss_url)
+
+
+    def mark_stored(self, episode: Dict):
+        """
+        Records that an episode has been committed, advancing its feed's watermark if possible.
+
+        Args:
+            episode (Dict): The stored episode, with 'rss_url', 'audio_url', 'published' and 'guid' keys.
+        """
+        rss_url = episode["rss_url"]
+        with self._lock:
+            if episode["published"] == UNKNOWN_DATE:
+                self._pending_undated.get(rss_url, set()).discard(episode["audio_url"])
+                return
+            self._pending.get(rss_url, {}).pop(episode["audio_url"], None)
+            self._stored.setdefault(rss_url, []).append(Watermark(episode["published"], episode.get("guid")))
+            self._advance(rss_url)
+
+
+    def pending(self, rss_url: str) -> int:
+        """
+        Returns how many episodes found for a feed in this process are not stored yet.
+
+        Args:
+            rss_url (str): The URL of the RSS feed.
+
+        Returns:
+            int: The number of episodes begin() listed as pending and mark_stored() has not seen, undated ones included.
+        """
+        with self._lock:
+            return len(self._pending.get(rss_url, {})) + len(self._pending_undated.get(rss_url, set()))
+
+
+    def _advance(self, rss_url: str):
+        """Moves a feed's watermark to its newest stored episode not newer than any pending one. Call with the lock held."""
+        waiting = self._pending.get(rss_url)
+        oldest_pending = min(waiting.values()) if waiting else None
+        stored = self._stored.get(rss_url, [])
+        ready = [mark for mark in stored if oldest_pending is None or mark.published <= oldest_pending]
+        if not ready:
+            return
+        newest = max(ready, key=lambda mark: mark.published)
+        self._stored[rss_url] = [mark for mark in stored if mark.published > newest.published]
+        current = self._marks.get(rss_url)
+        if current is not None and newest.published <= current.published:
+            return
+        self._marks[rss_url] = newest
+        self.advanced += 1
+        self._save()
+
+
+    def _save(self):
+        """Atomically writes the watermarks to disk."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                rss_url: {"published": mark.published.isoformat(), "guid": mark.guid}
+                for rss_url, mark in self._marks.items()
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns watermark statistics for this process.
+
+        Returns:
+            dict: feeds with a watermark, watermarks advanced, and episodes still holding a watermark back.
+        """
+        with self._lock:
+            return {
+                "feeds": len(self._marks),
+                "advanced": self.advanced,
+                "pending": sum(len(waiting) for waiting in self._pending.values()),
+            }
+
+
+def parse_since(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an ISO date or datetime such as FEED_INITIAL_SINCE.
+
+    Args:
+        value (str, optional): The text, e.g. '2024-01-01'.
+
+    Returns:
+        datetime, optional: The naive datetime, or None for an empty value.
+    """
+    return datetime.fromisoformat(value) if value else None